@@ -46,6 +46,7 @@ def run_migrations_offline() -> None:
     from src.app.models.barber_addon_link import barber_addon
     from src.app.models.barber_schedule import BarberSchedule
     from src.app.models.barber_unavailable_time import BarberUnavailableTime
+    from src.app.models.barber_daily_stats import BarberDailyStats
 
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
@@ -73,6 +74,7 @@ def run_migrations_online() -> None:
     from src.app.models.barber_addon_link import barber_addon
     from src.app.models.barber_schedule import BarberSchedule
     from src.app.models.barber_unavailable_time import BarberUnavailableTime
+    from src.app.models.barber_daily_stats import BarberDailyStats
 
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
@@ -0,0 +1,43 @@
+"""Add barber_daily_stats rollup table
+
+Revision ID: 5f2a8c1e6b47
+Revises: d41b7e0c93a8
+Create Date: 2026-10-18 14:22:05.318760
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2a8c1e6b47'
+down_revision: Union[str, None] = 'd41b7e0c93a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'barber_daily_stats',
+        sa.Column('barber_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('appointments', sa.Integer(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+        sa.Column('cancelled', sa.Integer(), nullable=False),
+        sa.Column('no_shows', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.BigInteger(), nullable=False),
+        sa.Column('booked_revenue', sa.BigInteger(), nullable=False),
+        sa.Column('booked_minutes', sa.Integer(), nullable=False),
+        sa.Column('scheduled_minutes', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['barber_id'], ['barbers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('barber_id', 'day'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('barber_daily_stats')
@@ -0,0 +1,42 @@
+"""Add reminder_sent_at to appointments
+
+Revision ID: 9c4e2a7b1d35
+Revises: 371c5603b4f6
+Create Date: 2026-10-18 10:12:41.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2a7b1d35'
+down_revision: Union[str, None] = '371c5603b4f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointments', sa.Column('reminder_sent_at', sa.DateTime(timezone=True), nullable=True))
+    # Appointments that already started never get a reminder.
+    op.execute("UPDATE appointments SET reminder_sent_at = now() WHERE scheduled_time <= now()")
+    op.create_index(
+        'ix_appointments_reminder_due',
+        'appointments',
+        ['scheduled_time'],
+        unique=False,
+        postgresql_where=sa.text("status = 'upcoming' AND reminder_sent_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_appointments_reminder_due',
+        table_name='appointments',
+        postgresql_where=sa.text("status = 'upcoming' AND reminder_sent_at IS NULL"),
+    )
+    op.drop_column('appointments', 'reminder_sent_at')
@@ -0,0 +1,75 @@
+"""Add indexes for appointment hot queries
+
+Revision ID: d41b7e0c93a8
+Revises: 9c4e2a7b1d35
+Create Date: 2026-10-18 11:03:27.194402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e0c93a8'
+down_revision: Union[str, None] = '9c4e2a7b1d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so bookings aren't blocked while the indexes are created.
+    with op.get_context().autocommit_block():
+        # Availability: non-cancelled appointments of a barber overlapping a window.
+        op.create_index(
+            'ix_appointments_barber_active_time',
+            'appointments',
+            ['barber_id', 'scheduled_time'],
+            unique=False,
+            postgresql_include=['scheduled_end'],
+            postgresql_where=sa.text("status != 'cancelled'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Admin listing by barber, ordered by (scheduled_time, id).
+        op.create_index(
+            'ix_appointments_barber_time_id',
+            'appointments',
+            ['barber_id', 'scheduled_time', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # /api/appointments/me: a user's appointments ordered by time.
+        op.create_index(
+            'ix_appointments_user_time',
+            'appointments',
+            ['user_id', 'scheduled_time'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_barber_unavailable_times_barber_start',
+            'barber_unavailable_times',
+            ['barber_id', 'start_time'],
+            unique=False,
+            postgresql_include=['end_time'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_barber_unavailable_times_barber_start', table_name='barber_unavailable_times',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_appointments_user_time', table_name='appointments',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_appointments_barber_time_id', table_name='appointments',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_appointments_barber_active_time', table_name='appointments',
+                      postgresql_concurrently=True, if_exists=True)
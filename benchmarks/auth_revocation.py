@@ -0,0 +1,84 @@
+"""
+Benchmark for the per-request revocation check in auth/dependencies.
+
+Compares the previous check (decode the JWT, then GET blacklist:{token} in Redis) with the
+jti-based check (decode the JWT, then consult the in-process Bloom filter and only go to
+Redis on a possible hit). Both variants run against the same number of logged-out tokens.
+
+Needs a reachable Redis at REDIS_URL. The benchmark writes under the bench_ key prefix
+plus the regular revocation keys, and removes what it wrote when it finishes.
+
+Run from the project root:
+    python -m benchmarks.auth_revocation
+"""
+import argparse
+import time
+import timeit
+from datetime import timedelta
+
+from jose import jwt
+
+from src.app.auth import revocation
+from src.app.auth.security import create_access_token
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+
+def legacy_check(client, token):
+    jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return client.get(f"bench_blacklist:{token}") is not None
+
+
+def jti_check(client, token):
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return revocation.is_revoked(client, payload["jti"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revoked", type=int, default=10_000, help="number of logged-out tokens")
+    parser.add_argument("--requests", type=int, default=5_000, help="authenticated requests per run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client = get_redis_client()
+    expires_delta = timedelta(minutes=10)
+    expires_at = time.time() + expires_delta.total_seconds()
+
+    revoked_jtis = []
+    pipe = client.pipeline(transaction=False)
+    for user_id in range(args.revoked):
+        token = create_access_token(user_id, expires_delta=expires_delta)
+        jti = jwt.get_unverified_claims(token)["jti"]
+        revoked_jtis.append(jti)
+        pipe.setex(f"bench_blacklist:{token}", expires_delta, "revoked")
+        pipe.setex(f"revoked_jti:{jti}", expires_delta, "revoked")
+        pipe.zadd(revocation.REVOKED_SET_KEY, {jti: expires_at})
+    pipe.execute()
+
+    active_tokens = [create_access_token(user_id, expires_delta=expires_delta) for user_id in range(args.requests)]
+
+    try:
+        revocation._filter.rebuild(client)
+
+        legacy = min(timeit.repeat(
+            lambda: [legacy_check(client, token) for token in active_tokens], number=1, repeat=args.repeat
+        ))
+        current = min(timeit.repeat(
+            lambda: [jti_check(client, token) for token in active_tokens], number=1, repeat=args.repeat
+        ))
+    finally:
+        keys = list(client.scan_iter(match="bench_blacklist:*", count=1000))
+        keys += [f"revoked_jti:{jti}" for jti in revoked_jtis]
+        for start in range(0, len(keys), 1000):
+            client.delete(*keys[start:start + 1000])
+        client.zrem(revocation.REVOKED_SET_KEY, *revoked_jtis)
+
+    print(f"revoked tokens: {args.revoked}, requests: {args.requests}")
+    print(f"full-token blacklist GET: {legacy / args.requests * 1e6:.1f} us/request")
+    print(f"jti + Bloom pre-check:    {current / args.requests * 1e6:.1f} us/request")
+    print(f"speedup:                  {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
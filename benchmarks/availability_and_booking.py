@@ -0,0 +1,145 @@
+"""
+Micro-benchmarks for get_available_timeslots and create_appointment_with_checks on the
+benchmark dataset (python -m benchmarks.dataset), called directly, without HTTP.
+
+- availability_uncached: use_cache=False, i.e. the schedule and busy intervals (or the
+  occupancy bitmaps) are read for every call
+- availability_cached: the same calls again, served by the availability cache
+- create_appointment: books a free slot of a random barber and upcoming day, with the
+  conflict check selected by BOOKING_CONFLICT_CHECK
+
+Bookings run inside one outer transaction that is rolled back at the end (commits become
+savepoints), and the cache entries they touched are invalidated, so the dataset stays as
+generated. Results are written as JSON, see benchmarks.results.
+
+Run from the project root:
+    python -m benchmarks.availability_and_booking --iterations 200
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.app.core.config import settings
+from src.app.database import get_engine
+from src.app.models.user import User
+from src.app.schemas.appointment import AppointmentCreate
+from src.app.services import availability_cache, occupancy_bitmap
+from src.app.services.timeslot_generator import create_appointment_with_checks, get_available_timeslots
+
+from benchmarks import results
+
+
+def _samples(rng: random.Random, dataset: dict, iterations: int) -> list:
+    """(barber_id, day, service_id, addon_ids) over the upcoming days of the dataset."""
+    today = date.fromisoformat(dataset["generated_on"])
+    days_ahead = dataset["weeks_ahead"] * 7
+    return [
+        (
+            rng.choice(dataset["barber_ids"]),
+            today + timedelta(days=rng.randrange(1, days_ahead)),
+            rng.choice(dataset["service_ids"]),
+            rng.choice([[], dataset["addon_ids"][:1]]),
+        )
+        for _ in range(iterations)
+    ]
+
+
+def _timed(call, *args, **kwargs):
+    started = time.perf_counter()
+    result = call(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def bench_availability(db: Session, samples: list, slot_interval: int) -> dict:
+    uncached, cached = [], []
+    for use_cache, timings in ((False, uncached), (True, None), (True, cached)):
+        # The middle pass fills the availability cache and isn't recorded.
+        for barber_id, day, service_id, addon_ids in samples:
+            _, elapsed = _timed(
+                get_available_timeslots, db, barber_id, day, service_id, addon_ids,
+                slot_interval_minutes=slot_interval, use_cache=use_cache
+            )
+            if timings is not None:
+                timings.append(elapsed)
+    return {
+        "availability_uncached": results.summarize(uncached),
+        "availability_cached": results.summarize(cached),
+    }
+
+
+def bench_create(db: Session, samples: list, user_id: int, slot_interval: int, booked: list) -> dict:
+    """Appends (barber_id, start, end) of every booking to `booked`, for the cleanup."""
+    timings, skipped = [], 0
+    for barber_id, day, service_id, addon_ids in samples:
+        free_slots = get_available_timeslots(
+            db, barber_id, day, service_id, addon_ids, slot_interval_minutes=slot_interval, use_cache=False
+        )
+        if not free_slots:
+            skipped += 1
+            continue
+        data = AppointmentCreate(
+            name="Benchmark",
+            phone_number="+380000000000",
+            barber_id=barber_id,
+            service_id=service_id,
+            addon_ids=addon_ids,
+            scheduled_time=free_slots[len(free_slots) // 2],
+        )
+        appointment, elapsed = _timed(create_appointment_with_checks, db, data, user_id)
+        timings.append(elapsed)
+        booked.append((barber_id, appointment.scheduled_time, appointment.scheduled_end))
+    return {"create_appointment": {**results.summarize(timings), "skipped_full_days": skipped}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--slot-interval", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file, by default benchmarks/results/<name>-<commit>.json")
+    args = parser.parse_args()
+
+    dataset = results.load_description()
+    rng = random.Random(args.seed)
+    availability_samples = _samples(rng, dataset, args.iterations)
+    booking_samples = _samples(rng, dataset, args.iterations)
+
+    booked = []
+    with get_engine().connect() as connection:
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            user_id = db.scalar(select(User.id).where(User.email == dataset["user_emails"][0]))
+            measured = bench_availability(db, availability_samples, args.slot_interval)
+            measured.update(bench_create(db, booking_samples, user_id, args.slot_interval, booked))
+        finally:
+            db.close()
+            transaction.rollback()
+            for barber_id, start, end in booked:
+                availability_cache.invalidate_interval(barber_id, start, end)
+                occupancy_bitmap.drop(barber_id, start, end)
+
+    for name, summary in measured.items():
+        print(f"{name:<22} p50 {summary.get('p50_ms')} ms  p95 {summary.get('p95_ms')} ms  "
+              f"p99 {summary.get('p99_ms')} ms  (n={summary['count']})")
+
+    results.write(
+        "availability_and_booking",
+        parameters={
+            **vars(args),
+            "booking_conflict_check": settings.BOOKING_CONFLICT_CHECK,
+            "availability_cache_enabled": settings.AVAILABILITY_CACHE_ENABLED,
+            "occupancy_bitmap_enabled": settings.OCCUPANCY_BITMAP_ENABLED,
+        },
+        results=measured,
+        output=args.output,
+        dataset={key: value for key, value in dataset.items() if key != "user_emails"},
+    )
+
+
+if __name__ == "__main__":
+    main()
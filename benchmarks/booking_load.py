@@ -0,0 +1,184 @@
+"""
+HTTP load scenario for the booking flow, against a running API on the benchmark dataset.
+
+Every virtual user repeats: log in -> get the available timeslots of a random barber and
+upcoming day -> book one of them (another one after a 409) -> cancel the booking, for
+--duration seconds. Each virtual user logs in as its own dataset user, so use at most as
+many as the dataset has, and run the API with RATE_LIMIT_ENABLED=false (docker-compose.bench.yml
+does) or the logins are throttled.
+
+Reports p50/p95/p99 per step and for the whole scenario, status codes per step, and
+throughput (scenarios and requests per second) after the --warmup seconds. Results are
+written as JSON, see benchmarks.results.
+
+Run from the project root:
+    python -m benchmarks.booking_load --base-url http://localhost:8001 --users 20 --duration 60
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from benchmarks import results
+
+STEPS = ("login", "availability", "book", "cancel")
+
+
+class Recorder:
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.requests = 0
+        self.scenarios = 0
+        self.conflicts = 0
+
+    def recording(self) -> bool:
+        return time.perf_counter() >= self.warmup_until
+
+    async def call(self, step: str, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            if started >= self.warmup_until:
+                self.statuses[step][type(e).__name__] += 1
+            raise
+        if started >= self.warmup_until:
+            self.requests += 1
+            self.statuses[step][str(response.status_code)] += 1
+            if not response.is_error:
+                self.latencies[step].append(time.perf_counter() - started)
+        return response
+
+
+async def scenario(client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, dataset: dict,
+                   email: str, slot_interval: int) -> None:
+    started = time.perf_counter()
+
+    response = await recorder.call(
+        "login", client, "POST", "/api/auth/login", json={"email": email, "password": dataset["password"]}
+    )
+    if response.is_error:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    barber_id = rng.choice(dataset["barber_ids"])
+    service_id = rng.choice(dataset["service_ids"])
+    target_date = datetime.now(timezone.utc).date() + timedelta(days=rng.randrange(1, dataset["weeks_ahead"] * 7))
+    response = await recorder.call(
+        "availability", client, "GET", "/api/timeslots/available", headers=headers,
+        params={
+            "barber_id": barber_id,
+            "target_date": target_date.isoformat(),
+            "service_id": service_id,
+            "slot_interval_minutes": slot_interval,
+        },
+    )
+    if response.is_error or not response.json():
+        return
+    free_slots = response.json()
+
+    appointment_id = None
+    for scheduled_time in rng.sample(free_slots, min(2, len(free_slots))):
+        response = await recorder.call(
+            "book", client, "POST", "/api/appointments/", headers=headers,
+            json={
+                "name": "Load test",
+                "phoneNumber": "+380000000000",
+                "barberId": barber_id,
+                "serviceId": service_id,
+                "addonIds": [],
+                "scheduled_time": scheduled_time,
+            },
+        )
+        if response.status_code == 409:
+            if recorder.recording():
+                recorder.conflicts += 1
+            continue
+        if not response.is_error:
+            appointment_id = response.json()["id"]
+        break
+    if appointment_id is None:
+        return
+
+    response = await recorder.call("cancel", client, "DELETE", f"/api/appointments/{appointment_id}", headers=headers)
+    if not response.is_error and started >= recorder.warmup_until:
+        recorder.scenarios += 1
+        recorder.latencies["scenario"].append(time.perf_counter() - started)
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, dataset: dict, email: str, seed: int,
+                       deadline: float, slot_interval: int) -> None:
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        try:
+            await scenario(client, recorder, rng, dataset, email, slot_interval)
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+
+
+async def run(args, dataset: dict) -> dict:
+    if args.users > len(dataset["user_emails"]):
+        raise SystemExit(f"The dataset has {len(dataset['user_emails'])} users, use fewer virtual users")
+
+    started = time.perf_counter()
+    recorder = Recorder(warmup_until=started + args.warmup)
+    deadline = started + args.warmup + args.duration
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        await asyncio.gather(*(
+            virtual_user(client, recorder, dataset, dataset["user_emails"][index], args.seed + index, deadline,
+                         args.slot_interval)
+            for index in range(args.users)
+        ))
+    measured_seconds = time.perf_counter() - recorder.warmup_until
+
+    return {
+        "duration_seconds": round(measured_seconds, 3),
+        "throughput": {
+            "scenarios_per_second": round(recorder.scenarios / measured_seconds, 3),
+            "requests_per_second": round(recorder.requests / measured_seconds, 3),
+        },
+        "booking_conflicts": recorder.conflicts,
+        "latency": {step: results.summarize(recorder.latencies[step]) for step in (*STEPS, "scenario")},
+        "status_codes": {step: dict(recorder.statuses[step]) for step in STEPS},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds, after the warmup")
+    parser.add_argument("--warmup", type=float, default=10, help="Seconds run before measuring")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--slot-interval", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file, by default benchmarks/results/<name>-<commit>.json")
+    args = parser.parse_args()
+
+    dataset = results.load_description()
+    measured = asyncio.run(run(args, dataset))
+
+    print(f"{measured['throughput']['scenarios_per_second']} scenarios/s, "
+          f"{measured['throughput']['requests_per_second']} requests/s over {measured['duration_seconds']}s")
+    for step, summary in measured["latency"].items():
+        print(f"{step:<13} p50 {summary.get('p50_ms')} ms  p95 {summary.get('p95_ms')} ms  "
+              f"p99 {summary.get('p99_ms')} ms  (n={summary['count']})  {measured['status_codes'].get(step, '')}")
+
+    results.write(
+        "booking_load",
+        parameters=vars(args),
+        results=measured,
+        output=args.output,
+        dataset={key: value for key, value in dataset.items() if key != "user_emails"},
+    )
+
+
+if __name__ == "__main__":
+    main()
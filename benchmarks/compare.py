@@ -0,0 +1,67 @@
+"""
+Compares two result files of the same benchmark, e.g. of the parent commit and of a change.
+
+Prints every numeric result side by side with the relative change and marks regressions
+beyond --threshold percent: higher latencies (*_ms) and lower throughput (*_per_second).
+Exits with 1 when there are regressions and --fail-on-regression is given. Warns when the
+files were recorded on different datasets or with different parameters.
+
+Run from the project root:
+    python -m benchmarks.compare benchmarks/results/booking_load-<base>.json benchmarks/results/booking_load-<head>.json
+"""
+import argparse
+import sys
+
+from benchmarks import results
+
+
+def _regressed(metric: str, baseline: float, candidate: float, threshold: float) -> bool:
+    if not baseline:
+        return False
+    change = (candidate - baseline) / baseline * 100
+    if metric.endswith("_ms"):
+        return change > threshold
+    if metric.endswith("_per_second"):
+        return change < -threshold
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10, help="Tolerated change in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    baseline, candidate = results.load(args.baseline), results.load(args.candidate)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise SystemExit(f"Different benchmarks: {baseline['benchmark']} and {candidate['benchmark']}")
+    for section in ("dataset", "parameters"):
+        if baseline.get(section) != candidate.get(section):
+            print(f"warning: the {section} differ, the numbers may not be comparable", file=sys.stderr)
+
+    print(f"{baseline['benchmark']}: {baseline['environment']['commit']} -> {candidate['environment']['commit']}")
+    before, after = results.flatten(baseline["results"]), results.flatten(candidate["results"])
+    width = max(len(metric) for metric in before.keys() | after.keys())
+    regressions = []
+    for metric in sorted(before.keys() | after.keys()):
+        old, new = before.get(metric), after.get(metric)
+        if old is None or new is None:
+            print(f"{metric:<{width}}  {old!s:>12}  {new!s:>12}")
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        marker = ""
+        if _regressed(metric, old, new, args.threshold):
+            regressions.append(metric)
+            marker = "  REGRESSION"
+        print(f"{metric:<{width}}  {old:>12}  {new:>12}  {change:>8}{marker}")
+
+    if regressions:
+        print(f"{len(regressions)} regressions beyond {args.threshold}%")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Reproducible benchmark dataset, built on seed.py's catalog.
+
+Creates N barbers offering the seed services and addons, weekly schedules (5 or 6 working days),
+months of past appointments and some weeks of upcoming ones at the requested occupancy,
+unavailable times (days off and shorter blocks) and verified users who can log in with
+--password. The same --seed and parameters always give the same rows, relative to the day
+the dataset is generated. Appointments never overlap, as no_overlap_barber_time requires;
+past ones are mostly completed, some cancelled and some left upcoming (no-shows).
+
+The description of the dataset (ids, user emails, row counts) is written to
+benchmarks/results/dataset.json, where the other benchmarks read it from.
+
+Meant for the benchmark containers of docker-compose.bench.yml; --reset empties every table
+and flushes the Redis database first.
+
+Run from the project root, against a database migrated to head:
+    python -m benchmarks.dataset --barbers 20 --months 6 --reset
+"""
+import argparse
+import json
+import random
+import time as timer
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from seed import seed_catalog
+from src.app.auth.security import hash_password
+from src.app.core.redis_client import get_redis_client
+from src.app.database import Base, get_session_local
+from src.app.models import barber_daily_stats  # noqa: F401, registers the table for --reset
+from src.app.models.appointment import Appointment, AppointmentStatus
+from src.app.models.appointment_addon_link import appointment_addon
+from src.app.models.barber import Barber
+from src.app.models.barber_schedule import BarberSchedule
+from src.app.models.barber_unavailable_time import BarberUnavailableTime
+from src.app.models.user import User
+
+from benchmarks.results import DATASET_FILE
+
+SLOT_MINUTES = 15
+BATCH_SIZE = 5000
+
+
+def user_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def reset(db: Session) -> None:
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    db.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    db.commit()
+    get_redis_client().flushdb()
+
+
+def _utc(day: date, at: time) -> datetime:
+    return datetime.combine(day, at, tzinfo=timezone.utc)
+
+
+def _weekly_schedule(rng: random.Random) -> dict:
+    """{day_of_week: (start, end)} with 5 or 6 working days, Monday = 0."""
+    working_days = sorted(rng.sample(range(7), rng.choice([5, 6])))
+    start_hour = rng.choice([8, 9, 10])
+    end_hour = start_hour + rng.choice([8, 9, 10])
+    return {day_of_week: (time(start_hour), time(end_hour)) for day_of_week in working_days}
+
+
+def _unavailable_blocks(rng: random.Random, work_start: datetime, work_end: datetime) -> list:
+    roll = rng.random()
+    if roll < 0.03:
+        return [(work_start, work_end, "Day off")]
+    if roll < 0.13:
+        start = work_start + timedelta(minutes=SLOT_MINUTES * rng.randrange(0, 24))
+        return [(start, min(start + timedelta(minutes=rng.choice([60, 90, 120])), work_end), "Break")]
+    return []
+
+
+def _day_appointments(rng: random.Random, work_start: datetime, work_end: datetime, blocks: list,
+                      occupancy: float, offers: list) -> list:
+    """Non-overlapping (start, end, offer) for one working day, on the SLOT_MINUTES grid."""
+    appointments = []
+    cursor = work_start
+    while cursor < work_end:
+        offer = rng.choice(offers)
+        end = cursor + timedelta(minutes=offer["duration"])
+        if end > work_end:
+            break
+        blocked = any(start < end and cursor < block_end for start, block_end, _ in blocks)
+        if not blocked and rng.random() < occupancy:
+            appointments.append((cursor, end, offer))
+            cursor = end
+        else:
+            cursor += timedelta(minutes=SLOT_MINUTES)
+    return appointments
+
+
+def _status(rng: random.Random, end: datetime, now: datetime) -> AppointmentStatus:
+    roll = rng.random()
+    if roll < 0.1:
+        return AppointmentStatus.cancelled
+    if end > now or roll < 0.15:
+        return AppointmentStatus.upcoming
+    return AppointmentStatus.completed
+
+
+def _flush_appointments(db: Session, rows: list, addon_ids: list) -> None:
+    ids = db.execute(
+        insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    links = [
+        {"appointment_id": appointment_id, "addon_id": addon_id}
+        for appointment_id, addons in zip(ids, addon_ids)
+        for addon_id in addons
+    ]
+    if links:
+        db.execute(insert(appointment_addon), links)
+    rows.clear()
+    addon_ids.clear()
+
+
+def generate(db: Session, barbers: int, users: int, months: int, weeks_ahead: int, occupancy: float,
+             seed: int, password: str) -> dict:
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).date()
+    now = datetime.now(timezone.utc)
+    first_day = today - timedelta(days=30 * months)
+    last_day = today + timedelta(weeks=weeks_ahead)
+
+    barber_models, services, addons = seed_catalog(db, [f"Barber {index + 1}" for index in range(barbers)])
+    barber_ids = [barber.id for barber in barber_models]
+    # A service alone or with one or two addons, as booked in the app.
+    offers = [
+        {"service": service, "addons": chosen}
+        for service in services
+        for chosen in ([], addons[:1], addons[1:], addons)
+    ]
+    for offer in offers:
+        offer["duration"] = offer["service"].duration + sum(addon.duration for addon in offer["addons"])
+        offer["price"] = offer["service"].price + sum(addon.price for addon in offer["addons"])
+
+    hashed_password = hash_password(password)
+    db.execute(insert(User), [
+        {
+            "name": f"Bench User {index}",
+            "email": user_email(index),
+            "hashed_password": hashed_password,
+            "role": "user",
+            "is_verified": True,
+        }
+        for index in range(users)
+    ])
+    user_ids = db.scalars(select(User.id).order_by(User.id)).all()
+
+    appointment_rows, appointment_addons, unavailable_rows = [], [], []
+    appointments_total = 0
+    for barber_id in barber_ids:
+        schedule = _weekly_schedule(rng)
+        db.execute(insert(BarberSchedule), [
+            {"barber_id": barber_id, "day_of_week": day_of_week, "start_time": start, "end_time": end}
+            for day_of_week, (start, end) in schedule.items()
+        ])
+
+        day = first_day
+        while day < last_day:
+            if day.weekday() in schedule:
+                start, end = schedule[day.weekday()]
+                work_start, work_end = _utc(day, start), _utc(day, end)
+                blocks = _unavailable_blocks(rng, work_start, work_end)
+                unavailable_rows.extend(
+                    {"barber_id": barber_id, "start_time": block_start, "end_time": block_end, "reason": reason}
+                    for block_start, block_end, reason in blocks
+                )
+                for start_at, end_at, offer in _day_appointments(rng, work_start, work_end, blocks, occupancy, offers):
+                    user_index = rng.randrange(len(user_ids))
+                    appointment_rows.append({
+                        "name": f"Bench User {user_index}",
+                        "phone_number": f"+380{user_index:09d}",
+                        "barber_id": barber_id,
+                        "service_id": offer["service"].id,
+                        "total_duration": offer["duration"],
+                        "total_price": offer["price"],
+                        "user_id": user_ids[user_index],
+                        "scheduled_time": start_at,
+                        "scheduled_end": end_at,
+                        "status": _status(rng, end_at, now),
+                    })
+                    appointment_addons.append([addon.id for addon in offer["addons"]])
+            day += timedelta(days=1)
+
+            if len(appointment_rows) >= BATCH_SIZE:
+                appointments_total += len(appointment_rows)
+                _flush_appointments(db, appointment_rows, appointment_addons)
+
+    appointments_total += len(appointment_rows)
+    if appointment_rows:
+        _flush_appointments(db, appointment_rows, appointment_addons)
+    if unavailable_rows:
+        db.execute(insert(BarberUnavailableTime), unavailable_rows)
+    db.commit()
+
+    return {
+        "seed": seed,
+        "generated_on": today.isoformat(),
+        "barbers": barbers,
+        "users": users,
+        "months": months,
+        "weeks_ahead": weeks_ahead,
+        "occupancy": occupancy,
+        "password": password,
+        "barber_ids": barber_ids,
+        "service_ids": [service.id for service in services],
+        "addon_ids": [addon.id for addon in addons],
+        "user_emails": [user_email(index) for index in range(users)],
+        "rows": {
+            "appointments": appointments_total,
+            "barber_unavailable_times": len(unavailable_rows),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--barbers", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--months", type=int, default=6, help="Months of past appointments")
+    parser.add_argument("--weeks-ahead", type=int, default=4, help="Weeks of upcoming appointments")
+    parser.add_argument("--occupancy", type=float, default=0.6, help="Share of free slots that get booked")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--reset", action="store_true", help="Empty all tables and flush Redis first")
+    args = parser.parse_args()
+
+    with get_session_local()() as db:
+        if args.reset:
+            reset(db)
+        elif db.scalar(select(func.count()).select_from(Barber)):
+            raise SystemExit("The database already has barbers; pass --reset to empty it (benchmark databases only)")
+
+        started = timer.perf_counter()
+        description = generate(
+            db, args.barbers, args.users, args.months, args.weeks_ahead, args.occupancy, args.seed, args.password
+        )
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+    DATASET_FILE.parent.mkdir(parents=True, exist_ok=True)
+    DATASET_FILE.write_text(json.dumps(description, indent=2) + "\n")
+    print(
+        f"{description['rows']['appointments']} appointments and "
+        f"{description['rows']['barber_unavailable_times']} unavailable times for {args.barbers} barbers "
+        f"generated in {timer.perf_counter() - started:.1f}s, described in {DATASET_FILE}"
+    )
+
+
+if __name__ == "__main__":
+    main()
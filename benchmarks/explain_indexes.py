@@ -0,0 +1,171 @@
+"""
+EXPLAIN-based regression check for the appointment hot queries.
+
+Seeds a synthetic dataset inside a transaction, runs ANALYZE, and EXPLAINs the statements the
+application itself builds (the busy-interval loaders of the availability path, the admin and
+/appointments/me listings and the reminder batch). Fails (exit code 1) if a plan doesn't use the
+index added for its query or reads appointments or barber_unavailable_times with a sequential
+scan. The transaction is rolled back at the end, so the database is left as it was. Run it
+against a database migrated to head, e.g. in CI after `alembic upgrade head`.
+
+Run from the project root:
+    python -m benchmarks.explain_indexes
+"""
+import argparse
+import sys
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from src.app.crud.appointment import barber_appointments_query, user_appointment_views_query
+from src.app.database import get_engine
+from src.app.services.timeslot_generator import busy_appointments_query, unavailable_times_query
+from src.app.tasks.reminders import due_reminders_query
+
+CHECKED_TABLES = {"appointments", "barber_unavailable_times"}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, executed with its bind parameters processed as usual."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def seed(conn: Connection, barbers: int, appointments_per_barber: int, users: int) -> dict:
+    service_id = conn.execute(text(
+        "INSERT INTO services (name, duration, price) VALUES ('explain-check', 25, 100) RETURNING id"
+    )).scalar_one()
+    barber_ids = conn.execute(text(
+        "INSERT INTO barbers (name) SELECT 'explain-check-' || g FROM generate_series(1, :n) g RETURNING id"
+    ), {"n": barbers}).scalars().all()
+    user_ids = conn.execute(text(
+        "INSERT INTO users (name, email, hashed_password, role, is_verified) "
+        "SELECT 'explain-check', 'explain-check-' || g || '@example.invalid', '-', 'user', true "
+        "FROM generate_series(1, :n) g RETURNING id"
+    ), {"n": users}).scalars().all()
+
+    # 25-minute appointments every 30 minutes, half in the past and half ahead, so the
+    # no_overlap_barber_time constraint holds; about 10% are cancelled.
+    conn.execute(text("""
+        INSERT INTO appointments (name, phone_number, barber_id, service_id, total_duration, total_price,
+                                  user_id, scheduled_time, scheduled_end, status)
+        SELECT 'explain-check', '-', b.id, :service_id, 25, 100,
+               (CAST(:user_ids AS int[]))[1 + floor(random() * :users)::int],
+               s.t, s.t + interval '25 minutes',
+               CAST(CASE WHEN random() < 0.1 THEN 'cancelled' ELSE 'upcoming' END AS appointmentstatus)
+        FROM unnest(CAST(:barber_ids AS int[])) AS b(id)
+        CROSS JOIN generate_series(0, :per_barber - 1) AS k
+        CROSS JOIN LATERAL (
+            SELECT date_trunc('hour', now()) + (k - :per_barber / 2) * interval '30 minutes' AS t
+        ) AS s
+    """), {
+        "service_id": service_id,
+        "user_ids": user_ids,
+        "users": len(user_ids),
+        "barber_ids": barber_ids,
+        "per_barber": appointments_per_barber,
+    })
+    conn.execute(text("""
+        INSERT INTO barber_unavailable_times (barber_id, start_time, end_time, reason)
+        SELECT b.id, now() - interval '365 days' + k * interval '1 day',
+               now() - interval '365 days' + k * interval '1 day' + interval '1 hour', 'explain-check'
+        FROM unnest(CAST(:barber_ids AS int[])) AS b(id)
+        CROSS JOIN generate_series(0, 500) AS k
+    """), {"barber_ids": barber_ids})
+
+    conn.execute(text("ANALYZE appointments"))
+    conn.execute(text("ANALYZE barber_unavailable_times"))
+    return {"barber_id": barber_ids[len(barber_ids) // 2], "user_id": user_ids[len(user_ids) // 2]}
+
+
+def hot_queries(barber_id: int, user_id: int) -> dict:
+    """Name -> (statement, index its plan must use)."""
+    now = datetime.now(timezone.utc)
+    # The window _load_busy_intervals_by_day queries for a week of availability.
+    window_start = datetime.combine(now.date(), time.min).replace(tzinfo=timezone.utc)
+    window_end = window_start + timedelta(days=7)
+    return {
+        "availability: appointments of a barber in a window": (
+            busy_appointments_query([barber_id], window_start, window_end),
+            "ix_appointments_barber_active_time",
+        ),
+        "availability: unavailable times of a barber in a window": (
+            unavailable_times_query([barber_id], window_start, window_end),
+            "ix_barber_unavailable_times_barber_start",
+        ),
+        "/appointments/me: a user's upcoming appointments": (
+            user_appointment_views_query(user_id, limit=50, now=now, when="upcoming"),
+            "ix_appointments_user_time",
+        ),
+        "/appointments/me: a user's past appointments": (
+            user_appointment_views_query(user_id, limit=50, now=now, when="past"),
+            "ix_appointments_user_time",
+        ),
+        "admin listing: a barber's appointments by (scheduled_time, id)": (
+            barber_appointments_query(barber_id, limit=50, after=(now, 0)),
+            "ix_appointments_barber_time_id",
+        ),
+        "reminders: due upcoming appointments": (
+            due_reminders_query(now),
+            "ix_appointments_reminder_due",
+        ),
+    }
+
+
+def scanned(plan: dict) -> tuple:
+    """(tables read with a sequential scan, indexes used) anywhere in the plan."""
+    seq_scans, indexes = set(), set()
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        seq_scans.add(plan["Relation Name"])
+    if "Index Name" in plan:
+        indexes.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        child_seq_scans, child_indexes = scanned(child)
+        seq_scans |= child_seq_scans
+        indexes |= child_indexes
+    return seq_scans, indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--barbers", type=int, default=20)
+    parser.add_argument("--appointments-per-barber", type=int, default=5_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    failures = []
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            ids = seed(conn, args.barbers, args.appointments_per_barber, args.users)
+            for name, (statement, expected_index) in hot_queries(**ids).items():
+                plan = conn.execute(Explain(statement)).scalar_one()
+                seq_scans, indexes = scanned(plan[0]["Plan"])
+                if seq_scans:
+                    failures.append(f"{name} falls back to a sequential scan on {', '.join(sorted(seq_scans))}")
+                if expected_index not in indexes:
+                    used = ", ".join(sorted(indexes)) or "no index"
+                    failures.append(f"{name} doesn't use {expected_index} (uses {used})")
+                ok = not seq_scans and expected_index in indexes
+                print(f"{'ok' if ok else 'FAIL':8} {name}")
+        finally:
+            transaction.rollback()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
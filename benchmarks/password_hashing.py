@@ -0,0 +1,87 @@
+"""
+Benchmark for password verification under concurrent logins.
+
+Runs the same number of concurrent bcrypt verifications two ways and reports logins/sec and
+how late a 10ms event-loop ticker fired meanwhile (what every other request on the worker feels):
+
+- inline: verify_password in the request threadpool, as the login endpoint used to do
+- pool:   auth/hashing's process pool, as the login endpoint does now
+
+Needs only the settings environment (SECRET_KEY etc.), no database or Redis.
+
+Run from the project root:
+    python -m benchmarks.password_hashing
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from src.app.auth import hashing
+from src.app.auth.security import hash_password, verify_password
+from src.app.core.config import settings
+
+
+async def _ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+
+async def _storm(verify, logins: int, concurrency: int) -> tuple[float, float, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    stop, lags = asyncio.Event(), []
+
+    async def login():
+        async with semaphore:
+            assert await verify()
+
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    return logins / elapsed, p99 * 1000, (lags[-1] if lags else 0.0) * 1000
+
+
+async def run(logins: int, concurrency: int, password: str):
+    stored = hash_password(password)
+
+    async def inline():
+        return await run_in_threadpool(verify_password, password, stored)
+
+    async def pooled():
+        is_valid, _ = await hashing.verify_and_update_password(password, stored)
+        return is_valid
+
+    hashing.start()
+    await pooled()  # wait for the workers to come up
+
+    for name, verify in (("inline", inline), ("pool", pooled)):
+        rate, p99, worst = await _storm(verify, logins, concurrency)
+        print(f"{name:7} {rate:8.1f} logins/s   event loop lag p99 {p99:7.1f} ms, max {worst:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--password", default="correct horse battery staple")
+    args = parser.parse_args()
+
+    print(f"bcrypt rounds: {settings.BCRYPT_ROUNDS}, pool workers: {hashing._worker_count()}, "
+          f"max pending: {settings.PASSWORD_HASH_MAX_PENDING}")
+    try:
+        asyncio.run(run(args.logins, args.concurrency, args.password))
+    finally:
+        hashing.shutdown()
+
+
+if __name__ == "__main__":
+    main()
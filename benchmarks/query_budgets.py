@@ -0,0 +1,171 @@
+"""
+Query budget check for the routes declaring @query_budget, against a running API on the benchmark
+dataset (python -m benchmarks.dataset) started with QUERY_BUDGET_MODE=strict.
+
+In strict mode a request over its route's budget is answered with 500 and a report of the
+statements it ran, so every budgeted route is called once (the booking flow of a dataset user,
+the catalog lists, availability and the admin barber listing) and any failed request fails the
+check. The X-Query-Count of every request is printed. The check also runs the service-level
+N+1 guard with capture_queries(): the availability of a 7-day range must take as many
+statements as a single day. It is measured with the occupancy bitmaps off, so the count
+doesn't depend on which days Redis already holds.
+
+An admin user is created for the admin-only listings and removed at the end, and the booking is
+cancelled, so the dataset stays as generated apart from one cancelled appointment.
+Exits with 1 on any failure.
+
+Run from the project root, with the API started as in docker-compose.bench.yml:
+    QUERY_BUDGET_MODE=strict uvicorn src.app.main:app --port 8001 &
+    python -m benchmarks.query_budgets --base-url http://localhost:8001
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from src.app.auth.security import hash_password
+from src.app.core.config import settings
+from src.app.core.query_budget import capture_queries
+from src.app.database import get_session_local
+from src.app.models.user import User
+from src.app.services.timeslot_generator import get_available_timeslots_range
+
+from benchmarks import results
+
+ADMIN_EMAIL = "bench-query-budgets-admin@example.com"
+
+
+class Checker:
+    def __init__(self, client: httpx.Client):
+        self.client = client
+        self.failures = []
+
+    def call(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        response = self.client.request(method, url, **kwargs)
+        count = response.headers.get("x-query-count", "-")
+        print(f"{'FAIL' if response.is_error else 'ok':8} {count:>3} statements  {name}")
+        if response.is_error:
+            self.failures.append(f"{name}: {response.status_code} {response.text}")
+        return response
+
+    def login(self, email: str, password: str) -> dict:
+        response = self.call(f"login ({email})", "POST", "/api/auth/login", json={"email": email, "password": password})
+        if response.is_error:
+            raise SystemExit(f"Can't log in as {email}: {response.status_code} {response.text}")
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def check_routes(checker: Checker, dataset: dict, slot_interval: int) -> None:
+    barber_id, service_id = dataset["barber_ids"][0], dataset["service_ids"][0]
+    addon_ids = dataset["addon_ids"][:1]
+    day = datetime.now(timezone.utc).date() + timedelta(days=1)
+
+    headers = checker.login(dataset["user_emails"][0], dataset["password"])
+    admin_headers = checker.login(ADMIN_EMAIL, dataset["password"])
+    # The services listing is admin-only.
+    for catalog, catalog_headers in (("services", admin_headers), ("barbers", headers), ("addons", headers)):
+        checker.call(f"GET /api/{catalog}/", "GET", f"/api/{catalog}/", headers=catalog_headers)
+
+    timeslot_params = {"service_id": service_id, "addon_ids": addon_ids, "slot_interval_minutes": slot_interval}
+    range_params = {**timeslot_params, "date_from": day.isoformat(), "date_to": (day + timedelta(days=6)).isoformat()}
+    checker.call(
+        "GET /api/timeslots/first-available", "GET", "/api/timeslots/first-available", headers=headers,
+        params=range_params,
+    )
+    week = checker.call(
+        "GET /api/timeslots/available/range", "GET", "/api/timeslots/available/range", headers=headers,
+        params={**range_params, "barber_id": barber_id},
+    )
+    # The first day of the week the barber has free slots on, as the barber may not work tomorrow.
+    if not week.is_error:
+        day = next((date.fromisoformat(entry["date"]) for entry in week.json() if entry["slots"]), day)
+    free_slots = checker.call(
+        "GET /api/timeslots/available", "GET", "/api/timeslots/available", headers=headers,
+        params={**timeslot_params, "barber_id": barber_id, "target_date": day.isoformat()},
+    )
+
+    if not free_slots.is_error and free_slots.json():
+        booked = checker.call(
+            "POST /api/appointments/", "POST", "/api/appointments/", headers=headers,
+            json={
+                "name": "Query budget check",
+                "phoneNumber": "+380000000000",
+                "barberId": barber_id,
+                "serviceId": service_id,
+                "addonIds": addon_ids,
+                "scheduled_time": free_slots.json()[0],
+            },
+        )
+        if not booked.is_error:
+            checker.call(
+                "DELETE /api/appointments/{id}", "DELETE", f"/api/appointments/{booked.json()['id']}", headers=headers
+            )
+    else:
+        checker.failures.append(f"No free slot for barber {barber_id} in the next week, the booking wasn't checked")
+
+    for when in ("upcoming", "past"):
+        checker.call(f"GET /api/appointments/me?when={when}", "GET", "/api/appointments/me", headers=headers,
+                     params={"when": when})
+
+    checker.call(
+        "GET /api/appointments/barber/{id}", "GET", f"/api/appointments/barber/{barber_id}", headers=admin_headers
+    )
+
+
+def check_range_statements(db: Session, dataset: dict, slot_interval: int) -> list:
+    """Statement counts of the availability of one day and of seven days must be the same."""
+    barber_id, service_id = dataset["barber_ids"][0], dataset["service_ids"][0]
+    day = datetime.now(timezone.utc).date() + timedelta(days=1)
+    counts = {}
+    bitmaps_enabled = settings.OCCUPANCY_BITMAP_ENABLED
+    settings.OCCUPANCY_BITMAP_ENABLED = False
+    try:
+        for days in (1, 7):
+            with capture_queries() as log:
+                get_available_timeslots_range(
+                    db, barber_id, day, day + timedelta(days=days - 1), service_id, slot_interval_minutes=slot_interval
+                )
+            counts[days] = log.total
+            print(f"{'ok':8} {log.total:>3} statements  get_available_timeslots_range over {days} day(s)")
+    finally:
+        settings.OCCUPANCY_BITMAP_ENABLED = bitmaps_enabled
+    if counts[7] != counts[1]:
+        return [f"get_available_timeslots_range runs {counts[1]} statements for 1 day and {counts[7]} for 7:\n"
+                f"{log.report()}"]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--slot-interval", type=int, default=15)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    dataset = results.load_description()
+    failures = []
+    with get_session_local()() as db:
+        db.add(User(name="Query budget admin", email=ADMIN_EMAIL, hashed_password=hash_password(dataset["password"]),
+                    role="admin", is_verified=True))
+        db.commit()
+        try:
+            with httpx.Client(base_url=args.base_url, timeout=args.timeout) as client:
+                checker = Checker(client)
+                check_routes(checker, dataset, args.slot_interval)
+                failures.extend(checker.failures)
+            failures.extend(check_range_statements(db, dataset, args.slot_interval))
+        finally:
+            db.rollback()
+            db.execute(delete(User).where(User.email == ADMIN_EMAIL))
+            db.commit()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Shared helpers of the benchmark suite: latency percentiles and the JSON result files.
+
+Every result file records the git commit (and whether the tree had local changes), the
+Python version, the run parameters and the dataset description stored by benchmarks.dataset,
+so two files can be compared with benchmarks.compare.
+"""
+import json
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DATASET_FILE = RESULTS_DIR / "dataset.json"
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Count, mean and nearest-rank p50/p95/p99/max of latencies in seconds, reported in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(percentile(50), 3),
+        "p95_ms": round(percentile(95), 3),
+        "p99_ms": round(percentile(99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, cwd=RESULTS_DIR.parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def write(benchmark: str, parameters: dict, results: dict, output: Optional[str] = None,
+          dataset: Optional[dict] = None) -> Path:
+    """Writes benchmarks/results/<benchmark>-<commit>.json (or `output`) and returns its path."""
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "dataset": dataset,
+        "parameters": parameters,
+        "results": results,
+    }
+    if output:
+        path = Path(output)
+    else:
+        commit = (document["environment"]["commit"] or "unknown")[:12]
+        path = RESULTS_DIR / f"{benchmark}-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2, default=str) + "\n")
+    print(f"results written to {path}")
+    return path
+
+
+def load_description() -> dict:
+    """The description of the dataset written by benchmarks.dataset."""
+    if not DATASET_FILE.exists():
+        raise SystemExit(f"{DATASET_FILE} not found, generate the dataset first: python -m benchmarks.dataset")
+    return json.loads(DATASET_FILE.read_text())
+
+
+def load(path: str) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """{"a": {"p95_ms": 1.0}} -> {"a.p95_ms": 1.0}, numbers only."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark for the timeslot sweep in services/timeslot_generator.
+
+Compares the previous per-slot scan over all booked intervals with the current
+single forward sweep on a busy day with 5-minute granularity.
+
+Run from the project root:
+    python -m benchmarks.timeslot_sweep
+"""
+import argparse
+import timeit
+from datetime import date, datetime, time, timedelta, timezone
+
+from src.app.services.timeslot_generator import _generate_day_slots, _merge_intervals
+
+TARGET_DATE = date(2030, 1, 7)
+WORKING_START = time(0, 0)
+WORKING_END = time(23, 55)
+
+
+def build_busy_day(booking_minutes: int, gap_minutes: int):
+    """Back-to-back bookings with short gaps over the whole working day, as epoch-second intervals."""
+    intervals = []
+    cursor = datetime.combine(TARGET_DATE, WORKING_START).replace(tzinfo=timezone.utc)
+    day_end = datetime.combine(TARGET_DATE, WORKING_END).replace(tzinfo=timezone.utc)
+    while cursor < day_end:
+        end = cursor + timedelta(minutes=booking_minutes)
+        intervals.append((int(cursor.timestamp()), int(end.timestamp())))
+        cursor = end + timedelta(minutes=gap_minutes)
+    return intervals
+
+
+def legacy_per_slot_scan(merged_intervals, service_duration_minutes, slot_interval_minutes):
+    """The previous algorithm: every candidate slot is checked against every booked interval."""
+    booked = [
+        {
+            "start": datetime.fromtimestamp(start, tz=timezone.utc),
+            "end": datetime.fromtimestamp(end, tz=timezone.utc),
+        }
+        for start, end in merged_intervals
+    ]
+    service_duration = timedelta(minutes=service_duration_minutes)
+    working_end = datetime.combine(TARGET_DATE, WORKING_END).replace(tzinfo=timezone.utc)
+    current_slot_start = datetime.combine(TARGET_DATE, WORKING_START).replace(tzinfo=timezone.utc)
+
+    available_slots = []
+    while current_slot_start + service_duration <= working_end:
+        potential_slot_end = current_slot_start + service_duration
+        is_available = True
+        for interval in booked:
+            if not (potential_slot_end <= interval["start"] or current_slot_start >= interval["end"]):
+                is_available = False
+                break
+        if is_available:
+            available_slots.append(current_slot_start)
+        current_slot_start += timedelta(minutes=slot_interval_minutes)
+    return available_slots
+
+
+def sweep(merged_intervals, service_duration_minutes, slot_interval_minutes):
+    return _generate_day_slots(
+        target_date=TARGET_DATE,
+        working_start_time=WORKING_START,
+        working_end_time=WORKING_END,
+        merged_booked_intervals=merged_intervals,
+        service_duration_minutes=service_duration_minutes,
+        slot_interval_minutes=slot_interval_minutes,
+        now_utc=datetime(2000, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--booking-minutes", type=int, default=20)
+    parser.add_argument("--gap-minutes", type=int, default=5)
+    parser.add_argument("--service-minutes", type=int, default=5)
+    parser.add_argument("--slot-interval", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    merged = _merge_intervals(build_busy_day(args.booking_minutes, args.gap_minutes))
+    call_args = (merged, args.service_minutes, args.slot_interval)
+
+    assert legacy_per_slot_scan(*call_args) == sweep(*call_args), "sweep result differs from the legacy scan"
+
+    legacy = min(timeit.repeat(lambda: legacy_per_slot_scan(*call_args), number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: sweep(*call_args), number=1, repeat=args.repeat))
+
+    print(f"booked intervals: {len(merged)}, slot interval: {args.slot_interval} min")
+    print(f"legacy per-slot scan: {legacy * 1000:.3f} ms")
+    print(f"forward sweep:        {current * 1000:.3f} ms")
+    print(f"speedup:              {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
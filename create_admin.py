@@ -4,7 +4,7 @@ import logging
 from sqlalchemy.orm import Session
 
 from src.app.auth.security import hash_password
-from src.app.database import SessionLocal
+from src.app.database import get_session_local
 from src.app.models.user import User
 from src.app.models import barber
 from src.app.models import service
@@ -36,7 +36,7 @@ def create_admin():
         sys.exit(1)
 
     try:
-        with SessionLocal() as db:
+        with get_session_local()() as db:
             if db.query(User).filter_by(email=email).first():
                 logger.error(f"❌ User with this email '{email}' already exists.")
                 return 1
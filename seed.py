@@ -1,21 +1,16 @@
+from typing import List, Sequence, Tuple
+
 from sqlalchemy.orm import Session
 
-from src.app.database import SessionLocal
+from src.app.database import get_session_local
 from src.app.models.addon import Addon
 from src.app.models.barber import Barber
 from src.app.models.service import Service
-from src.app.models.user import Appointment
-
-
-def run_seed_script():
-    db: Session = SessionLocal()
-
-    db.commit()
+from src.app.models import appointment  # registers the Appointment mapper used by the relationships
 
-    # Barbers create
-    barber1 = Barber(name="John")
-    barber2 = Barber(name="Jack")
 
+def seed_catalog(db: Session, barber_names: Sequence[str]) -> Tuple[List[Barber], List[Service], List[Addon]]:
+    """Creates the services, addons and barbers offering all of them. Commits."""
     # Services
     service1 = Service(name="Haircut", price=100, duration=60)
     service2 = Service(name="Beard Trim", price=50, duration=30)
@@ -24,14 +19,21 @@ def run_seed_script():
     addon1 = Addon(name="Beard care", price=50, duration=30)
     addon2 = Addon(name="Hair care", price=30, duration=30)
 
-    barber1.services = [service1, service2]
-    barber2.services = [service1, service2]
+    services = [service1, service2]
+    addons = [addon1, addon2]
 
-    barber1.addons = [addon1, addon2]
-    barber2.addons = [addon1, addon2]
+    # Barbers create
+    barbers = [Barber(name=name, services=list(services), addons=list(addons)) for name in barber_names]
 
-    db.add_all([barber1, barber2, service1, service2, addon1, addon2])
+    db.add_all([*barbers, *services, *addons])
     db.commit()
+    return barbers, services, addons
+
+
+def run_seed_script():
+    db: Session = get_session_local()()
+
+    seed_catalog(db, ["John", "Jack"])
     db.close()
 
     print("✅ Seed completed")
@@ -2,13 +2,16 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 import redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.concurrency import run_in_threadpool
 
+from src.app.auth import principal_cache, revocation
+from src.app.auth.schemas import UserPrincipal
 from src.app.core import redis_client
 from src.app.core.config import settings
 from src.app.core.redis_client import get_redis_db
-from src.app.database import get_db
+from src.app.database import get_db, get_async_db
 from src.app.models.user import User
 
 import logging
@@ -19,40 +22,77 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def get_current_user(
-        credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db),
-        redis_client: redis.Redis = Depends(get_redis_db)
-) -> User:
-    token = credentials.credentials
-    logger.info("✅ get_current_user() called")
-    logger.info(f"Decoding token...")
-
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def _decode_token(token: str, credentials_exception: HTTPException) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             logger.warning("Token is missing 'sub' field.")
             raise credentials_exception
     except JWTError as e:
         logger.error(f"JWT decode error: {str(e)}")
         raise credentials_exception
+    return payload
+
 
-    is_blacklisted = redis_client.get(f"blacklist:{token}")
-    if is_blacklisted:
-        logger.warning(f"Token for user_id={user_id} is blacklisted.")
+def _principal_from_claims(payload: dict) -> UserPrincipal | None:
+    """Builds the principal from signed user claims, present only in tokens issued in claims mode."""
+    if not settings.AUTH_USER_CLAIMS_IN_TOKEN or "role" not in payload:
+        return None
+    return UserPrincipal(
+        id=int(payload["sub"]),
+        name=payload["name"],
+        email=payload["email"],
+        phone_number=payload.get("phone_number"),
+        role=payload["role"],
+        is_verified=payload.get("is_verified", False),
+    )
+
+
+def _ensure_token_not_revoked(redis_client: redis.Redis, token: str, payload: dict) -> None:
+    jti = payload.get("jti")
+    if jti is not None:
+        is_revoked = revocation.is_revoked(redis_client, jti)
+    else:
+        # Tokens issued before jti was added are still revoked by the full token.
+        is_revoked = redis_client.get(f"blacklist:{token}") is not None
+    if is_revoked:
+        logger.warning(f"Token for user_id={payload['sub']} is revoked.")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+
+def _check_token_and_cached_principal(redis_client: redis.Redis, token: str, payload: dict) -> UserPrincipal | None:
+    """The Redis part of get_current_principal_async, run in the threadpool in one hop."""
+    _ensure_token_not_revoked(redis_client, token, payload)
+    return _principal_from_claims(payload) or principal_cache.get_principal(int(payload["sub"]))
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_user(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: Session = Depends(get_db),
+        redis_client: redis.Redis = Depends(get_redis_db)
+) -> User:
+    token = credentials.credentials
+    logger.info("✅ get_current_user() called")
+    logger.info(f"Decoding token...")
+
+    credentials_exception = _credentials_exception()
+    payload = _decode_token(token, credentials_exception)
+    user_id = int(payload["sub"])
+    _ensure_token_not_revoked(redis_client, token, payload)
+
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         logger.warning(f"User not found for id: {user_id}")
         raise credentials_exception
@@ -61,11 +101,66 @@ def get_current_user(
     return user
 
 
+def get_current_principal(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: Session = Depends(get_db),
+        redis_client: redis.Redis = Depends(get_redis_db)
+) -> UserPrincipal:
+    """
+    Read-only counterpart of get_current_user. The user comes from token claims or the principal cache,
+    so the users table is only queried on a cache miss. Use get_current_user when the user is modified.
+    """
+    token = credentials.credentials
+
+    credentials_exception = _credentials_exception()
+    payload = _decode_token(token, credentials_exception)
+    user_id = int(payload["sub"])
+    _ensure_token_not_revoked(redis_client, token, payload)
+
+    principal = _principal_from_claims(payload) or principal_cache.get_principal(user_id)
+    if principal is None:
+        user = db.get(User, user_id)
+        if user is None:
+            logger.warning(f"User not found for id: {user_id}")
+            raise credentials_exception
+        principal = UserPrincipal.model_validate(user)
+        principal_cache.set_principal(principal)
+
+    return principal
+
+
+async def get_current_principal_async(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_async_db),
+        redis_client: redis.Redis = Depends(get_redis_db)
+) -> UserPrincipal:
+    """
+    Async counterpart of get_current_principal for endpoints running on AsyncSession.
+    The revocation check and the principal cache use the sync Redis client, so they run in the threadpool.
+    """
+    token = credentials.credentials
+
+    credentials_exception = _credentials_exception()
+    payload = _decode_token(token, credentials_exception)
+    user_id = int(payload["sub"])
+
+    principal = await run_in_threadpool(_check_token_and_cached_principal, redis_client, token, payload)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            logger.warning(f"User not found for id: {user_id}")
+            raise credentials_exception
+        principal = UserPrincipal.model_validate(user)
+        await run_in_threadpool(principal_cache.set_principal, principal)
+
+    return principal
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def admin_required(current_user: User = Depends(get_current_user)) -> User:
+def admin_required(current_user: UserPrincipal = Depends(get_current_principal)) -> UserPrincipal:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
     return current_user
@@ -0,0 +1,107 @@
+"""
+Password hashing off the event loop and the request threadpool.
+
+bcrypt costs ~250ms of CPU per call and holds the GIL, so hash and verify calls run in a
+dedicated process pool. The number of calls running or waiting is capped at
+PASSWORD_HASH_MAX_PENDING per app process; beyond that the request gets 503 with Retry-After
+instead of queueing behind a login storm.
+
+Every app process (gunicorn worker) starts its own pool. Together they should not run more
+bcrypt processes than the host has cores, so by default each gets cpu_count // WEB_CONCURRENCY
+workers (at least one). Set WEB_CONCURRENCY to the number of gunicorn workers, or size the pools
+directly with PASSWORD_HASH_WORKERS.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+
+from src.app.auth import security
+from src.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+_pending: threading.BoundedSemaphore | None = None
+_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    if settings.PASSWORD_HASH_WORKERS:
+        return settings.PASSWORD_HASH_WORKERS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+
+
+def _get_executor() -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _pending
+    with _lock:
+        if _executor is None:
+            workers = _worker_count()
+            # spawn: forking a process that runs Redis listener and pool threads isn't safe
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pending = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+            logger.info(f"Password hashing pool started with {workers} workers")
+        return _executor, _pending
+
+
+def _reset_executor(broken: ProcessPoolExecutor) -> None:
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(fn, *args):
+    executor, pending = _get_executor()
+    if not pending.acquire(blocking=False):
+        logger.warning("Password hashing queue is full, rejecting request")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        logger.error("Password hashing pool is broken, restarting it")
+        _reset_executor(executor)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is temporarily unavailable, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    finally:
+        pending.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(security.hash_password, password)
+
+
+async def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run(security.verify_and_update_password, plain, hashed)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def start() -> None:
+    """Spawns the workers at startup, so the first logins don't pay for starting them."""
+    executor, _ = _get_executor()
+    for _ in range(_worker_count()):
+        executor.submit(_warm_up)
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+
+from src.app.auth.schemas import UserPrincipal
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class _LRUCache:
+    """Small thread-safe LRU with per-entry expiry, local to the worker process."""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, UserPrincipal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> Optional[UserPrincipal]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: int, value: UserPrincipal) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: int) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_local_cache = _LRUCache(settings.USER_PRINCIPAL_CACHE_MAX_SIZE, settings.USER_PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _redis_key(user_id: int) -> str:
+    return f"user_principal:{user_id}"
+
+
+def _get_redis() -> redis.Redis | None:
+    if not settings.USER_PRINCIPAL_REDIS_CACHE_ENABLED:
+        return None
+    try:
+        return get_redis_client()
+    except ConnectionError as e:
+        logger.warning(f"User principal Redis cache unavailable: {e}")
+        return None
+
+
+def get_principal(user_id: int) -> Optional[UserPrincipal]:
+    """Looks the user up in the in-process LRU first, then in Redis."""
+    principal = _local_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        cached = client.get(_redis_key(user_id))
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"User principal lookup failed for user_id={user_id}: {e}")
+        return None
+    if cached is None:
+        return None
+
+    principal = UserPrincipal.model_validate_json(cached)
+    _local_cache.set(user_id, principal)
+    return principal
+
+
+def set_principal(principal: UserPrincipal) -> None:
+    _local_cache.set(principal.id, principal)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(_redis_key(principal.id), settings.USER_PRINCIPAL_REDIS_TTL_SECONDS, principal.model_dump_json())
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"User principal store failed for user_id={principal.id}: {e}")
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Must be called after any change to a user's profile, password, role or verification status.
+    Other workers drop their in-process copy when its short TTL runs out.
+    """
+    _local_cache.pop(user_id)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.delete(_redis_key(user_id))
+    except redis.exceptions.RedisError as e:
+        logger.error(f"User principal invalidation failed for user_id={user_id}: {e}")
@@ -0,0 +1,147 @@
+"""
+Sliding-window rate limits for the unauthenticated auth endpoints (login, registration,
+password reset and verification code emails), keyed per client IP and per email.
+
+Each limit is a sorted set of request timestamps in Redis. One Lua script drops the entries
+older than the window, checks every limit of the request and only then records it in all of
+them, so concurrent requests can't slip past a limit and a rejected request doesn't count.
+The script also counts allowed/rejected decisions per action in rate_limit:stats.
+
+Checks run before any database access or password hashing. When Redis is unreachable the
+request is let through.
+"""
+import hashlib
+import logging
+import math
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from fastapi import HTTPException, Request, status
+
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "rate_limit:stats"
+
+# KEYS: one sorted set per limit, then the stats hash.
+# ARGV: request member, action, then (limit, window_ms) for every sorted set.
+# Returns 0 if the request is allowed, otherwise the milliseconds until it would be.
+_SLIDING_WINDOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local stats = KEYS[#KEYS]
+local retry_after = 0
+
+for i = 1, #KEYS - 1 do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[i]) >= limit then
+        local oldest = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now, 1)
+    end
+end
+
+if retry_after > 0 then
+    redis.call('HINCRBY', stats, ARGV[2] .. ':rejected', 1)
+    return retry_after
+end
+
+for i = 1, #KEYS - 1 do
+    redis.call('ZADD', KEYS[i], now, ARGV[1])
+    redis.call('PEXPIRE', KEYS[i], ARGV[2 + 2 * i])
+end
+redis.call('HINCRBY', stats, ARGV[2] .. ':allowed', 1)
+return 0
+"""
+
+_script = None
+
+
+def _policies() -> Dict[str, Tuple[int, int, int]]:
+    """action -> (limit per IP, limit per email, window in seconds); a limit of 0 disables it."""
+    return {
+        "login": (
+            settings.RATE_LIMIT_LOGIN_PER_IP,
+            settings.RATE_LIMIT_LOGIN_PER_EMAIL,
+            settings.RATE_LIMIT_LOGIN_WINDOW_SECONDS,
+        ),
+        "register": (
+            settings.RATE_LIMIT_REGISTER_PER_IP,
+            settings.RATE_LIMIT_REGISTER_PER_EMAIL,
+            settings.RATE_LIMIT_REGISTER_WINDOW_SECONDS,
+        ),
+        "password_reset": (
+            settings.RATE_LIMIT_EMAIL_ACTIONS_PER_IP,
+            settings.RATE_LIMIT_EMAIL_ACTIONS_PER_EMAIL,
+            settings.RATE_LIMIT_EMAIL_ACTIONS_WINDOW_SECONDS,
+        ),
+        "verification_code": (
+            settings.RATE_LIMIT_EMAIL_ACTIONS_PER_IP,
+            settings.RATE_LIMIT_EMAIL_ACTIONS_PER_EMAIL,
+            settings.RATE_LIMIT_EMAIL_ACTIONS_WINDOW_SECONDS,
+        ),
+    }
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            # The rightmost address is the one added by our own proxy.
+            return forwarded_for.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _email_digest(email: str) -> str:
+    return hashlib.blake2b(email.strip().lower().encode(), digest_size=16).hexdigest()
+
+
+def check(request: Request, action: str, email: Optional[str] = None) -> None:
+    """Raises 429 with Retry-After if the client IP or the email is over the limit of the action."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    per_ip, per_email, window_seconds = _policies()[action]
+    window_ms = window_seconds * 1000
+    keys: List[str] = []
+    args: List = [uuid.uuid4().hex, action]
+    if per_ip > 0:
+        keys.append(f"rate_limit:{action}:ip:{client_ip(request)}")
+        args += [per_ip, window_ms]
+    if email and per_email > 0:
+        keys.append(f"rate_limit:{action}:email:{_email_digest(email)}")
+        args += [per_email, window_ms]
+    if not keys:
+        return
+
+    global _script
+    try:
+        client = get_redis_client()
+        if _script is None:
+            _script = client.register_script(_SLIDING_WINDOW)
+        retry_after_ms = int(_script(keys=keys + [STATS_KEY], args=args, client=client))
+    except (ConnectionError, redis.exceptions.RedisError) as e:
+        logger.warning(f"Rate limit check for {action} skipped: {e}")
+        return
+
+    if retry_after_ms > 0:
+        logger.warning(f"Rate limit hit for {action} from {client_ip(request)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after_ms / 1000))}
+        )
+
+
+def get_stats() -> Dict[str, Dict[str, int]]:
+    """Allowed/rejected decisions per action, shared by all workers."""
+    stats = get_redis_client().hgetall(STATS_KEY)
+    decisions = {action: {"allowed": 0, "rejected": 0} for action in _policies()}
+    for field, count in stats.items():
+        action, _, decision = field.rpartition(":")
+        decisions.setdefault(action, {"allowed": 0, "rejected": 0})[decision] = int(count)
+    return decisions
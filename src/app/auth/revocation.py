@@ -0,0 +1,167 @@
+"""
+Access token revocation by jti.
+
+A revoked token is stored as revoked_jti:{jti} until the token expires, and also added to the
+revoked_jtis sorted set (scored by expiry) and published on the revoked_jti channel.
+
+Every worker keeps an in-process Bloom filter of revoked jtis. It is loaded from the sorted set
+after subscribing to the channel and then kept up to date from published revocations, so a jti
+that isn't in the filter can't be revoked and the Redis lookup is skipped. Only possible hits
+(revoked tokens and rare false positives) go to Redis. While the subscription is down the filter
+is considered stale and every check goes to Redis.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+import redis
+
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "revoked_jti"
+REVOKED_SET_KEY = "revoked_jtis"
+_RECONNECT_DELAY_SECONDS = 1
+
+
+def _revoked_key(jti: str) -> str:
+    return f"revoked_jti:{jti}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, using double hashing of one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class _RevocationFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = self._new_bloom()
+        self._synced = False
+        self._rebuilt_at = 0.0
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        return BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+    @property
+    def synced(self) -> bool:
+        return self._synced
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._bloom.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        with self._lock:
+            return jti in self._bloom
+
+    def rebuild(self, client: redis.Redis) -> None:
+        """Reloads the filter from the revoked set, dropping expired jtis. Must run while subscribed."""
+        now = time.time()
+        client.zremrangebyscore(REVOKED_SET_KEY, "-inf", now)
+        bloom = self._new_bloom()
+        for jti in client.zrangebyscore(REVOKED_SET_KEY, now, "+inf"):
+            bloom.add(jti)
+        with self._lock:
+            self._bloom = bloom
+            self._synced = True
+            self._rebuilt_at = time.monotonic()
+
+    def needs_rebuild(self) -> bool:
+        return time.monotonic() - self._rebuilt_at >= settings.REVOCATION_BLOOM_REBUILD_SECONDS
+
+    def mark_stale(self) -> None:
+        self._synced = False
+
+
+_filter = _RevocationFilter()
+_listener_thread: threading.Thread | None = None
+_stop_event = threading.Event()
+
+
+def revoke(redis_client: redis.Redis, jti: str, expires_at: float) -> None:
+    """Revokes the token with the given jti until its expiry (epoch seconds)."""
+    ttl = int(expires_at - time.time())
+    if ttl <= 0:
+        return
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.setex(_revoked_key(jti), ttl, "revoked")
+    pipe.zadd(REVOKED_SET_KEY, {jti: expires_at})
+    pipe.publish(CHANNEL, jti)
+    pipe.execute()
+    _filter.add(jti)
+
+
+def is_revoked(redis_client: redis.Redis, jti: str) -> bool:
+    if _filter.synced and not _filter.might_contain(jti):
+        return False
+    return bool(redis_client.exists(_revoked_key(jti)))
+
+
+def _listen() -> None:
+    while not _stop_event.is_set():
+        pubsub = None
+        try:
+            client = get_redis_client()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            _filter.rebuild(client)
+            logger.info("Revocation filter synced from Redis.")
+            while not _stop_event.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    _filter.add(message["data"])
+                if _filter.needs_rebuild():
+                    _filter.rebuild(client)
+        except (redis.exceptions.RedisError, ConnectionError) as e:
+            logger.warning(f"Revocation filter out of sync, checking Redis on every request: {e}")
+        finally:
+            _filter.mark_stale()
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except redis.exceptions.RedisError:
+                    pass
+        _stop_event.wait(_RECONNECT_DELAY_SECONDS)
+
+
+def start_listener() -> None:
+    """Starts the background thread that keeps this worker's filter in sync. Safe to call repeatedly."""
+    global _listener_thread
+    if not settings.REVOCATION_BLOOM_ENABLED:
+        return
+    if _listener_thread is not None and _listener_thread.is_alive():
+        return
+    _stop_event.clear()
+    _listener_thread = threading.Thread(target=_listen, name="revocation-listener", daemon=True)
+    _listener_thread.start()
+
+
+def stop_listener() -> None:
+    global _listener_thread
+    _stop_event.set()
+    if _listener_thread is not None:
+        _listener_thread.join(timeout=5)
+        _listener_thread = None
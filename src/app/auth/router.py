@@ -1,18 +1,23 @@
 import redis
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, UTC, timezone, timedelta
-from src.app.auth.dependencies import get_current_user, admin_required
-from src.app.database import get_db
+from starlette.concurrency import run_in_threadpool
+from src.app.auth import hashing, principal_cache, rate_limit, revocation
+from src.app.auth.dependencies import get_current_user, get_current_principal, admin_required
+from src.app.database import get_db, get_async_db, get_session_local
 
 from src.app.auth.schemas import UserLogin, UserRegister, Token, UserUpdate, PasswordResetRequest, PasswordResetConfirm, \
-    PasswordResetResponse, UserEmail, EmailVerificationRequest, RefreshTokenRequest
+    PasswordResetResponse, UserEmail, EmailVerificationRequest, RefreshTokenRequest, UserPrincipal
 from src.app.models.user import User
 from src.app.core.config import settings
+from src.app.core.query_budget import query_budget
 from src.app.core.redis_client import get_redis_db, get_refresh_token, delete_refresh_token, save_refresh_token
-from src.app.auth.security import hash_password, verify_password, create_access_token, decode_access_token, \
+from src.app.auth.security import create_access_token, decode_access_token, \
     create_password_reset_token, decode_password_reset_token, create_refresh_token, decode_refresh_token
 import logging
 
@@ -31,9 +36,17 @@ def _get_user_or_404(db: Session, email: str) -> User:
     return user
 
 
+def _send_verification_code(user_id: int) -> None:
+    """Stores and emails a new verification code with a sync session, for async endpoints (run in the threadpool)."""
+    with get_session_local()() as db:
+        generate_and_send_verification_code(db=db, user=db.get(User, user_id))
+
+
 @router.post("/register", status_code=201)
-def register_user(data: UserRegister, db: Session = Depends(get_db)):
-    existing = db.query(User).filter_by(email=data.email).first()
+async def register_user(request: Request, data: UserRegister, db: AsyncSession = Depends(get_async_db)):
+    await run_in_threadpool(rate_limit.check, request, "register", email=data.email)
+
+    existing = await db.scalar(select(User).filter_by(email=data.email))
     if existing:
         logger.warning(f"Registration failed: user already exists - {data.email}")
         raise HTTPException(status_code=400, detail="User already exists")
@@ -41,21 +54,18 @@ def register_user(data: UserRegister, db: Session = Depends(get_db)):
     new_user = User(
         name=data.name,
         email=data.email,
-        hashed_password=hash_password(data.password),
+        hashed_password=await hashing.hash_password(data.password),
         phone_number=data.phone_number,
         role="user"
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     logger.info(f"User registered successfully: {new_user.email} (id={new_user.id})")
 
     try:
-        generate_and_send_verification_code(
-            db=db,
-            user=new_user
-        )
+        await run_in_threadpool(_send_verification_code, new_user.id)
         logger.info(f"Verification code sent to {new_user.email}")
     except Exception as e:
         logger.error(f"Failed to send verification code to {new_user.email}: {e}")
@@ -88,6 +98,7 @@ def verify_email(
     user.verification_code = None
     user.verification_code_expires_at = None
     db.commit()
+    principal_cache.invalidate_principal(user.id)
 
     try:
         send_registration_email(user.email, user.name, settings.FRONTEND_URL)
@@ -100,9 +111,12 @@ def verify_email(
 
 @router.post("/resend-verification-code")
 def resend_verification(
+    request: Request,
     data: UserEmail,
     db: Session = Depends(get_db)
 ):
+    rate_limit.check(request, "verification_code", email=data.email)
+
     user = _get_user_or_404(db, data.email)
 
     if user.is_verified:
@@ -114,27 +128,42 @@ def resend_verification(
 
 
 @router.post("/login", response_model=Token)
-def login_user(
+@query_budget(2)
+async def login_user(
+        request: Request,
         data: UserLogin,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         redis_db: redis.Redis = Depends(get_redis_db)
 ):
-    user = db.query(User).filter_by(email=data.email).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+    await run_in_threadpool(rate_limit.check, request, "login", email=data.email)
+
+    user = await db.scalar(select(User).filter_by(email=data.email))
+    if not user:
+        logger.warning(f"Login failed for: {data.email}")
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    is_valid, new_hash = await hashing.verify_and_update_password(data.password, user.hashed_password)
+    if not is_valid:
         logger.warning(f"Login failed for: {data.email}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        logger.info(f"Password hash of user id={user.id} upgraded to the current bcrypt cost")
+
     if not user.is_verified:
         raise HTTPException(
             status_code=403,
             detail=f"{user.email} is not verified"
         )
 
-    token = create_access_token(user.id)
+    token = create_access_token(user.id, user=user)
     refresh_token = create_refresh_token(user.id)
     refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
-    save_refresh_token(
+    await run_in_threadpool(
+        save_refresh_token,
         redis_client=redis_db,
         user_id=user.id,
         refresh_token=refresh_token,
@@ -198,7 +227,8 @@ def refresh_tokens(
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         new_access_token = create_access_token(
             user_id=user.id,
-            expires_delta=access_token_expires
+            expires_delta=access_token_expires,
+            user=user
         )
 
         refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -228,7 +258,7 @@ def refresh_tokens(
 
 
 @router.get("/me")
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: UserPrincipal = Depends(get_current_principal)):
     return {
         "id": current_user.id,
         "name": current_user.name,
@@ -259,6 +289,7 @@ def update_user_info(
 
     db.commit()
     db.refresh(current_user)
+    principal_cache.invalidate_principal(current_user.id)
 
     return {
         "message": "User profile updated",
@@ -272,18 +303,26 @@ def update_user_info(
 
 
 @router.post("/admin-only")
-def admin_action(current_user: User = Depends(admin_required)):
+def admin_action(current_user: UserPrincipal = Depends(admin_required)):
     return {"message": f"Welcome, admin {current_user.name}"}
 
 
+@router.get("/rate-limit-stats")
+def get_rate_limit_stats(current_user: UserPrincipal = Depends(admin_required)):
+    """
+    Allowed/rejected counters of the auth rate limits per action, shared by all workers.
+    """
+    return rate_limit.get_stats()
+
+
 @router.get("/test-auth")
-def test(current_user: User = Depends(get_current_user)):
+def test(current_user: UserPrincipal = Depends(get_current_principal)):
     return {"id": current_user.id, "email": current_user.email}
 
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 def logout(
-        current_user: User = Depends(get_current_user),
+        current_user: UserPrincipal = Depends(get_current_principal),
         credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
         redis_client: redis.Redis = Depends(get_redis_db)
 ):
@@ -308,20 +347,24 @@ def logout(
     if current_utc >= token_exp_utc:
         return {"message": "Token already expired, no need to logout."}
 
-    ttl = (token_exp_utc - current_utc).total_seconds()
-
-    redis_client.setex(
-        f"blacklist:{token}",
-        int(ttl),
-        "revoked"
-    )
-    logger.info(f"User {current_user.email} (id={current_user.id}) logged out. Token added to blacklist.")
+    jti = payload.get("jti")
+    if jti is not None:
+        revocation.revoke(redis_client, jti, exp_timestamp)
+    else:
+        ttl = (token_exp_utc - current_utc).total_seconds()
+        redis_client.setex(
+            f"blacklist:{token}",
+            int(ttl),
+            "revoked"
+        )
+    logger.info(f"User {current_user.email} (id={current_user.id}) logged out. Token revoked.")
 
     return {"message": "Successfully logged out."}
 
 
 @router.post("/request-password-reset", response_model=PasswordResetResponse, status_code=status.HTTP_200_OK)
 def request_password_reset(
+        http_request: Request,
         request: PasswordResetRequest,
         db: Session = Depends(get_db),
         redis_client: redis.Redis = Depends(get_redis_db)
@@ -330,6 +373,8 @@ def request_password_reset(
     Request a password reset for the user.
     Sends a password reset link to the spec email.
     """
+    rate_limit.check(http_request, "password_reset", email=request.email)
+
     user = db.query(User).filter_by(email=request.email).first()
 
     if user:
@@ -345,9 +390,9 @@ def request_password_reset(
 
 
 @router.post("/reset-password", status_code=status.HTTP_200_OK)
-def reset_password(
+async def reset_password(
         data: PasswordResetConfirm,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         redis_client: redis.Redis = Depends(get_redis_db)
 ):
     """
@@ -368,22 +413,22 @@ def reset_password(
         )
 
     blacklist_key = f"reset_blacklist:{data.token}"
-    is_blacklisted = redis_client.get(blacklist_key)
+    is_blacklisted = await run_in_threadpool(redis_client.get, blacklist_key)
     if is_blacklisted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password reset link has already been used or revoked."
         )
 
-    user = db.query(User).filter_by(id=user_id).first()
+    user = await db.get(User, int(user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    user.hashed_password = hash_password(data.new_password)
-    db.commit()
-    db.refresh(user)
+    user.hashed_password = await hashing.hash_password(data.new_password)
+    await db.commit()
+    await run_in_threadpool(principal_cache.invalidate_principal, user.id)
 
     exp_timestamp = payload.get("exp")
     if exp_timestamp:
@@ -391,9 +436,11 @@ def reset_password(
         current_utc = datetime.now(UTC)
         ttl = (token_exp_utc - current_utc).total_seconds()
         if ttl > 0:
-            redis_client.setex(blacklist_key, int(ttl), "used")
+            await run_in_threadpool(redis_client.setex, blacklist_key, int(ttl), "used")
     else:
-        redis_client.setex(blacklist_key, settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES * 60, "used")
+        await run_in_threadpool(
+            redis_client.setex, blacklist_key, settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES * 60, "used"
+        )
 
     logger.info(f"Password successfully reset for user: {user.email}")
     return {"message": "Password reset successful"}
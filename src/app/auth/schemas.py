@@ -80,3 +80,21 @@ class PasswordResetResponse(BaseModel):
 class EmailVerificationRequest(BaseModel):
     email: EmailStr
     code: str
+
+
+class UserPrincipal(BaseModel):
+    """
+    Read-only view of the authenticated user, cached between requests or taken from token claims.
+    Endpoints that modify the user must load the ORM User instead.
+    """
+    id: int
+    name: str
+    email: str
+    phone_number: Optional[str] = None
+    role: str
+    is_verified: bool = False
+
+    model_config = {
+        "from_attributes": True,
+        "frozen": True
+    }
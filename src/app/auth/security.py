@@ -1,11 +1,19 @@
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, UTC
+from uuid import uuid4
 
 from src.app.core.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max pin the cost to BCRYPT_ROUNDS, so hashes made with another cost are flagged for rehashing.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 def hash_password(password: str) -> str:
@@ -16,13 +24,34 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
-def create_access_token(user_id: int, expires_delta: timedelta | None = None):
+def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Returns (valid, new_hash). new_hash is set when the password is valid but the stored hash
+    uses outdated parameters, and should replace it.
+    """
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+def create_access_token(user_id: int, expires_delta: timedelta | None = None, user=None):
+    """
+    When AUTH_USER_CLAIMS_IN_TOKEN is on and the user is given, the token also carries the user's
+    profile, role and verification status, so read-only endpoints can skip the user lookup.
+    """
     expire = datetime.now(UTC) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode = {
         "sub": str(user_id),
         "type": "access",
-        "exp": expire
+        "exp": expire,
+        "jti": uuid4().hex
     }
+    if settings.AUTH_USER_CLAIMS_IN_TOKEN and user is not None:
+        to_encode.update({
+            "name": user.name,
+            "email": user.email,
+            "phone_number": user.phone_number,
+            "role": user.role,
+            "is_verified": user.is_verified,
+        })
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
@@ -41,7 +70,8 @@ def create_refresh_token(user_id: int, expires_delta: timedelta | None = None):
     payload = {
         "sub": str(user_id),
         "type": "refresh",
-        "exp": expire
+        "exp": expire,
+        "jti": uuid4().hex
     }
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
@@ -6,9 +6,19 @@ celery_app = Celery(
     "barbershop_celery_app",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=["src.app.tasks"]
+    include=["src.app.tasks.email", "src.app.tasks.reminders", "src.app.tasks.analytics"]
 )
 
 celery_app.conf.update(
-    timezone="UTC"
+    timezone="UTC",
+    beat_schedule={
+        "send-due-appointment-reminders": {
+            "task": "src.app.tasks.reminders.send_due_reminders",
+            "schedule": settings.REMINDER_SCAN_INTERVAL_SECONDS,
+        },
+        "refresh-barber-daily-stats": {
+            "task": "src.app.tasks.analytics.refresh_barber_daily_stats",
+            "schedule": settings.ANALYTICS_ROLLUP_REFRESH_SECONDS,
+        },
+    },
 )
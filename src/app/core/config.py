@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal, Optional
 from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
@@ -19,14 +19,66 @@ class Settings(BaseSettings):
     """
 
     DATABASE_URL: str = Field(..., alias="DATABASE_URL", description="URL for PostgreSQL database connection")
+    ASYNC_DATABASE_URL_RAW: Optional[str] = Field(
+        None,
+        alias="ASYNC_DATABASE_URL",
+        description="asyncpg URL for the async session; derived from DATABASE_URL when not set"
+    )
     SECRET_KEY: str = Field(..., alias="SECRET_KEY", description="Secret key for signing JWT tokens")
 
+    # Database connection pool
+    DB_ECHO: bool = Field(False, description="Log every SQL statement (development only)")
+    DB_POOL_SIZE: int = Field(5, description="Connections kept open per engine and worker process")
+    DB_MAX_OVERFLOW: int = Field(10, description="Extra connections allowed above DB_POOL_SIZE under load")
+    DB_POOL_RECYCLE_SECONDS: int = Field(1800, description="Reopen connections older than this")
+    DB_POOL_TIMEOUT_SECONDS: int = Field(30, description="How long a request waits for a free connection")
+    DB_POOL_SLOW_CHECKOUT_MS: int = Field(100, description="Connection checkouts slower than this are logged as warnings")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(0, description="Server-side statement_timeout, 0 disables it")
+    DB_APPLICATION_NAME: str = Field("barbershop-backend", description="application_name reported to PostgreSQL")
+    DB_PGBOUNCER_MODE: bool = Field(
+        False,
+        description="Use NullPool, disable prepared statements and set statement_timeout per transaction "
+                    "for a PgBouncer in transaction pooling mode"
+    )
+    QUERY_BUDGET_MODE: Literal["off", "warn", "strict"] = Field(
+        "off", description="Count SQL statements per request; strict answers 500 when a route exceeds its budget"
+    )
+    QUERY_BUDGET_REPEAT_THRESHOLD: int = Field(
+        3, description="Report a request that runs the same statement this many times (likely N+1)"
+    )
+
+    BOOKING_CONFLICT_CHECK: Literal["locking", "optimistic"] = Field(
+        "locking",
+        description="locking: SELECT ... FOR UPDATE before insert; "
+                    "optimistic: insert directly and rely on the no_overlap_barber_time constraint"
+    )
+
     SMTP_HOST: str = Field(..., description="SMTP server host")
     SMTP_PORT: int = Field(587, description="SMTP server port")
     SMTP_USERNAME: str = Field(..., description="SMTP username (your sender email address)")
     SMTP_PASSWORD: str = Field(..., description="SMTP password or app-specific password")
     EMAIL_SENDER_ADDRESS: str = Field(..., description="SMTP sender address")
     EMAIL_SENDER_NAME: str = Field("BarberShop App", description="SMTP name displayed as sender")
+    SMTP_USE_STARTTLS: bool = Field(True, description="Upgrade SMTP connections with STARTTLS")
+    SMTP_USE_AUTH: bool = Field(True, description="Log in with SMTP_USERNAME and SMTP_PASSWORD")
+    SMTP_TIMEOUT_SECONDS: int = 10
+    SMTP_POOL_SIZE: int = 2
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_NOOP_AFTER_SECONDS: int = 30
+
+    EMAIL_DELIVERY_MODE: Literal["celery", "sync"] = Field(
+        "celery", description="celery queues emails for the worker; sync sends them in the request (tests)"
+    )
+
+    REMINDER_LEAD_MINUTES: int = Field(10, description="How long before the appointment the reminder is sent")
+    REMINDER_SCAN_INTERVAL_SECONDS: int = 60
+    REMINDER_BATCH_SIZE: int = 100
+
+    ANALYTICS_ROLLUP_ENABLED: bool = Field(
+        False, description="Read past days of the analytics from barber_daily_stats instead of computing them live"
+    )
+    ANALYTICS_ROLLUP_REFRESH_DAYS: int = Field(7, description="How many past days each rollup refresh recomputes")
+    ANALYTICS_ROLLUP_REFRESH_SECONDS: int = 3600
 
     EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES: int = 10
     EMAIL_VERIFICATION_CODE_LENGTH: int = 6
@@ -35,8 +87,54 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    BCRYPT_ROUNDS: int = Field(12, description="Stored hashes with another cost are rehashed on the next login")
+    PASSWORD_HASH_WORKERS: Optional[int] = Field(
+        None, description="Hashing processes per app process; defaults to the CPU count divided by WEB_CONCURRENCY"
+    )
+    WEB_CONCURRENCY: int = Field(
+        1, description="App processes on the host (gunicorn reads the same variable for its worker count)"
+    )
+    PASSWORD_HASH_MAX_PENDING: int = Field(
+        64, description="Hash/verify calls running or queued per app process before answering 503"
+    )
+
+    USER_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    USER_PRINCIPAL_CACHE_MAX_SIZE: int = 10_000
+    USER_PRINCIPAL_REDIS_CACHE_ENABLED: bool = True
+    USER_PRINCIPAL_REDIS_TTL_SECONDS: int = 300
+    # Put role, verification status and profile fields into access tokens so that
+    # read-only endpoints can authenticate without any lookup (changes apply on the next token).
+    AUTH_USER_CLAIMS_IN_TOKEN: bool = False
+
+    REVOCATION_BLOOM_ENABLED: bool = True
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_BLOOM_REBUILD_SECONDS: int = 3600
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = Field(
+        False, description="Take the client IP from X-Forwarded-For; only behind a proxy that sets it"
+    )
+    RATE_LIMIT_LOGIN_PER_IP: int = 20
+    RATE_LIMIT_LOGIN_PER_EMAIL: int = 5
+    RATE_LIMIT_LOGIN_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_REGISTER_PER_IP: int = 5
+    RATE_LIMIT_REGISTER_PER_EMAIL: int = 3
+    RATE_LIMIT_REGISTER_WINDOW_SECONDS: int = 3600
+    # Password reset and verification code emails
+    RATE_LIMIT_EMAIL_ACTIONS_PER_IP: int = 10
+    RATE_LIMIT_EMAIL_ACTIONS_PER_EMAIL: int = 3
+    RATE_LIMIT_EMAIL_ACTIONS_WINDOW_SECONDS: int = 900
+
     REDIS_URL: str = Field("redis://localhost:6379/0", alias="REDIS_URL", description="URL for Redis connection")
 
+    AVAILABILITY_CACHE_ENABLED: bool = True
+    AVAILABILITY_CACHE_TTL_SECONDS: int = 300
+    OCCUPANCY_BITMAP_ENABLED: bool = True
+    OCCUPANCY_BITMAP_TTL_SECONDS: int = 60 * 60 * 24
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+
     # CORS settings
     # Pydantic-settings
     CORS_ORIGINS_RAW: str = Field(
@@ -57,6 +155,18 @@ class Settings(BaseSettings):
         """
         return [origin.strip() for origin in self.CORS_ORIGINS_RAW.split(",") if origin.strip()]
 
+    @computed_field
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """
+        Computed property that returns ASYNC_DATABASE_URL if set,
+        otherwise DATABASE_URL with its driver replaced by asyncpg.
+        """
+        if self.ASYNC_DATABASE_URL_RAW:
+            return self.ASYNC_DATABASE_URL_RAW
+        scheme, _, rest = self.DATABASE_URL.partition("://")
+        return f"{scheme.split('+')[0]}+asyncpg://{rest}"
+
     # Configuration for pydantic-settings
     model_config = SettingsConfigDict(
         env_file=".env",
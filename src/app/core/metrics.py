@@ -0,0 +1,224 @@
+"""
+Prometheus metrics for the API: HTTP latency and status per route, requests in flight,
+database query counts and durations (also per request), Redis command timings, Celery task
+enqueues, and the counters the caches and rate limits keep in Redis.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR (an empty directory, the same for
+all workers) before the workers start. Every worker then writes its samples there and /metrics
+aggregates them, whichever worker serves the scrape. gunicorn.conf.py cleans up after workers
+that exit.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+from celery.signals import after_task_publish
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template, method and status code",
+    ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", multiprocess_mode="livesum"
+)
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries issued while serving one request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+HTTP_DB_TIME = Histogram(
+    "http_request_db_duration_seconds", "Time spent in database queries while serving one request",
+    ["method", "route"]
+)
+
+DB_QUERIES = Counter("db_queries_total", "Database queries", ["engine"])
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database query duration", ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a connection from the pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+
+REDIS_COMMANDS = Counter("redis_commands_total", "Redis commands", ["command", "outcome"])
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds", "Redis command round trip", ["command"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+
+CELERY_TASKS_ENQUEUED = Counter("celery_tasks_enqueued_total", "Celery tasks sent to the broker", ["task"])
+
+
+@dataclass
+class RequestStats:
+    """Per-request accumulator, shared by the threads and tasks that serve the request."""
+    db_queries: int = 0
+    db_seconds: float = 0.0
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _route_template(app: ASGIApp, scope: Scope) -> str:
+    """The path template of the matched route, e.g. /api/appointments/{appointment_id}."""
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    for candidate in getattr(app, "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return candidate.path
+    # Unmatched paths are collapsed into one label so scanners can't blow up the cardinality.
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed until their last chunk."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            request_stats.reset(token)
+
+            method = scope["method"]
+            route = _route_template(scope["app"], scope) if "app" in scope else "unmatched"
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            HTTP_DB_QUERIES.labels(method, route).observe(stats.db_queries)
+            HTTP_DB_TIME.labels(method, route).observe(stats.db_seconds)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Counts and times every statement run on the engine (pass AsyncEngine.sync_engine for asyncpg)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.labels(name).inc()
+        DB_QUERY_DURATION.labels(name).observe(elapsed)
+
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that times every command. Commands queued in a pipeline are not timed one by one."""
+
+    def execute_command(self, *args, **options):
+        command = str(args[0]).upper() if args else "UNKNOWN"
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return super().execute_command(*args, **options)
+        except redis.exceptions.RedisError:
+            outcome = "error"
+            raise
+        finally:
+            REDIS_COMMAND_DURATION.labels(command).observe(time.perf_counter() - started)
+            REDIS_COMMANDS.labels(command, outcome).inc()
+
+
+@after_task_publish.connect
+def _count_task_enqueue(sender=None, **kwargs):
+    CELERY_TASKS_ENQUEUED.labels(sender or "unknown").inc()
+
+
+class RedisCountersCollector:
+    """Exports the counters kept in Redis (shared by all workers) at scrape time."""
+
+    def collect(self):
+        from src.app.auth import rate_limit
+        from src.app.services import availability_cache
+
+        try:
+            availability = availability_cache.get_stats()
+            rate_limits = rate_limit.get_stats()
+        except (ConnectionError, redis.exceptions.RedisError) as e:
+            logger.warning(f"Skipping Redis counters in metrics: {e}")
+            return
+
+        cache = CounterMetricFamily(
+            "availability_cache_lookups", "Availability cache lookups by result", labels=["result"]
+        )
+        cache.add_metric(["hit"], availability["hits"])
+        cache.add_metric(["miss"], availability["misses"])
+        yield cache
+
+        decisions = CounterMetricFamily(
+            "auth_rate_limit_decisions", "Auth rate limit decisions by action", labels=["action", "decision"]
+        )
+        for action, counts in sorted(rate_limits.items()):
+            for decision, count in sorted(counts.items()):
+                decisions.add_metric([action, decision], count)
+        yield decisions
+
+
+def render() -> tuple[bytes, str]:
+    """Body and content type of the /metrics response."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        process_metrics = CollectorRegistry()
+        multiprocess.MultiProcessCollector(process_metrics)
+    else:
+        process_metrics = REGISTRY
+
+    shared_counters = CollectorRegistry(auto_describe=False)
+    shared_counters.register(RedisCountersCollector())
+    return generate_latest(process_metrics) + generate_latest(shared_counters), CONTENT_TYPE_LATEST
@@ -0,0 +1,145 @@
+"""
+Per-request SQL statement budgets and N+1 detection, for tests and staging (QUERY_BUDGET_MODE).
+
+Every statement run while serving a request is counted with the place in src/app that issued
+it. Routes declare their budget with @query_budget(n) (below the router decorator); when a
+request goes over it, or repeats the same statement QUERY_BUDGET_REPEAT_THRESHOLD times or more,
+a report with the repeated statements and their call sites is logged. In strict mode a request
+over budget is answered with 500 and the report instead of its response, so a run of
+benchmarks/query_budgets.py against a local Postgres (as in the query-checks CI job) fails on the
+regression. Responses carry an X-Query-Count header.
+
+With QUERY_BUDGET_MODE=off (the default) only the engine listener remains, and it returns
+immediately outside a request.
+"""
+import json
+import logging
+import os
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class QueryLog:
+    statements: Counter = field(default_factory=Counter)
+    call_sites: Dict[str, Counter] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.statements.values())
+
+    def record(self, statement: str) -> None:
+        self.statements[statement] += 1
+        self.call_sites.setdefault(statement, Counter())[_call_site()] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def report(self, budget: Optional[int] = None) -> str:
+        lines = [f"{self.total} SQL statements" + (f" (budget {budget})" if budget is not None else "")]
+        for statement, count in self.repeated(2):
+            sites = ", ".join(f"{site} x{n}" for site, n in self.call_sites[statement].most_common(3))
+            lines.append(f"  {count}x {' '.join(statement.split())[:200]}  <- {sites}")
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+def _call_site() -> str:
+    """Innermost frame in src/app outside this module, e.g. routers/appointments.py:171 in cancel_appointment."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_APP_ROOT) and not frame.filename.endswith("query_budget.py"):
+            return f"{os.path.relpath(frame.filename, _APP_ROOT)}:{frame.lineno} in {frame.name}"
+    return "outside src/app"
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log = _current.get()
+        if log is not None:
+            log.record(statement)
+
+
+def query_budget(max_statements: int) -> Callable[[F], F]:
+    """Declares how many SQL statements one request to the route may run, authentication included."""
+    def decorator(endpoint: F) -> F:
+        endpoint.__query_budget__ = max_statements
+        return endpoint
+    return decorator
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryLog]:
+    """Collects the statements run inside the block, e.g. to assert on a service function in a test."""
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current.set(log)
+        replaced = False
+
+        async def send_wrapper(message: Message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                budget, over_budget = self._check(scope, log)
+                headers = [(b"x-query-count", str(log.total).encode())]
+                if over_budget and settings.QUERY_BUDGET_MODE == "strict":
+                    replaced = True
+                    body = json.dumps({"detail": "Query budget exceeded", "report": log.report(budget)}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": headers + [(b"content-type", b"application/json")],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    def _check(scope: Scope, log: QueryLog) -> tuple[Optional[int], bool]:
+        """Logs the report when needed. Returns the route's budget and whether the request went over it."""
+        budget = getattr(scope.get("endpoint"), "__query_budget__", None)
+        over_budget = budget is not None and log.total > budget
+        if over_budget or log.repeated(settings.QUERY_BUDGET_REPEAT_THRESHOLD):
+            logger.warning(f"{scope['method']} {scope['path']}: {log.report(budget)}")
+        return budget, over_budget
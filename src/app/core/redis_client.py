@@ -2,6 +2,7 @@ from datetime import timedelta
 
 import redis
 from src.app.core.config import settings
+from src.app.core.metrics import InstrumentedRedis
 from typing import Generator, Optional
 
 import logging
@@ -17,7 +18,7 @@ def get_redis_client() -> redis.Redis:
     """
     global _redis_client
     if _redis_client is None:
-        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _redis_client = InstrumentedRedis.from_url(settings.REDIS_URL, decode_responses=True)
         # check connection
         try:
             _redis_client.ping()
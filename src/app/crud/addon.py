@@ -1,9 +1,10 @@
 from typing import List
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from src.app.models.addon import Addon
 from src.app.schemas.addon import AddonCreate, AddonUpdate
+from src.app.services import catalog_cache
 
 
 def create_addon(db: Session, addon: AddonCreate):
@@ -11,6 +12,7 @@ def create_addon(db: Session, addon: AddonCreate):
     db.add(new_addon)
     db.commit()
     db.refresh(new_addon)
+    catalog_cache.bump_version(catalog_cache.ADDONS)
     return new_addon
 
 
@@ -19,7 +21,7 @@ def get_addon(db: Session, addon_id: int):
 
 
 def get_addons(db: Session):
-    return db.query(Addon).all()
+    return db.query(Addon).options(selectinload(Addon.barbers)).all()
 
 
 def update_addon(db: Session, addon_id: int, updated_data: AddonUpdate):
@@ -29,6 +31,7 @@ def update_addon(db: Session, addon_id: int, updated_data: AddonUpdate):
             setattr(addon, key, value)
         db.commit()
         db.refresh(addon)
+        catalog_cache.bump_version(catalog_cache.ADDONS)
     return addon
 
 
@@ -37,5 +40,6 @@ def delete_addon(db: Session, addon_id: int):
     if addon:
         db.delete(addon)
         db.commit()
+        catalog_cache.bump_version(catalog_cache.ADDONS)
         return True
     return False
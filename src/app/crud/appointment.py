@@ -1,10 +1,14 @@
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Select, func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from src.app.models.addon import Addon
 from src.app.models.appointment import Appointment, AppointmentStatus
+from src.app.models.appointment_addon_link import appointment_addon
 from src.app.models.barber import Barber
 from src.app.models.service import Service
 from src.app.schemas.appointment import AppointmentCreate
@@ -51,11 +55,110 @@ from src.app.schemas.appointment import AppointmentCreate
 #     ).filter(Appointment.id == appointment_model.id).first()
 
 
-def get_appointment_by_barber(db: Session, barber_id: int) -> List[Appointment]:
-    appointments = db.query(Appointment).filter(Appointment.barber_id == barber_id).options(
-        joinedload(Appointment.barber),
-        joinedload(Appointment.service),
-        joinedload(Appointment.addons)
-    ).all()
+def barber_appointments_query(
+        barber_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        status: Optional[AppointmentStatus] = None
+) -> Select:
+    """
+    A barber's appointments ordered by (scheduled_time, id), starting after the given keyset
+    position. Fetches limit + 1 rows so the caller can tell whether another page follows.
+    Addons are loaded with a separate IN query so they don't multiply the page rows.
+    """
+    query = (
+        select(Appointment)
+        .where(Appointment.barber_id == barber_id)
+        .options(
+            joinedload(Appointment.barber),
+            joinedload(Appointment.service),
+            selectinload(Appointment.addons)
+        )
+        .order_by(Appointment.scheduled_time, Appointment.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(tuple_(Appointment.scheduled_time, Appointment.id) > tuple_(*after))
+    if date_from is not None:
+        query = query.where(Appointment.scheduled_time >= date_from)
+    if date_to is not None:
+        query = query.where(Appointment.scheduled_time < date_to)
+    if status is not None:
+        query = query.where(Appointment.status == status)
+    return query
 
-    return appointments
+
+def get_appointment_by_barber(
+        db: Session,
+        barber_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        status: Optional[AppointmentStatus] = None
+) -> Tuple[List[Appointment], bool]:
+    """One page of a barber's appointments, see barber_appointments_query, and whether more rows follow."""
+    query = barber_appointments_query(barber_id, limit, after, date_from, date_to, status)
+    appointments = list(db.scalars(query).unique())
+    return appointments[:limit], len(appointments) > limit
+
+
+def user_appointment_views_query(
+        user_id: int,
+        limit: int,
+        now: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        when: Optional[Literal["upcoming", "past"]] = None
+) -> Select:
+    """
+    Column projection for AppointmentShortUserView, one row per appointment: addon names are
+    aggregated in SQL and the day, date and time range are formatted by Postgres (in UTC), so no
+    ORM entities or relationships are loaded. Rows also carry scheduled_at for the keyset cursor.
+
+    Ordered by (scheduled_time, id); past appointments come most recent first. Fetches limit + 1
+    rows so the caller can tell whether another page follows.
+    """
+    addon_names = (
+        select(func.string_agg(Addon.name, aggregate_order_by(literal_column("' + '"), Addon.id)))
+        .select_from(appointment_addon)
+        .join(Addon, Addon.id == appointment_addon.c.addon_id)
+        .where(appointment_addon.c.appointment_id == Appointment.id)
+        .scalar_subquery()
+    )
+    start = func.timezone("UTC", Appointment.scheduled_time)
+    end = func.timezone("UTC", Appointment.scheduled_end)
+
+    query = (
+        select(
+            Appointment.id,
+            Barber.name.label("barber_name"),
+            func.concat_ws(" + ", Service.name, addon_names).label("full_service_title"),
+            func.to_char(start, "FMDay").label("scheduled_day"),
+            func.to_char(start, "DD.MM.YYYY").label("scheduled_date"),
+            func.concat(func.to_char(start, "HH24:MI"), " - ", func.to_char(end, "HH24:MI")).label("scheduled_time"),
+            Appointment.total_price,
+            Appointment.status,
+            Appointment.scheduled_time.label("scheduled_at"),
+        )
+        .join(Barber, Barber.id == Appointment.barber_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .where(Appointment.user_id == user_id)
+        .limit(limit + 1)
+    )
+
+    position = tuple_(Appointment.scheduled_time, Appointment.id)
+    if when == "past":
+        query = query.where(Appointment.scheduled_time < now).order_by(
+            Appointment.scheduled_time.desc(), Appointment.id.desc()
+        )
+        if after is not None:
+            query = query.where(position < tuple_(*after))
+        return query
+
+    if when == "upcoming":
+        query = query.where(Appointment.scheduled_time >= now)
+    if after is not None:
+        query = query.where(position > tuple_(*after))
+    return query.order_by(Appointment.scheduled_time, Appointment.id)
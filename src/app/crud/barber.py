@@ -10,6 +10,7 @@ from src.app.models.barber_schedule import BarberSchedule
 from src.app.models.barber_unavailable_time import BarberUnavailableTime
 from src.app.models.service import Service
 from src.app.schemas.barber import BarberCreate, BarberBase, BarberUpdate
+from src.app.services import availability_cache, catalog_cache, occupancy_bitmap
 from src.app.schemas.barber_schedule import BarberScheduleCreate, BarberScheduleUpdate, BarberUnavailableTimeCreate, \
     BarberUnavailableTimeUpdate
 
@@ -19,6 +20,7 @@ def create_barber(db: Session, barber: BarberCreate):
     db.add(new_barber)
     db.commit()
     db.refresh(new_barber)
+    catalog_cache.bump_version(catalog_cache.BARBERS)
     return new_barber
 
 
@@ -41,6 +43,9 @@ def update_barber(
             setattr(barber, key, value)
         db.commit()
         db.refresh(barber)
+        # ServiceRead and AddonRead embed the barbers, names included.
+        for name in (catalog_cache.BARBERS, catalog_cache.SERVICES, catalog_cache.ADDONS):
+            catalog_cache.bump_version(name)
     return barber
 
 
@@ -49,6 +54,8 @@ def delete_barber(db: Session, barber_id: int):
     if barber:
         db.delete(barber)
         db.commit()
+        for name in (catalog_cache.BARBERS, catalog_cache.SERVICES, catalog_cache.ADDONS):
+            catalog_cache.bump_version(name)
         return True
     return False
 
@@ -76,6 +83,7 @@ def assign_services_to_barber(
 
     db.commit()
     db.refresh(barber)
+    catalog_cache.bump_version(catalog_cache.SERVICES)
     return barber
 
 
@@ -103,6 +111,7 @@ def assign_addons_to_barber(
 
     db.commit()
     db.refresh(barber)
+    catalog_cache.bump_version(catalog_cache.ADDONS)
     return barber
 
 
@@ -121,6 +130,7 @@ def remove_service_from_barber(
     barber.services.remove(service)
     db.commit()
     db.refresh(barber)
+    catalog_cache.bump_version(catalog_cache.SERVICES)
     return barber
 
 
@@ -140,6 +150,7 @@ def remove_addon_from_barber(
     barber.addons.remove(addon)
     db.commit()
     db.refresh(barber)
+    catalog_cache.bump_version(catalog_cache.ADDONS)
     return barber
 
 
@@ -154,6 +165,7 @@ def create_barber_schedule(
     db.add(db_schedule)
     db.commit()
     db.refresh(db_schedule)
+    availability_cache.invalidate_barber(barber_id)
     return db_schedule
 
 
@@ -178,6 +190,7 @@ def update_barber_schedule(db: Session, schedule_id: int, schedule_data: BarberS
         db.add(db_schedule)
         db.commit()
         db.refresh(db_schedule)
+        availability_cache.invalidate_barber(db_schedule.barber_id)
         return db_schedule
 
 
@@ -187,6 +200,7 @@ def delete_barber_schedule(db: Session, schedule_id: int) -> bool:
     if db_schedule:
         db.delete(db_schedule)
         db.commit()
+        availability_cache.invalidate_barber(db_schedule.barber_id)
         return True
     return False
 
@@ -198,6 +212,8 @@ def create_barber_unavailable_time(db: Session, barber_id: int, unavailable_data
     db.add(db_unavailable_time)
     db.commit()
     db.refresh(db_unavailable_time)
+    availability_cache.invalidate_interval(barber_id, db_unavailable_time.start_time, db_unavailable_time.end_time)
+    occupancy_bitmap.mark_busy(barber_id, db_unavailable_time.start_time, db_unavailable_time.end_time)
     return db_unavailable_time
 
 
@@ -221,11 +237,18 @@ def update_barber_unavailable_time(
     """Updates an existing unavailable time entry."""
     db_unavailable_time = db.get(BarberUnavailableTime, unavailable_time_id)
     if db_unavailable_time:
+        previous_start, previous_end = db_unavailable_time.start_time, db_unavailable_time.end_time
         for key, value in unavailable_data.model_dump(exclude_unset=True).items():
             setattr(db_unavailable_time, key, value)
         db.add(db_unavailable_time)
         db.commit()
         db.refresh(db_unavailable_time)
+        availability_cache.invalidate_interval(db_unavailable_time.barber_id, previous_start, previous_end)
+        availability_cache.invalidate_interval(
+            db_unavailable_time.barber_id, db_unavailable_time.start_time, db_unavailable_time.end_time
+        )
+        occupancy_bitmap.drop(db_unavailable_time.barber_id, previous_start, previous_end)
+        occupancy_bitmap.drop(db_unavailable_time.barber_id, db_unavailable_time.start_time, db_unavailable_time.end_time)
     return db_unavailable_time
 
 
@@ -238,5 +261,9 @@ def delete_barber_unavailable_time(
     if db_unavailable_time:
         db.delete(db_unavailable_time)
         db.commit()
+        availability_cache.invalidate_interval(
+            db_unavailable_time.barber_id, db_unavailable_time.start_time, db_unavailable_time.end_time
+        )
+        occupancy_bitmap.drop(db_unavailable_time.barber_id, db_unavailable_time.start_time, db_unavailable_time.end_time)
         return True
     return False
@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from src.app.models.service import Service
 from src.app.schemas.service import ServiceCreate, ServiceBase, ServiceUpdate
+from src.app.services import catalog_cache
 
 
 def create_service(db: Session, service: ServiceCreate):
@@ -9,11 +10,12 @@ def create_service(db: Session, service: ServiceCreate):
     db.add(new_service)
     db.commit()
     db.refresh(new_service)
+    catalog_cache.bump_version(catalog_cache.SERVICES)
     return new_service
 
 
 def get_services(db: Session):
-    return db.query(Service).all()
+    return db.query(Service).options(selectinload(Service.barbers)).all()
 
 
 def get_service(db: Session, service_id: int):
@@ -27,6 +29,7 @@ def update_service(db: Session, service_id: int, updated_data: ServiceUpdate):
             setattr(service, key, value)
         db.commit()
         db.refresh(service)
+        catalog_cache.bump_version(catalog_cache.SERVICES)
     return service
 
 
@@ -35,5 +38,6 @@ def delete_service(db: Session, service_id: int):
     if service:
         db.delete(service)
         db.commit()
+        catalog_cache.bump_version(catalog_cache.SERVICES)
         return True
     return False
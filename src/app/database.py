@@ -1,12 +1,109 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+logger = logging.getLogger(__name__)
 
 # Base class for declarative SQLAlchemy model definitions.
 Base = declarative_base()
 
 _engine: Engine | None = None
 _session_local: type[sessionmaker] | None = None
+_async_engine: AsyncEngine | None = None
+_async_session_local: async_sessionmaker[AsyncSession] | None = None
+
+
+class _CheckoutTimingMixin:
+    """Logs how long a caller waited for a connection from the pool (Pool.connect, pre-ping included)."""
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        wait_ms = (time.perf_counter() - started) * 1000
+
+        from src.app.core import metrics
+        from src.app.core.config import settings
+        metrics.DB_POOL_CHECKOUT.observe(wait_ms / 1000)
+        if wait_ms >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning(f"Slow DB connection checkout: waited {wait_ms:.1f} ms ({self.status()})")
+        else:
+            logger.debug(f"DB connection checkout took {wait_ms:.1f} ms")
+        return connection
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(settings, pool_class) -> dict:
+    """Engine keyword arguments shared by the sync and the async engine."""
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer owns the pooling; keeping our own pool on top of it only pins server connections.
+        return {"echo": settings.DB_ECHO, "poolclass": NullPool}
+
+    return {
+        "echo": settings.DB_ECHO,
+        "poolclass": pool_class,
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+def _psycopg2_connect_args(settings) -> dict:
+    connect_args = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER_MODE:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return connect_args
+
+
+def _asyncpg_connect_args(settings) -> dict:
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER_MODE:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+
+    connect_args = {"server_settings": server_settings}
+    if settings.DB_PGBOUNCER_MODE:
+        # Prepared statements don't survive transaction pooling, so asyncpg must not cache them
+        # and their names must be unique across the server connections PgBouncer hands out.
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    return connect_args
+
+
+def _set_statement_timeout_per_transaction(engine: Engine, settings) -> None:
+    """
+    PgBouncer refuses statement_timeout as a startup parameter unless it is listed in its
+    ignore_startup_parameters, and in transaction pooling a session-level SET would stay on
+    whichever server connection it ran on. So in PgBouncer mode the timeout is applied with
+    SET LOCAL at the start of every transaction, on the raw connection so that it isn't counted
+    as an application statement.
+    """
+    if not (settings.DB_PGBOUNCER_MODE and settings.DB_STATEMENT_TIMEOUT_MS):
+        return
+
+    @event.listens_for(engine, "begin")
+    def _set_local_statement_timeout(conn):
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+        finally:
+            cursor.close()
 
 
 def get_engine() -> Engine:
@@ -19,9 +116,13 @@ def get_engine() -> Engine:
         from src.app.core.config import settings
         _engine = create_engine(
             settings.DATABASE_URL,
-            echo=True,
-            pool_pre_ping=True
+            connect_args=_psycopg2_connect_args(settings),
+            **_pool_options(settings, TimedQueuePool)
         )
+        _set_statement_timeout_per_transaction(_engine, settings)
+        from src.app.core import metrics, query_budget
+        metrics.instrument_engine(_engine, "sync")
+        query_budget.instrument_engine(_engine)
     return _engine
 
 
@@ -49,3 +150,66 @@ def get_db():
         raise e
     finally:
         db.close()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Returns the asyncpg-backed SQLAlchemy engine used by async endpoints.
+    The sync engine above stays in place for Alembic, scripts and the remaining sync routes.
+    """
+    global _async_engine
+    if _async_engine is None:
+        from src.app.core.config import settings
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL,
+            connect_args=_asyncpg_connect_args(settings),
+            **_pool_options(settings, TimedAsyncAdaptedQueuePool)
+        )
+        _set_statement_timeout_per_transaction(_async_engine.sync_engine, settings)
+        from src.app.core import metrics, query_budget
+        metrics.instrument_engine(_async_engine.sync_engine, "async")
+        query_budget.instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_session_local() -> async_sessionmaker[AsyncSession]:
+    """
+    Returns an AsyncSession factory. Objects are not expired on commit, because lazy
+    attribute refreshes are not possible outside of an awaited call.
+    """
+    global _async_session_local
+    if _async_session_local is None:
+        _async_session_local = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_session_local
+
+
+async def get_async_db():
+    """
+    FastAPI dependency to get an async database session.
+    Sync service functions can run on it through `await db.run_sync(fn, ...)`.
+    """
+    async with get_async_session_local()() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+
+# SQLSTATE codes the services map to HTTP errors.
+SQLSTATE_FOREIGN_KEY_VIOLATION = "23503"
+SQLSTATE_EXCLUSION_VIOLATION = "23P01"
+
+
+def get_sqlstate(error: Exception) -> str | None:
+    """
+    Returns the SQLSTATE of a database error raised through SQLAlchemy (e.g. IntegrityError),
+    for both psycopg2 (pgcode) and asyncpg (sqlstate) connections.
+    """
+    orig = getattr(error, "orig", error)
+    return getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
@@ -10,11 +10,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.app.core.config import settings
 
 from fastapi import FastAPI
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, Response
 
+from src.app.core import metrics, query_budget
 from src.app.core.redis_client import get_redis_client, close_redis_connection_pool
+from src.app.auth import hashing, revocation
 
-from src.app.routers import barbers, services, appointments, addons, timeslots
+from src.app.routers import barbers, services, appointments, addons, timeslots, analytics
 from src.app.auth.router import router as auth_router
 
 import logging
@@ -47,11 +49,15 @@ def startup_event():
     logger.debug("Application startup event triggered.")
     get_redis_client()
     logger.debug("Redis client initialized.")
+    revocation.start_listener()
+    hashing.start()
 
 
 @app.on_event("shutdown")
 def shutdown_event():
     logger.info("DEBUG: Application shutdown event triggered.")
+    revocation.stop_listener()
+    hashing.shutdown()
     close_redis_connection_pool()
     logger.info("DEBUG: Redis client connection closed.")
 
@@ -70,6 +76,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(query_budget.QueryBudgetMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
@@ -77,6 +86,7 @@ app.include_router(services.router, prefix="/api/services", tags=["Services"])
 app.include_router(barbers.router, prefix="/api/barbers", tags=["Barbers"])
 app.include_router(addons.router, prefix="/api/addons", tags=["Addons"])
 app.include_router(timeslots.router, prefix="/api/timeslots", tags=["Timeslots"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 
 
 def custom_openapi():
@@ -117,6 +127,12 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 def root():
     return {"message": "Barbershop backend is working"}
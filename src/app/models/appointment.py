@@ -1,7 +1,8 @@
 import enum
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, func, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, func, Enum, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.types import DateTime
 
@@ -17,6 +18,22 @@ class AppointmentStatus(enum.Enum):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index(
+            "ix_appointments_barber_active_time",
+            "barber_id",
+            "scheduled_time",
+            postgresql_include=["scheduled_end"],
+            postgresql_where=text("status != 'cancelled'"),
+        ),
+        Index("ix_appointments_barber_time_id", "barber_id", "scheduled_time", "id"),
+        Index("ix_appointments_user_time", "user_id", "scheduled_time"),
+        Index(
+            "ix_appointments_reminder_due",
+            "scheduled_time",
+            postgresql_where=text("status = 'upcoming' AND reminder_sent_at IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column()
@@ -36,6 +53,7 @@ class Appointment(Base):
         server_default="upcoming",
         nullable=False,
     )
+    reminder_sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="appointments")
     barber = relationship("Barber", backref="appointments_from_barber")
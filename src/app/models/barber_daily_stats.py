@@ -0,0 +1,29 @@
+from datetime import date, datetime
+
+from sqlalchemy import Integer, ForeignKey, Date, DateTime, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.app.database import Base
+
+
+class BarberDailyStats(Base):
+    """Daily rollup of the analytics figures of a barber, refreshed by the refresh_barber_daily_stats task."""
+    __tablename__ = "barber_daily_stats"
+
+    barber_id: Mapped[int] = mapped_column(Integer, ForeignKey("barbers.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    appointments: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cancelled: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    no_shows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    booked_revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    booked_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scheduled_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return (f"<BarberDailyStats(barber_id={self.barber_id}, day={self.day},"
+                f" appointments={self.appointments}, revenue={self.revenue})>")
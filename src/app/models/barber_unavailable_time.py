@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Integer, ForeignKey, DateTime, String
+from sqlalchemy import Integer, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.app.database import Base
@@ -8,6 +8,9 @@ from src.app.database import Base
 
 class BarberUnavailableTime(Base):
     __tablename__ = "barber_unavailable_times"
+    __table_args__ = (
+        Index("ix_barber_unavailable_times_barber_start", "barber_id", "start_time", postgresql_include=["end_time"]),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     barber_id: Mapped[int] = mapped_column(Integer, ForeignKey("barbers.id"), nullable=False)
@@ -1,13 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from src.app.auth.dependencies import admin_required, get_current_user
+from src.app.auth.dependencies import admin_required, get_current_principal
+from src.app.auth.schemas import UserPrincipal
+from src.app.core.query_budget import query_budget
 from src.app.crud import addon as crud
 from src.app.database import get_db
-from src.app.models.user import User
 from src.app.schemas.addon import AddonRead, AddonCreate, AddonUpdate
+from src.app.services import catalog_cache
 
 router = APIRouter(tags=["Addons"])
 
@@ -16,16 +18,18 @@ router = APIRouter(tags=["Addons"])
 def create_addon(
         addon: AddonCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)):
+        current_user: UserPrincipal = Depends(admin_required)):
     return crud.create_addon(db=db, addon=addon)
 
 
 @router.get("/", response_model=List[AddonRead])
+@query_budget(3)
 def get_all_addons(
+        request: Request,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_principal)
 ):
-    return crud.get_addons(db=db)
+    return catalog_cache.respond(request, catalog_cache.ADDONS, List[AddonRead], lambda: crud.get_addons(db=db))
 
 
 @router.put("/{addon_id}", response_model=AddonRead)
@@ -33,7 +37,7 @@ def update_addon(
         addon_id: int,
         updated_data: AddonUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.update_addon(db=db, addon_id=addon_id, updated_data=updated_data)
     if not result:
@@ -45,7 +49,7 @@ def update_addon(
 def delete_addon(
         addon_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     if not crud.delete_addon(db=db, addon_id=addon_id):
         raise HTTPException(status_code=404, detail="Addon not found")
@@ -0,0 +1,43 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from src.app.auth.dependencies import admin_required
+from src.app.auth.schemas import UserPrincipal
+from src.app.core.config import settings
+from src.app.database import get_db
+from src.app.schemas.analytics import BarberPeriodStats
+from src.app.services.analytics import get_barber_stats
+from src.app.tasks.analytics import refresh_barber_daily_stats
+
+router = APIRouter()
+
+
+@router.get("/barbers", response_model=List[BarberPeriodStats])
+def read_barber_stats(
+        date_from: date = Query(..., description="First day (UTC) of the range."),
+        date_to: date = Query(..., description="Last day (UTC) of the range, inclusive."),
+        period: str = Query("day", pattern="^(day|week|month)$"),
+        barber_id: Optional[int] = Query(None),
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(admin_required)
+):
+    """
+    Revenue, utilization and cancellation/no-show rates per barber and day, week or month,
+    with the cumulative revenue of each barber and their share of the period's revenue.
+    """
+    return get_barber_stats(db, date_from, date_to, period=period, barber_id=barber_id)
+
+
+@router.post("/rollup/refresh", status_code=status.HTTP_202_ACCEPTED)
+def refresh_rollup(
+        days: int = Query(..., ge=1, le=366, description="Recompute this many days before today."),
+        current_user: UserPrincipal = Depends(admin_required)
+):
+    """Queues a recomputation of the daily rollup, e.g. to backfill it after enabling it."""
+    if not settings.ANALYTICS_ROLLUP_ENABLED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Analytics rollup is disabled")
+    refresh_barber_daily_stats.delay(days)
+    return {"message": f"Rollup refresh for the last {days} days queued"}
@@ -1,42 +1,63 @@
 import logging
-from datetime import datetime, timedelta, UTC, timezone
+from datetime import datetime, UTC, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from src.app import crud
-from src.app.auth.dependencies import get_current_user, admin_required
+from src.app.auth.dependencies import get_current_principal, get_current_principal_async, admin_required
+from src.app.auth.schemas import UserPrincipal
 from src.app.core.config import settings
-from src.app.database import get_db
-from src.app.crud.appointment import get_appointment_by_barber
-from src.app.tasks.email import send_email
+from src.app.core.pagination import decode_cursor, encode_cursor
+from src.app.core.query_budget import query_budget
+from src.app.database import get_db, get_async_db
+from src.app.crud.appointment import get_appointment_by_barber, user_appointment_views_query
 
-from typing import List
+from typing import Optional
 
 from src.app.models.appointment import Appointment, AppointmentStatus
 from src.app.models.barber import Barber
 from src.app.models.service import Service
-from src.app.models.user import User
 from src.app.schemas.appointment import AppointmentCreate, AppointmentReadDetailed, AppointmentResponse, \
-    AppointmentShortUserView, AddonsOut
+    AppointmentShortUserView, AddonsOut, AppointmentBulkCreate, AppointmentBulkResponse, AppointmentPage, \
+    AppointmentShortUserViewPage
+from src.app.services import availability_cache, occupancy_bitmap
+from src.app.services.appointment_export import stream_csv, stream_ndjson
+from src.app.services.bulk_booking import create_appointments_bulk
 from src.app.services.email_service import send_booking_confirmation_email, send_booking_cancellation_email
-from src.app.services.timeslot_generator import create_appointment_with_checks
+from src.app.services.timeslot_generator import create_appointment_with_checks, mark_booked
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _create_appointment_response(db: Session, data: AppointmentCreate, user_id: int) -> AppointmentResponse:
+    """
+    Creates the appointment and serializes it while still inside the sync session,
+    so barber, service and addons are loaded before control returns to the event loop.
+    The Redis cache updates are left to the caller, see mark_booked.
+    """
+    created_appointment = create_appointment_with_checks(db=db, data=data, user_id=user_id, update_caches=False)
+    return AppointmentResponse.model_validate(created_appointment)
+
+
 @router.post("/", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
-def create_appointment(
+@query_budget(9)
+async def create_appointment(
         appointment: AppointmentCreate,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
 ):
-    created_appointment = create_appointment_with_checks(
-        db=db,
-        data=appointment,
-        user_id=current_user.id
+    created_appointment = await db.run_sync(_create_appointment_response, appointment, current_user.id)
+    await run_in_threadpool(
+        mark_booked,
+        created_appointment.barber_id,
+        created_appointment.scheduled_time,
+        created_appointment.scheduled_time + timedelta(minutes=created_appointment.total_duration)
     )
 
     scheduled_datetime = created_appointment.scheduled_time
@@ -48,60 +69,115 @@ def create_appointment(
     scheduled_date = scheduled_datetime.strftime("%Y-%m-%d")
     scheduled_time_str = scheduled_datetime.strftime("%H:%M")
 
-    send_booking_confirmation_email(
+    await run_in_threadpool(
+        send_booking_confirmation_email,
         email_to=current_user.email,
         user_name=current_user.name,
         scheduled_day=scheduled_day,
         scheduled_date=scheduled_date,
         scheduled_time=scheduled_time_str,
         barber_name=created_appointment.barber.name,
-        service_title=AppointmentResponse.model_validate(created_appointment).full_service_title,
+        service_title=created_appointment.full_service_title,
         total_price=created_appointment.total_price,
         total_duration=created_appointment.total_duration,
         status=created_appointment.status.value,
         frontend_url=settings.FRONTEND_URL
     )
 
-    reminder = scheduled_datetime - timedelta(minutes=10)
-
-    if reminder > datetime.now(timezone.utc):
-        send_reminder_email.apply_async(
-            args=[
-                current_user.email,
-                "Upcoming appointment reminder",
-                f"Hi {current_user.name}!, this is reminder about your appointment at {scheduled_time_str}."
-            ],
-            eta=reminder
-        )
-        logger.info(f"Scheduled reminder email for appointment ID {created_appointment.id} at {reminder}.")
-    else:
-        logger.warning(f"Reminder time ({reminder}) for appointment ID {created_appointment.id} "
-                       f"already passed ({datetime.now(timezone.utc)}), skipping scheduling reminder email.")
-
     logger.info(f"API: Appointment ID {created_appointment.id} successfully processed for user {current_user.id}.")
     return created_appointment
 
 
-@router.get("/barber/{barber_id}", response_model=List[AppointmentResponse])
+@router.post("/bulk", response_model=AppointmentBulkResponse)
+def create_appointments_in_bulk(
+        data: AppointmentBulkCreate,
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(admin_required)
+):
+    """
+    Front desk booking of many appointments at once. Each item is booked for the customer account
+    given by its userId, which gets the reminder; items without one are recorded under the admin's
+    account and get no reminder. Each item is reported as created, conflict or invalid; no
+    confirmation emails are sent.
+    """
+    results = create_appointments_bulk(db=db, items=data.appointments, user_id=current_user.id)
+    return AppointmentBulkResponse(
+        created=sum(1 for result in results if result.status == "created"),
+        results=results
+    )
+
+
+@router.get("/export")
+def export_appointments(
+        date_from: datetime = Query(..., description="Export appointments starting at or after this time."),
+        date_to: datetime = Query(..., description="Export appointments starting before this time."),
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        barber_id: Optional[int] = Query(None),
+        current_user: UserPrincipal = Depends(admin_required)
+):
+    """
+    Streams appointments with barber, service and addon names as NDJSON or CSV, for reporting.
+    """
+    if date_to <= date_from:
+        raise HTTPException(status_code=400, detail="date_to must be after date_from")
+
+    filename = f"appointments_{date_from.date()}_{date_to.date()}.{export_format}"
+    if export_format == "csv":
+        content, media_type = stream_csv(date_from, date_to, barber_id), "text/csv"
+    else:
+        content, media_type = stream_ndjson(date_from, date_to, barber_id), "application/x-ndjson"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/barber/{barber_id}", response_model=AppointmentPage)
+@query_budget(3)
 def get_appointments_by_barber(
         barber_id: int,
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page."),
+        limit: int = Query(50, ge=1, le=200),
+        date_from: Optional[datetime] = Query(None, description="Only appointments starting at or after this time."),
+        date_to: Optional[datetime] = Query(None, description="Only appointments starting before this time."),
+        appointment_status: Optional[AppointmentStatus] = Query(None, alias="status"),
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
-    try:
-        appointments_from_db = get_appointment_by_barber(db, barber_id)
-        return appointments_from_db
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    after = decode_cursor(cursor) if cursor else None
+    appointments, has_more = get_appointment_by_barber(
+        db,
+        barber_id,
+        limit=limit,
+        after=after,
+        date_from=date_from,
+        date_to=date_to,
+        status=appointment_status
+    )
+
+    next_cursor = None
+    if has_more:
+        last = appointments[-1]
+        next_cursor = encode_cursor(last.scheduled_time, last.id)
+    return AppointmentPage(
+        items=[AppointmentResponse.model_validate(appointment) for appointment in appointments],
+        next_cursor=next_cursor
+    )
 
 
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(4)
 def cancel_appointment(
         appointment_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_principal)
 ):
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = db.query(Appointment).options(
+        joinedload(Appointment.barber),
+        joinedload(Appointment.service),
+        selectinload(Appointment.addons)
+    ).filter(Appointment.id == appointment_id).first()
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
@@ -112,10 +188,15 @@ def cancel_appointment(
         raise HTTPException(status_code=400, detail="Appointment is already cancelled")
 
     appointment.status = AppointmentStatus.cancelled
+    # Serialized before the commit expires the loaded relationships, so nothing is lazy loaded afterwards.
+    cancelled = AppointmentResponse.model_validate(appointment)
+    scheduled_end = appointment.scheduled_end
     db.commit()
-    db.refresh(appointment)
 
-    scheduled_datetime = appointment.scheduled_time
+    availability_cache.invalidate_interval(cancelled.barber_id, cancelled.scheduled_time, scheduled_end)
+    occupancy_bitmap.drop(cancelled.barber_id, cancelled.scheduled_time, scheduled_end)
+
+    scheduled_datetime = cancelled.scheduled_time
     scheduled_day = scheduled_datetime.strftime("%A")
     scheduled_date = scheduled_datetime.strftime("%Y-%m-%d")
     scheduled_time = scheduled_datetime.strftime("%H:%M")
@@ -126,22 +207,22 @@ def cancel_appointment(
         scheduled_day=scheduled_day,
         scheduled_date=scheduled_date,
         scheduled_time=scheduled_time,
-        barber_name=appointment.barber.name,
-        service_title=AppointmentResponse.model_validate(appointment).full_service_title,
-        total_price=appointment.total_price,
-        total_duration=appointment.total_duration,
-        status=appointment.status.value,
+        barber_name=cancelled.barber_name,
+        service_title=cancelled.full_service_title,
+        total_price=cancelled.total_price,
+        total_duration=cancelled.total_duration,
+        status=cancelled.status.value,
         frontend_url=settings.FRONTEND_URL
     )
 
-    return {"message": "Appointment cancelled successfully", "status": appointment.status}
+    return {"message": "Appointment cancelled successfully", "status": cancelled.status}
 
 
 @router.post("/{appointment_id}/complete", status_code=status.HTTP_200_OK)
 def complete_appointment(
         appointment_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
     if not appointment:
@@ -156,46 +237,39 @@ def complete_appointment(
     db.commit()
     db.refresh(appointment)
 
+    availability_cache.invalidate_interval(appointment.barber_id, appointment.scheduled_time, appointment.scheduled_end)
+
     return {"message": "Appointment marked as completed", "status": appointment.status}
 
 
-@router.get("/me", response_model=List[AppointmentShortUserView])
-def get_user_appointments(
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+@router.get("/me", response_model=AppointmentShortUserViewPage)
+@query_budget(2)
+async def get_user_appointments(
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page."),
+        limit: int = Query(50, ge=1, le=200),
+        when: Optional[str] = Query(
+            None, pattern="^(upcoming|past)$", description="upcoming: soonest first; past: most recent first."
+        ),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
 ):
-    now = datetime.now(timezone.utc)
-
-    appointments = (
-        db.query(Appointment)
-        .filter(Appointment.user_id == current_user.id)
-        .options(
-            joinedload(Appointment.service),
-            joinedload(Appointment.addons),
-            joinedload(Appointment.barber)
+    after = decode_cursor(cursor) if cursor else None
+    result = await db.execute(
+        user_appointment_views_query(
+            current_user.id,
+            limit=limit,
+            now=datetime.now(timezone.utc),
+            after=after,
+            when=when
         )
-        .order_by(Appointment.scheduled_time.asc())
-        .all()
     )
-
-    def to_short_view(a: Appointment) -> AppointmentShortUserView:
-        start = a.scheduled_time
-
-        end = start + timedelta(minutes=a.total_duration)
-
-        a.scheduled_time = a.scheduled_time.replace(tzinfo=timezone.utc)
-
-        full_service_title = " + ".join([a.service.name] + [addon.name for addon in a.addons])
-
-        return AppointmentShortUserView(
-            id=a.id,
-            barber_name=a.barber.name,
-            full_service_title=full_service_title,
-            scheduled_day=start.strftime("%A"),
-            scheduled_date=start.strftime("%d.%m.%Y"),
-            scheduled_time=f"{start.strftime('%H:%M')} - {end.strftime('%H:%M')}",
-            total_price=a.total_price,
-            status=a.status
-        )
-
-    return [to_short_view(a) for a in appointments]
+    rows = result.mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["scheduled_at"], rows[-1]["id"])
+    return AppointmentShortUserViewPage(
+        items=[AppointmentShortUserView.model_validate(dict(row)) for row in rows],
+        next_cursor=next_cursor
+    )
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from src.app.auth.dependencies import admin_required, get_current_user
+from src.app.auth.dependencies import admin_required, get_current_principal
+from src.app.auth.schemas import UserPrincipal
+from src.app.core.query_budget import query_budget
 from src.app.crud.barber import create_barber_schedule, get_barber_schedules, get_barber_schedule_by_id, \
     update_barber_schedule, delete_barber_schedule, create_barber_unavailable_time, get_barber_unavailable_times, \
     get_barber_unavailable_time_by_id, update_barber_unavailable_time, delete_barber_unavailable_time
 from src.app.database import get_db
 from src.app.crud import barber as crud
 from src.app.models.barber import Barber
-from src.app.models.user import User
 from src.app.schemas.barber import BarberCreate, BarberRead, BarberBase, AssignServices, BarberUpdate, AssignAddons
+from src.app.services import catalog_cache
 from typing import List
 
 from src.app.schemas.barber_schedule import BarberScheduleInDB, BarberScheduleCreate, BarberScheduleUpdate, \
@@ -22,17 +24,19 @@ router = APIRouter(tags=["Barbers"])
 def create_barber(
         barber: BarberCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     return crud.create_barber(db=db, barber=barber)
 
 
 @router.get("/", response_model=List[BarberRead])
+@query_budget(2)
 def get_all_barbers(
+        request: Request,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_principal)
 ):
-    return crud.get_barbers(db=db)
+    return catalog_cache.respond(request, catalog_cache.BARBERS, List[BarberRead], lambda: crud.get_barbers(db=db))
 
 
 @router.put("/{barber_id}", response_model=BarberRead)
@@ -40,7 +44,7 @@ def update_barber(
         barber_id: int,
         updated_data: BarberUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.update_barber(db=db, barber_id=barber_id, updated_data=updated_data)
     if not result:
@@ -52,7 +56,7 @@ def update_barber(
 def delete_barber(
         barber_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     if not crud.delete_barber(db=db, barber_id=barber_id):
         raise HTTPException(status_code=404, detail="Barber not found")
@@ -63,7 +67,7 @@ def assign_services(
         barber_id: int,
         payload: AssignServices,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.assign_services_to_barber(db, barber_id, payload.service_ids)
     if not result:
@@ -76,7 +80,7 @@ def assign_addons(
         barber_id: int,
         payload: AssignAddons,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.assign_addons_to_barber(db, barber_id, payload.addon_ids)
     if not result:
@@ -89,7 +93,7 @@ def remove_service(
         barber_id: int,
         service_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.remove_service_from_barber(db, barber_id, service_id)
     if result is None:
@@ -102,7 +106,7 @@ def remove_addon(
         barber_id: int,
         addon_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.remove_addon_from_barber(db, barber_id, addon_id)
     if result is None:
@@ -116,7 +120,7 @@ def create_schedule_for_barber(
         barber_id: int,
         schedule_data: BarberScheduleCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     """
         Create a new regular working schedule for a specific barber.
@@ -134,7 +138,7 @@ def create_schedule_for_barber(
 def get_schedules_for_barber(
         barber_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_principal)
 ):
     """
     Retrieve all regular working schedules for a specific barber.
@@ -150,7 +154,7 @@ def get_schedules_for_barber(
 def get_schedule_by_id(
         schedule_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_principal)
 ):
     """
     Retrieve a specific regular schedule entry by its ID.
@@ -166,7 +170,7 @@ def update_schedule_entry(
         schedule_id: int,
         schedule_data: BarberScheduleUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     """
     Update an existing regular schedule entry.
@@ -182,7 +186,7 @@ def update_schedule_entry(
 def delete_schedule_entry(
         schedule_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     """
     Delete a regular schedule entry.
@@ -198,7 +202,7 @@ def create_unavailable_time_for_barber(
         barber_id: int,
         unavailable_data: BarberUnavailableTimeCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     """
     Create a new unavailable time entry for a specific barber.
@@ -214,7 +218,7 @@ def create_unavailable_time_for_barber(
 def get_unavailable_times_for_barber(
     barber_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_principal)
 ):
     """
     Retrieve all unavailable time entries for a specific barber.
@@ -230,7 +234,7 @@ def get_unavailable_times_for_barber(
 def get_unavailable_time_by_id(
         unavailable_time_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     """
     Retrieve a specific unavailable time entry by its ID.
@@ -246,7 +250,7 @@ def update_unavailable_time_entry( # Changed to 'def'
     unavailable_time_id: int,
     unavailable_data: BarberUnavailableTimeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(admin_required)
+    current_user: UserPrincipal = Depends(admin_required)
 ):
     """
     Update an existing unavailable time entry.
@@ -265,7 +269,7 @@ def update_unavailable_time_entry( # Changed to 'def'
 def delete_unavailable_time_entry(
     unavailable_time_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(admin_required)
+    current_user: UserPrincipal = Depends(admin_required)
 ):
     """
     Delete an unavailable time entry.
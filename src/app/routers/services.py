@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from src.app.auth.dependencies import admin_required, get_current_user
+from src.app.auth.dependencies import admin_required
+from src.app.auth.schemas import UserPrincipal
+from src.app.core.query_budget import query_budget
 from src.app.database import get_db
 from src.app.crud import service as crud
-from src.app.models.user import User
 from src.app.schemas.service import ServiceCreate, ServiceRead, ServiceBase, ServiceUpdate
+from src.app.services import catalog_cache
 from typing import List
 
 router = APIRouter(tags=["Services"])
@@ -15,14 +17,19 @@ router = APIRouter(tags=["Services"])
 def create_service(
         service: ServiceCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     return crud.create_service(db=db, service=service)
 
 
 @router.get("/", response_model=List[ServiceRead])
-def get_all_services(db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    return crud.get_services(db=db)
+@query_budget(3)
+def get_all_services(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(admin_required)
+):
+    return catalog_cache.respond(request, catalog_cache.SERVICES, List[ServiceRead], lambda: crud.get_services(db=db))
 
 
 @router.put("/{service_id}", response_model=ServiceRead)
@@ -30,7 +37,7 @@ def update_service(
         service_id: int,
         updated_data: ServiceUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     result = crud.update_service(db=db, service_id=service_id, updated_data=updated_data)
     if not result:
@@ -42,7 +49,7 @@ def update_service(
 def delete_service(
         service_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(admin_required)
+        current_user: UserPrincipal = Depends(admin_required)
 ):
     if not crud.delete_service(db=db, service_id=service_id):
         raise HTTPException(status_code=404, detail="Service not found")
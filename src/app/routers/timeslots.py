@@ -2,20 +2,25 @@ from datetime import datetime, date
 from typing import List, Optional
 
 from fastapi import APIRouter, Query, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.auth.dependencies import get_current_user
-from src.app.database import get_db
+from src.app.auth.dependencies import get_current_principal_async, admin_required
+from src.app.core.query_budget import query_budget
+from src.app.auth.schemas import UserPrincipal
+from src.app.database import get_async_db
 from src.app.models.barber import Barber
 from src.app.models.service import Service
-from src.app.models.user import User
-from src.app.services.timeslot_generator import get_available_timeslots
+from src.app.schemas.timeslot import DailyTimeslots, BarberTimeslot, AvailabilityCacheStats
+from src.app.services import availability_cache
+from src.app.services.timeslot_generator import get_available_timeslots_async, \
+    get_available_timeslots_range_async, get_first_available_timeslots_async
 
 router = APIRouter()
 
 
 @router.get("/available", response_model=List[datetime])
-def get_barber_available_timeslots(
+@query_budget(7)
+async def get_barber_available_timeslots(
         barber_id: int,
         target_date: date = Query(..., description="Date for which to get available timeslots (YYYY-MM-DD)."),
         service_id: int = Query(..., description="ID of the service to book (determines duration)."),
@@ -25,23 +30,23 @@ def get_barber_available_timeslots(
         ),
         slot_interval_minutes: int = Query(
             15, ge=5, le=60, description="Granularity of slots in minutes (e.g., 15, 30)."),
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
 ):
     """
     Get available timeslots for a specific barber on a given date for a particular service.
     This endpoint allows clients to query for free slots before making a booking.
     """
-    barber = db.get(Barber, barber_id)
+    barber = await db.get(Barber, barber_id)
     if not barber:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Barber not found.")
 
-    service = db.get(Service, service_id)
+    service = await db.get(Service, service_id)
     if not service:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found.")
 
     try:
-        available_slots = get_available_timeslots(
+        available_slots = await get_available_timeslots_async(
             db=db,
             barber_id=barber_id,
             target_date=target_date,
@@ -57,3 +62,103 @@ def get_barber_available_timeslots(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=f"An unexpected error occurred: {e}")
+
+
+@router.get("/available/range", response_model=List[DailyTimeslots])
+@query_budget(7)
+async def get_barber_available_timeslots_range(
+        barber_id: int,
+        date_from: date = Query(..., description="First date of the range (YYYY-MM-DD)."),
+        date_to: date = Query(..., description="Last date of the range, inclusive (YYYY-MM-DD)."),
+        service_id: int = Query(..., description="ID of the service to book (determines duration)."),
+        addon_ids: Optional[List[int]] = Query(
+            None,
+            description="List of addon IDs to include in duration. Optional"
+        ),
+        slot_interval_minutes: int = Query(
+            15, ge=5, le=60, description="Granularity of slots in minutes (e.g., 15, 30)."),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
+):
+    """
+    Get available timeslots for a specific barber for every day in a date range, grouped by day.
+    All data for the range is loaded at once, so a calendar view needs a single request.
+    """
+    barber = await db.get(Barber, barber_id)
+    if not barber:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Barber not found.")
+
+    service = await db.get(Service, service_id)
+    if not service:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found.")
+
+    try:
+        available_by_day = await get_available_timeslots_range_async(
+            db=db,
+            barber_id=barber_id,
+            date_from=date_from,
+            date_to=date_to,
+            service_id=service_id,
+            addon_ids=addon_ids,
+            slot_interval_minutes=slot_interval_minutes
+        )
+        return [DailyTimeslots(date=day, slots=slots) for day, slots in available_by_day.items()]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=f"An unexpected error occurred: {e}")
+
+
+@router.get("/first-available", response_model=List[BarberTimeslot])
+@query_budget(6)
+async def get_first_available_timeslots_for_service(
+        service_id: int = Query(..., description="ID of the service to book (determines duration)."),
+        date_from: date = Query(..., description="First date of the range (YYYY-MM-DD)."),
+        date_to: date = Query(..., description="Last date of the range, inclusive (YYYY-MM-DD)."),
+        addon_ids: Optional[List[int]] = Query(
+            None,
+            description="List of addon IDs to include in duration. Optional"
+        ),
+        slot_interval_minutes: int = Query(
+            15, ge=5, le=60, description="Granularity of slots in minutes (e.g., 15, 30)."),
+        limit: int = Query(20, ge=1, le=200, description="Maximum number of slots to return."),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
+):
+    """
+    Get the earliest available timeslots for a service across all barbers who provide it.
+    Each slot is tagged with the barber it belongs to ("any barber, earliest slot").
+    """
+    service = await db.get(Service, service_id)
+    if not service:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found.")
+
+    try:
+        earliest_slots = await get_first_available_timeslots_async(
+            db=db,
+            service_id=service_id,
+            date_from=date_from,
+            date_to=date_to,
+            addon_ids=addon_ids,
+            slot_interval_minutes=slot_interval_minutes,
+            limit=limit
+        )
+        return [BarberTimeslot(barber_id=barber_id, start_time=slot) for slot, barber_id in earliest_slots]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=f"An unexpected error occurred: {e}")
+
+
+@router.get("/cache-stats", response_model=AvailabilityCacheStats)
+def get_availability_cache_stats(current_user: UserPrincipal = Depends(admin_required)):
+    """
+    Hit/miss counters of the availability cache, shared by all workers.
+    """
+    return availability_cache.get_stats()
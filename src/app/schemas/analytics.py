@@ -0,0 +1,26 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class BarberPeriodStats(BaseModel):
+    barber_id: int
+    barber_name: str
+    period_start: date
+
+    appointments: int
+    completed: int
+    cancelled: int
+    no_shows: int
+
+    revenue: int
+    booked_revenue: int
+    cumulative_revenue: int
+    revenue_share: Optional[float] = None
+
+    booked_minutes: int
+    scheduled_minutes: int
+    utilization: Optional[float] = None
+    cancellation_rate: Optional[float] = None
+    no_show_rate: Optional[float] = None
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from pydantic import BaseModel, Field, ConfigDict, computed_field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from src.app.schemas.barber import BarberOut
 from src.app.schemas.service import ServiceOut
@@ -19,6 +19,30 @@ class AppointmentCreate(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class AppointmentBulkItem(AppointmentCreate):
+    user_id: Optional[int] = Field(
+        None,
+        alias="userId",
+        description="The customer's account. Without it the booking is recorded under the admin and gets no reminder."
+    )
+
+
+class AppointmentBulkCreate(BaseModel):
+    appointments: List[AppointmentBulkItem] = Field(..., min_length=1, max_length=200)
+
+
+class AppointmentBulkItemResult(BaseModel):
+    index: int
+    status: Literal["created", "conflict", "invalid"]
+    appointment_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class AppointmentBulkResponse(BaseModel):
+    created: int
+    results: List[AppointmentBulkItemResult]
+
+
 class AppointmentRead(BaseModel):
     id: int
     name: str
@@ -107,6 +131,11 @@ class AppointmentResponse(BaseModel):
         return " + ".join([service_name] + addons_name)
 
 
+class AppointmentPage(BaseModel):
+    items: List[AppointmentResponse]
+    next_cursor: Optional[str] = None
+
+
 class AppointmentShortUserView(BaseModel):
     id: int
     barber_name: str
@@ -117,3 +146,7 @@ class AppointmentShortUserView(BaseModel):
     total_price: int
     status: AppointmentStatus
 
+
+class AppointmentShortUserViewPage(BaseModel):
+    items: List[AppointmentShortUserView]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,20 @@
+from datetime import date, datetime
+from typing import List
+
+from pydantic import BaseModel
+
+
+class DailyTimeslots(BaseModel):
+    date: date
+    slots: List[datetime]
+
+
+class BarberTimeslot(BaseModel):
+    barber_id: int
+    start_time: datetime
+
+
+class AvailabilityCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
@@ -0,0 +1,222 @@
+"""
+Per-barber revenue, utilization and cancellation/no-show analytics, aggregated in SQL.
+
+Daily figures per barber (UTC days, like the timeslot generator) are computed from
+appointments, barber_schedules and barber_unavailable_times, then grouped by day, week or month.
+
+- revenue: price of completed appointments; booked_revenue also counts upcoming ones.
+- booked_minutes: duration of non-cancelled appointments.
+- scheduled_minutes: working hours from the weekly schedule minus unavailable times.
+- no_shows: appointments still upcoming after their end time (never completed nor cancelled).
+
+With ANALYTICS_ROLLUP_ENABLED, days before today are read from the barber_daily_stats rollup
+kept up to date by the refresh_barber_daily_stats beat task, and today onwards is computed live.
+A past (barber, day) is only taken from the rollup when its row was refreshed after the day
+ended. Days without such a row are computed live as well: history older than the refresh window
+that was never backfilled, yesterday before the next refresh, and days of newly added barbers.
+"""
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Literal, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_ANALYTICS_RANGE_DAYS = 366
+
+Period = Literal["day", "week", "month"]
+
+_DAILY_COLUMNS = (
+    "appointments, completed, cancelled, no_shows, revenue, booked_revenue, booked_minutes, scheduled_minutes"
+)
+
+# A rollup row can replace the live figures once it was refreshed after its day ended.
+_FINAL_ROLLUP_ROW = "{alias}refreshed_at >= CAST({alias}day + 1 AS timestamp) AT TIME ZONE 'UTC'"
+
+# Daily figures per barber for [:{prefix}_from, :{prefix}_to] (inclusive dates), limited to the
+# (barber, day) pairs matching {barber_days_filter}. Appointments are only read for those days.
+_LIVE_DAILY_SQL = """
+    WITH days AS (
+        SELECT CAST(d AS date) AS day
+        FROM generate_series(CAST(:{prefix}_from AS date), CAST(:{prefix}_to AS date), interval '1 day') AS d
+    ),
+    barber_days AS (
+        SELECT b.id AS barber_id, days.day
+        FROM barbers b CROSS JOIN days
+        WHERE (CAST(:barber_id AS integer) IS NULL OR b.id = :barber_id){barber_days_filter}
+    ),
+    appointment_stats AS (
+        SELECT a.barber_id,
+               CAST(a.scheduled_time AT TIME ZONE 'UTC' AS date) AS day,
+               count(*) AS appointments,
+               count(*) FILTER (WHERE a.status = 'completed') AS completed,
+               count(*) FILTER (WHERE a.status = 'cancelled') AS cancelled,
+               count(*) FILTER (WHERE a.status = 'upcoming' AND a.scheduled_end < :now) AS no_shows,
+               coalesce(sum(a.total_price) FILTER (WHERE a.status = 'completed'), 0) AS revenue,
+               coalesce(sum(a.total_price) FILTER (WHERE a.status != 'cancelled'), 0) AS booked_revenue,
+               coalesce(sum(a.total_duration) FILTER (WHERE a.status != 'cancelled'), 0) AS booked_minutes
+        FROM appointments a
+        WHERE a.scheduled_time >= CAST(:{prefix}_from AS timestamp) AT TIME ZONE 'UTC'
+          AND a.scheduled_time < (CAST(:{prefix}_to AS timestamp) + interval '1 day') AT TIME ZONE 'UTC'
+          AND a.scheduled_time >= CAST((SELECT min(day) FROM barber_days) AS timestamp) AT TIME ZONE 'UTC'
+          AND a.scheduled_time < CAST((SELECT max(day) + 1 FROM barber_days) AS timestamp) AT TIME ZONE 'UTC'
+          AND (CAST(:barber_id AS integer) IS NULL OR a.barber_id = :barber_id)
+          AND (a.barber_id, CAST(a.scheduled_time AT TIME ZONE 'UTC' AS date)) IN (SELECT barber_id, day FROM barber_days)
+        GROUP BY a.barber_id, CAST(a.scheduled_time AT TIME ZONE 'UTC' AS date)
+    ),
+    working AS (
+        SELECT bd.barber_id, bd.day,
+               (bd.day + s.start_time) AT TIME ZONE 'UTC' AS work_start,
+               (bd.day + s.end_time) AT TIME ZONE 'UTC' AS work_end
+        FROM barber_days bd
+        JOIN barber_schedules s
+          ON s.barber_id = bd.barber_id AND s.day_of_week = extract(isodow FROM bd.day) - 1
+    ),
+    schedule_stats AS (
+        SELECT w.barber_id, w.day,
+               sum(greatest(
+                   extract(epoch FROM w.work_end - w.work_start) / 60 - coalesce(u.unavailable_minutes, 0), 0
+               )) AS scheduled_minutes
+        FROM working w
+        LEFT JOIN LATERAL (
+            SELECT sum(extract(epoch FROM least(ut.end_time, w.work_end) - greatest(ut.start_time, w.work_start)) / 60)
+                   AS unavailable_minutes
+            FROM barber_unavailable_times ut
+            WHERE ut.barber_id = w.barber_id AND ut.start_time < w.work_end AND ut.end_time > w.work_start
+        ) u ON true
+        GROUP BY w.barber_id, w.day
+    )
+    SELECT bd.barber_id, bd.day,
+           coalesce(a.appointments, 0) AS appointments,
+           coalesce(a.completed, 0) AS completed,
+           coalesce(a.cancelled, 0) AS cancelled,
+           coalesce(a.no_shows, 0) AS no_shows,
+           coalesce(a.revenue, 0) AS revenue,
+           coalesce(a.booked_revenue, 0) AS booked_revenue,
+           coalesce(a.booked_minutes, 0) AS booked_minutes,
+           CAST(round(coalesce(s.scheduled_minutes, 0)) AS integer) AS scheduled_minutes
+    FROM barber_days bd
+    LEFT JOIN appointment_stats a ON a.barber_id = bd.barber_id AND a.day = bd.day
+    LEFT JOIN schedule_stats s ON s.barber_id = bd.barber_id AND s.day = bd.day
+"""
+
+_ROLLUP_DAILY_SQL = f"""
+    SELECT barber_id, day, {_DAILY_COLUMNS}
+    FROM barber_daily_stats
+    WHERE day BETWEEN :rollup_from AND :rollup_to
+      AND (CAST(:barber_id AS integer) IS NULL OR barber_id = :barber_id)
+      AND {_FINAL_ROLLUP_ROW.format(alias="")}
+"""
+
+# Live figures of the past days _ROLLUP_DAILY_SQL has no final row for.
+_ROLLUP_GAPS_SQL = f"""
+    SELECT barber_id, day, {_DAILY_COLUMNS}
+    FROM ({_LIVE_DAILY_SQL.format(
+        prefix="rollup",
+        barber_days_filter=(
+            " AND NOT EXISTS (SELECT 1 FROM barber_daily_stats r"
+            f" WHERE r.barber_id = b.id AND r.day = days.day AND {_FINAL_ROLLUP_ROW.format(alias='r.')})"
+        ),
+    )}) AS gaps
+"""
+
+_PERIOD_SQL = """
+    WITH daily AS ({daily_sql}),
+    per_period AS (
+        SELECT daily.barber_id,
+               CAST(date_trunc(:period, daily.day) AS date) AS period_start,
+               sum(appointments) AS appointments,
+               sum(completed) AS completed,
+               sum(cancelled) AS cancelled,
+               sum(no_shows) AS no_shows,
+               sum(revenue) AS revenue,
+               sum(booked_revenue) AS booked_revenue,
+               sum(booked_minutes) AS booked_minutes,
+               sum(scheduled_minutes) AS scheduled_minutes
+        FROM daily
+        GROUP BY daily.barber_id, CAST(date_trunc(:period, daily.day) AS date)
+    )
+    SELECT p.barber_id, b.name AS barber_name, p.period_start,
+           p.appointments, p.completed, p.cancelled, p.no_shows,
+           p.revenue, p.booked_revenue,
+           sum(p.revenue) OVER (PARTITION BY p.barber_id ORDER BY p.period_start) AS cumulative_revenue,
+           CAST(p.revenue AS float) / nullif(sum(p.revenue) OVER (PARTITION BY p.period_start), 0) AS revenue_share,
+           p.booked_minutes, p.scheduled_minutes,
+           CAST(p.booked_minutes AS float) / nullif(p.scheduled_minutes, 0) AS utilization,
+           CAST(p.cancelled AS float) / nullif(p.appointments, 0) AS cancellation_rate,
+           CAST(p.no_shows AS float) / nullif(p.appointments, 0) AS no_show_rate
+    FROM per_period p
+    JOIN barbers b ON b.id = p.barber_id
+    ORDER BY p.period_start, p.barber_id
+"""
+
+_REFRESH_ROLLUP_SQL = f"""
+    INSERT INTO barber_daily_stats (barber_id, day, {_DAILY_COLUMNS}, refreshed_at)
+    SELECT barber_id, day, {_DAILY_COLUMNS}, :now
+    FROM ({_LIVE_DAILY_SQL.format(prefix="live", barber_days_filter="")}) AS live
+    ON CONFLICT (barber_id, day) DO UPDATE SET
+        appointments = EXCLUDED.appointments,
+        completed = EXCLUDED.completed,
+        cancelled = EXCLUDED.cancelled,
+        no_shows = EXCLUDED.no_shows,
+        revenue = EXCLUDED.revenue,
+        booked_revenue = EXCLUDED.booked_revenue,
+        booked_minutes = EXCLUDED.booked_minutes,
+        scheduled_minutes = EXCLUDED.scheduled_minutes,
+        refreshed_at = EXCLUDED.refreshed_at
+"""
+
+
+def get_barber_stats(
+        db: Session,
+        date_from: date,
+        date_to: date,
+        period: Period = "day",
+        barber_id: Optional[int] = None
+) -> List[dict]:
+    """Per-barber figures for every day, week or month touched by [date_from, date_to]."""
+    if date_to < date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_to must not be before date_from")
+    if (date_to - date_from).days + 1 > MAX_ANALYTICS_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must not exceed {MAX_ANALYTICS_RANGE_DAYS} days"
+        )
+
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    params = {"period": period, "barber_id": barber_id, "now": now}
+    parts = []
+
+    live_from = date_from
+    if settings.ANALYTICS_ROLLUP_ENABLED and date_from < today:
+        params.update(rollup_from=date_from, rollup_to=min(date_to, today - timedelta(days=1)))
+        parts.extend([_ROLLUP_DAILY_SQL, _ROLLUP_GAPS_SQL])
+        live_from = today
+    if live_from <= date_to:
+        params.update(live_from=live_from, live_to=date_to)
+        parts.append(f"SELECT barber_id, day, {_DAILY_COLUMNS} FROM ({_LIVE_DAILY_SQL.format(prefix='live', barber_days_filter='')}) AS live")
+
+    daily_sql = " UNION ALL ".join(parts)
+    rows = db.execute(text(_PERIOD_SQL.format(daily_sql=daily_sql)), params).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def refresh_daily_rollup(db: Session, date_from: date, date_to: date) -> None:
+    """Recomputes barber_daily_stats for [date_from, date_to] and commits."""
+    db.execute(
+        text(_REFRESH_ROLLUP_SQL),
+        {
+            "live_from": date_from,
+            "live_to": date_to,
+            "barber_id": None,
+            "now": datetime.now(timezone.utc),
+        },
+    )
+    db.commit()
+    logger.info(f"Refreshed barber_daily_stats from {date_from} to {date_to}")
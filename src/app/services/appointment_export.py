@@ -0,0 +1,123 @@
+"""
+Streaming export of appointments for reporting.
+
+Rows are read through a server-side cursor (yield_per) and written out chunk by chunk, so
+memory use doesn't depend on the size of the date range and the header goes out before the
+query has finished. The export opens its own session because it keeps reading after the
+request's dependencies have been closed.
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from src.app.database import get_session_local
+from src.app.models.addon import Addon
+from src.app.models.appointment import Appointment
+from src.app.models.appointment_addon_link import appointment_addon
+from src.app.models.barber import Barber
+from src.app.models.service import Service
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+
+COLUMNS = [
+    "id",
+    "scheduled_time",
+    "scheduled_end",
+    "status",
+    "barber",
+    "service",
+    "addons",
+    "total_duration",
+    "total_price",
+    "client_name",
+    "client_phone_number",
+]
+
+
+def _export_query(date_from: datetime, date_to: datetime, barber_id: Optional[int]):
+    addon_names = (
+        select(func.string_agg(Addon.name, aggregate_order_by(literal_column("', '"), Addon.name)))
+        .select_from(appointment_addon)
+        .join(Addon, Addon.id == appointment_addon.c.addon_id)
+        .where(appointment_addon.c.appointment_id == Appointment.id)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Appointment.id,
+            Appointment.scheduled_time,
+            Appointment.scheduled_end,
+            Appointment.status,
+            Barber.name,
+            Service.name,
+            addon_names,
+            Appointment.total_duration,
+            Appointment.total_price,
+            Appointment.name,
+            Appointment.phone_number,
+        )
+        .join(Barber, Barber.id == Appointment.barber_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .where(Appointment.scheduled_time >= date_from, Appointment.scheduled_time < date_to)
+        .order_by(Appointment.scheduled_time, Appointment.id)
+    )
+    if barber_id is not None:
+        query = query.where(Appointment.barber_id == barber_id)
+    return query
+
+
+def _iter_rows(date_from: datetime, date_to: datetime, barber_id: Optional[int]) -> Iterator[list]:
+    """Yields lists of export rows, one per fetched batch, as plain JSON/CSV-ready values."""
+    with get_session_local()() as db:
+        result = db.execute(
+            _export_query(date_from, date_to, barber_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        exported = 0
+        for partition in result.partitions():
+            rows = [
+                [
+                    appointment_id,
+                    scheduled_time.isoformat(),
+                    scheduled_end.isoformat(),
+                    status.value,
+                    barber_name,
+                    service_name,
+                    addons or "",
+                    total_duration,
+                    total_price,
+                    client_name,
+                    client_phone_number,
+                ]
+                for (appointment_id, scheduled_time, scheduled_end, status, barber_name, service_name, addons,
+                     total_duration, total_price, client_name, client_phone_number) in partition
+            ]
+            exported += len(rows)
+            yield rows
+        logger.info(f"Exported {exported} appointments from {date_from} to {date_to} (barber_id={barber_id})")
+
+
+def stream_ndjson(date_from: datetime, date_to: datetime, barber_id: Optional[int] = None) -> Iterator[str]:
+    for rows in _iter_rows(date_from, date_to, barber_id):
+        yield "".join(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows)
+
+
+def stream_csv(date_from: datetime, date_to: datetime, barber_id: Optional[int] = None) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(COLUMNS)
+    yield buffer.getvalue()
+
+    for rows in _iter_rows(date_from, date_to, barber_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
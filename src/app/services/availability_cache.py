@@ -0,0 +1,165 @@
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "availability_cache:stats"
+
+# Only writes computed against the current barber version are stored, so a booking that
+# invalidates a day while its slots are being recomputed can't be overwritten by stale data.
+_STORE_IF_VERSION_MATCHES = """
+local current = redis.call('GET', KEYS[2]) or '0'
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def _day_key(barber_id: int, day: date) -> str:
+    return f"availability:{barber_id}:{day.isoformat()}"
+
+
+def _version_key(barber_id: int) -> str:
+    return f"availability_version:{barber_id}"
+
+
+def _field(total_duration_minutes: int, slot_interval_minutes: int) -> str:
+    return f"{total_duration_minutes}:{slot_interval_minutes}"
+
+
+def _get_client() -> redis.Redis | None:
+    if not settings.AVAILABILITY_CACHE_ENABLED:
+        return None
+    try:
+        return get_redis_client()
+    except ConnectionError as e:
+        logger.warning(f"Availability cache disabled for this call: {e}")
+        return None
+
+
+def lookup(
+        barber_id: int,
+        day: date,
+        total_duration_minutes: int,
+        slot_interval_minutes: int
+) -> Tuple[Optional[List[datetime]], Optional[str]]:
+    """
+    Returns (slots, version). slots is None on a cache miss; version must be passed to store().
+    Slots that are already in the past are filtered out, so today's entry stays valid as time goes on.
+    """
+    client = _get_client()
+    if client is None:
+        return None, None
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hget(_day_key(barber_id, day), _field(total_duration_minutes, slot_interval_minutes))
+        pipe.get(_version_key(barber_id))
+        cached, version = pipe.execute()
+        client.hincrby(STATS_KEY, "hits" if cached is not None else "misses", 1)
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Availability cache lookup failed for barber_id={barber_id} on {day}: {e}")
+        return None, None
+
+    version = version or "0"
+    if cached is None:
+        return None, version
+
+    now_ts = datetime.now(timezone.utc).timestamp()
+    slots = [datetime.fromtimestamp(ts, tz=timezone.utc) for ts in json.loads(cached) if ts >= now_ts]
+    return slots, version
+
+
+def store(
+        barber_id: int,
+        day: date,
+        total_duration_minutes: int,
+        slot_interval_minutes: int,
+        slots: List[datetime],
+        version: Optional[str]
+) -> None:
+    client = _get_client()
+    if client is None or version is None:
+        return
+
+    try:
+        client.eval(
+            _STORE_IF_VERSION_MATCHES,
+            2,
+            _day_key(barber_id, day),
+            _version_key(barber_id),
+            version,
+            _field(total_duration_minutes, slot_interval_minutes),
+            json.dumps([int(slot.timestamp()) for slot in slots]),
+            settings.AVAILABILITY_CACHE_TTL_SECONDS,
+        )
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Availability cache store failed for barber_id={barber_id} on {day}: {e}")
+
+
+def invalidate_days(barber_id: int, days: Iterable[date]) -> None:
+    """Drops cached slots of the given barber days (all durations and intervals)."""
+    client = _get_client()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.incr(_version_key(barber_id))
+        for day in days:
+            pipe.delete(_day_key(barber_id, day))
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.error(f"Availability cache invalidation failed for barber_id={barber_id}: {e}")
+
+
+def invalidate_interval(barber_id: int, start: datetime, end: datetime) -> None:
+    """Drops cached slots of every UTC day touched by [start, end)."""
+    start_day = start.astimezone(timezone.utc).date()
+    end_day = (end.astimezone(timezone.utc) - timedelta(microseconds=1)).date()
+    days = [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+    invalidate_days(barber_id, days)
+
+
+def invalidate_barber(barber_id: int) -> None:
+    """Drops all cached slots of a barber, e.g. after a change to the weekly schedule."""
+    client = _get_client()
+    if client is None:
+        return
+
+    try:
+        client.incr(_version_key(barber_id))
+        keys = list(client.scan_iter(match=f"availability:{barber_id}:*", count=500))
+        if keys:
+            client.delete(*keys)
+    except redis.exceptions.RedisError as e:
+        logger.error(f"Availability cache invalidation failed for barber_id={barber_id}: {e}")
+
+
+def get_stats() -> dict:
+    """Hit/miss counters of all workers; zeros when the cache is disabled or Redis is unreachable."""
+    stats = {}
+    client = _get_client()
+    if client is not None:
+        try:
+            stats = client.hgetall(STATS_KEY)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Availability cache stats unavailable: {e}")
+    hits = int(stats.get("hits", 0))
+    misses = int(stats.get("misses", 0))
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,224 @@
+"""
+Bulk booking for appointments entered in batches (walk-ins, phone bookings).
+
+Services, addons and barbers are validated with one query each, conflicts with existing
+appointments and between the requested items are found with one statement over a VALUES
+list, and all accepted appointments are inserted with one executemany.
+
+Within a batch, earlier items win: an item overlapping an earlier accepted item of the same
+barber is reported as a conflict, while one overlapping only rejected items is still booked.
+
+An item is booked for the customer account given by its user_id, which gets the reminder and
+sees the booking in /appointments/me. Items without one (walk-ins without an account) are
+recorded under the admin who entered them, with reminder_sent_at set at insert, so
+send_due_reminders never mails the admin about other people's appointments.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.app.database import SQLSTATE_EXCLUSION_VIOLATION, get_sqlstate
+from src.app.models.addon import Addon
+from src.app.models.appointment import Appointment, AppointmentStatus
+from src.app.models.appointment_addon_link import appointment_addon
+from src.app.models.barber import Barber
+from src.app.models.service import Service
+from src.app.models.user import User
+from src.app.schemas.appointment import AppointmentBulkItem, AppointmentBulkItemResult
+from src.app.services import availability_cache, occupancy_bitmap
+from src.app.services.timeslot_generator import booking_time_as_utc
+
+logger = logging.getLogger(__name__)
+
+# A concurrent booking can slip in between the conflict check and the insert; the exclusion
+# constraint then rejects the insert and the whole batch is checked again.
+_MAX_ATTEMPTS = 3
+
+
+def _validate_items(db: Session, items: List[AppointmentBulkItem]) -> Dict[int, dict]:
+    """Returns, for every item index, either an "error" or the computed row for the insert."""
+    service_ids = {item.service_id for item in items}
+    addon_ids = {addon_id for item in items for addon_id in item.addon_ids}
+    barber_ids = {item.barber_id for item in items}
+
+    services = {service.id: service for service in db.scalars(select(Service).where(Service.id.in_(service_ids)))}
+    addons = {addon.id: addon for addon in db.scalars(select(Addon).where(Addon.id.in_(addon_ids)))} \
+        if addon_ids else {}
+    existing_barber_ids = set(db.scalars(select(Barber.id).where(Barber.id.in_(barber_ids))))
+    user_ids = {item.user_id for item in items if item.user_id is not None}
+    existing_user_ids = set(db.scalars(select(User.id).where(User.id.in_(user_ids)))) if user_ids else set()
+
+    validated = {}
+    for index, item in enumerate(items):
+        service = services.get(item.service_id)
+        if service is None:
+            validated[index] = {"error": "Service not found."}
+            continue
+        if item.barber_id not in existing_barber_ids:
+            validated[index] = {"error": "Barber not found."}
+            continue
+        if any(addon_id not in addons for addon_id in item.addon_ids):
+            validated[index] = {"error": "Addon IDs not found."}
+            continue
+        if item.user_id is not None and item.user_id not in existing_user_ids:
+            validated[index] = {"error": "User not found."}
+            continue
+
+        item_addons = [addons[addon_id] for addon_id in dict.fromkeys(item.addon_ids)]
+        total_duration = service.duration + sum(addon.duration for addon in item_addons)
+        start_time = booking_time_as_utc(item.scheduled_time)
+        validated[index] = {
+            "row": {
+                "name": item.name,
+                "phone_number": item.phone_number,
+                "barber_id": item.barber_id,
+                "service_id": item.service_id,
+                "total_duration": total_duration,
+                "total_price": service.price + sum(addon.price for addon in item_addons),
+                "scheduled_time": start_time,
+                "scheduled_end": start_time + timedelta(minutes=total_duration),
+                "status": AppointmentStatus.upcoming,
+            },
+            "addon_ids": [addon.id for addon in item_addons],
+            "customer_id": item.user_id,
+        }
+    return validated
+
+
+def _find_conflicts(db: Session, rows: Dict[int, dict]) -> Dict[int, str]:
+    """
+    One statement over the requested intervals: for each item, the first overlapping
+    appointment already in the database and the earlier items of the batch it overlaps.
+    Returns the conflict detail of every item that can't be booked.
+    """
+    requested = select(
+        sa.values(
+            sa.column("idx", sa.Integer),
+            sa.column("barber_id", sa.Integer),
+            sa.column("start_time", sa.DateTime(timezone=True)),
+            sa.column("end_time", sa.DateTime(timezone=True)),
+            name="requested_values",
+        ).data([
+            (index, row["barber_id"], row["scheduled_time"], row["scheduled_end"])
+            for index, row in rows.items()
+        ])
+    ).cte("requested")
+    earlier = requested.alias("earlier")
+
+    existing_conflict = (
+        select(Appointment.id)
+        .where(
+            Appointment.barber_id == requested.c.barber_id,
+            Appointment.status != AppointmentStatus.cancelled,
+            Appointment.scheduled_time < requested.c.end_time,
+            Appointment.scheduled_end > requested.c.start_time,
+        )
+        .limit(1)
+        .scalar_subquery()
+    )
+    earlier_overlaps = (
+        select(func.array_agg(earlier.c.idx))
+        .where(
+            earlier.c.barber_id == requested.c.barber_id,
+            earlier.c.idx < requested.c.idx,
+            earlier.c.start_time < requested.c.end_time,
+            earlier.c.end_time > requested.c.start_time,
+        )
+        .scalar_subquery()
+    )
+
+    result = db.execute(
+        select(requested.c.idx, existing_conflict.label("conflicting_id"), earlier_overlaps.label("overlaps"))
+        .order_by(requested.c.idx)
+    )
+
+    conflicts = {}
+    accepted = set()
+    for index, conflicting_id, overlaps in result:
+        if conflicting_id is not None:
+            conflicts[index] = f"Time slot already booked for this barber (appointment {conflicting_id})."
+            continue
+        overlapping_accepted = sorted(set(overlaps or []) & accepted)
+        if overlapping_accepted:
+            conflicts[index] = f"Overlaps item {overlapping_accepted[0]} of this batch."
+            continue
+        accepted.add(index)
+    return conflicts
+
+
+def _insert_appointments(db: Session, rows: Dict[int, dict], user_id: int) -> Dict[int, int]:
+    """Items without a customer account go under `user_id` (the admin) with their reminder skipped."""
+    indexes = list(rows)
+    now = datetime.now(timezone.utc)
+    appointment_ids = db.scalars(
+        insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True),
+        [
+            {
+                **rows[index]["row"],
+                "user_id": rows[index]["customer_id"] or user_id,
+                "reminder_sent_at": None if rows[index]["customer_id"] else now,
+            }
+            for index in indexes
+        ],
+    ).all()
+    created = dict(zip(indexes, appointment_ids))
+
+    addon_links = [
+        {"appointment_id": created[index], "addon_id": addon_id}
+        for index in indexes
+        for addon_id in rows[index]["addon_ids"]
+    ]
+    if addon_links:
+        db.execute(insert(appointment_addon), addon_links)
+    return created
+
+
+def create_appointments_bulk(
+        db: Session,
+        items: List[AppointmentBulkItem],
+        user_id: int
+) -> List[AppointmentBulkItemResult]:
+    """
+    Books every item that passes validation and doesn't conflict, in one transaction.
+    `user_id` is the admin entering the batch. Returns one result per item, in request order.
+    """
+    validated = _validate_items(db, items)
+    valid_rows = {index: entry for index, entry in validated.items() if "row" in entry}
+
+    created: Dict[int, int] = {}
+    conflicts: Dict[int, str] = {}
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        conflicts = _find_conflicts(db, valid_rows) if valid_rows else {}
+        to_insert = {index: entry for index, entry in valid_rows.items() if index not in conflicts}
+        try:
+            created = _insert_appointments(db, to_insert, user_id) if to_insert else {}
+            db.commit()
+            break
+        except IntegrityError as e:
+            db.rollback()
+            if get_sqlstate(e) != SQLSTATE_EXCLUSION_VIOLATION or attempt == _MAX_ATTEMPTS:
+                raise
+            logger.warning(f"Concurrent booking hit during bulk insert, re-checking (attempt {attempt})")
+
+    for index, appointment_id in created.items():
+        row = valid_rows[index]["row"]
+        availability_cache.invalidate_interval(row["barber_id"], row["scheduled_time"], row["scheduled_end"])
+        occupancy_bitmap.mark_busy(row["barber_id"], row["scheduled_time"], row["scheduled_end"])
+
+    results = []
+    for index in range(len(items)):
+        error: Optional[str] = validated[index].get("error")
+        if error is not None:
+            results.append(AppointmentBulkItemResult(index=index, status="invalid", detail=error))
+        elif index in conflicts:
+            results.append(AppointmentBulkItemResult(index=index, status="conflict", detail=conflicts[index]))
+        else:
+            results.append(AppointmentBulkItemResult(index=index, status="created", appointment_id=created[index]))
+
+    logger.info(f"Bulk booking by user_id={user_id}: {len(created)} of {len(items)} appointments created")
+    return results
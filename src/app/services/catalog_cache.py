@@ -0,0 +1,116 @@
+"""
+In-process cache of the catalog listings (barbers, services, addons) with ETag support.
+
+Each listing has a version counter in Redis, bumped by the crud functions that change it. A
+request reads the counter (one GET) and, when the process already holds the listing for that
+version, answers from memory: 200 with the cached body, or 304 if the client's If-None-Match
+matches, without touching the database. The ETag is a hash of the body, so it stays valid
+across processes and Redis restarts. In-process copies also expire after CATALOG_CACHE_TTL_SECONDS,
+in case a version bump was lost.
+
+Without Redis the listings are read from the database on every call, still with an ETag.
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import redis
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+BARBERS = "barbers"
+SERVICES = "services"
+ADDONS = "addons"
+
+# name -> (version, body, etag, stored_at)
+_entries: Dict[str, Tuple[str, bytes, str, float]] = {}
+_lock = threading.Lock()
+
+
+def _version_key(name: str) -> str:
+    return f"catalog_version:{name}"
+
+
+def _get_client() -> redis.Redis | None:
+    if not settings.CATALOG_CACHE_ENABLED:
+        return None
+    try:
+        return get_redis_client()
+    except ConnectionError as e:
+        logger.warning(f"Catalog cache disabled for this call: {e}")
+        return None
+
+
+def _current_version(name: str) -> Optional[str]:
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        return client.get(_version_key(name)) or "0"
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Catalog cache version lookup failed for {name}: {e}")
+        return None
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def respond(request: Request, name: str, schema: Any, load: Callable[[], Any]) -> Response:
+    """
+    Serves the listing `name`, validated against `schema` (e.g. List[ServiceRead]).
+    `load` queries the database and is only called when the in-process copy is outdated.
+    """
+    version = _current_version(name)
+    if version is not None:
+        with _lock:
+            entry = _entries.get(name)
+        if (
+                entry is not None
+                and entry[0] == version
+                and time.monotonic() - entry[3] < settings.CATALOG_CACHE_TTL_SECONDS
+        ):
+            return _response(request, entry[1], entry[2])
+
+    adapter = TypeAdapter(schema)
+    body = adapter.dump_json(adapter.validate_python(load(), from_attributes=True))
+    etag = _etag(body)
+    if version is not None:
+        with _lock:
+            _entries[name] = (version, body, etag, time.monotonic())
+    return _response(request, body, etag)
+
+
+def bump_version(name: str) -> None:
+    """Call after committing a change to the listing; every process reloads it on its next request."""
+    with _lock:
+        _entries.pop(name, None)
+
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.incr(_version_key(name))
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Catalog cache version bump failed for {name}: {e}")
@@ -1,8 +1,8 @@
 import logging
 import random
 import smtplib
-import ssl
 from datetime import datetime, timedelta, timezone
+from typing import List
 from email.mime.multipart import MIMEMultipart
 
 from src.app.schemas.appointment import AppointmentShortUserView, AppointmentShortUserView
@@ -14,39 +14,98 @@ from email.mime.text import MIMEText
 
 from src.app.models.appointment import AppointmentStatus
 from src.app.models.user import User
+from src.app.services.smtp_pool import smtp_pool
 
 logger = logging.getLogger(__name__)
 
 
-def send_email(email_to: str, subject: str, body: str):
+def _build_message(email_to: str, subject: str, body: str) -> MIMEText:
+    msg = MIMEText(body, "html", "utf-8")
+    msg["Subject"] = subject
+    msg["From"] = f"{settings.EMAIL_SENDER_NAME} <{settings.EMAIL_SENDER_ADDRESS}>"
+    msg["To"] = email_to
+    return msg
+
+
+def deliver_email(email_to: str, subject: str, body: str):
     """
-    inner function for sending email
+    Sends the email over a pooled SMTP session. Raises on failure, so the Celery task can retry it.
     """
+    msg = _build_message(email_to, subject, body)
 
     try:
-        msg = MIMEText(body, "html", "utf-8")
-        msg["Subject"] = subject
-        msg["From"] = f"{settings.EMAIL_SENDER_NAME} <{settings.EMAIL_SENDER_ADDRESS}>"
-        msg["To"] = email_to
-
-        context = ssl.create_default_context()
-
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls(context=context)
-            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-            logger.info(f"Email {subject} sent to {email_to}")
+        smtp_pool.send_message(msg)
+        logger.info(f"Email {subject} sent to {email_to}")
     except smtplib.SMTPAuthenticationError:
         logger.error(f"Failed to send email to {email_to}: SMTP authentication error")
+        raise
 
     except smtplib.SMTPConnectError as e:
         logger.error(f"Failed connect to SMTP server: {settings.SMTP_HOST}:{settings.SMTP_PORT}: {e}."
                      f" Check host and port.")
+        raise
+
+
+def deliver_emails(messages: List[dict]) -> List[dict]:
+    """
+    Sends many emails over one SMTP session.
+    messages are dicts with email_to, subject and body; returns the ones that could not be sent.
+    """
+    built = [_build_message(**message) for message in messages]
+    failures = smtp_pool.send_messages(built)
+
+    failed_ids = {id(msg) for msg, _ in failures}
+    for msg, error in failures:
+        logger.error(f"Failed to send email {msg['Subject']} to {msg['To']}: {error}")
+    logger.info(f"Batch of {len(messages)} emails sent, {len(failures)} failed")
+    return [message for message, msg in zip(messages, built) if id(msg) in failed_ids]
+
 
+def _deliver_email_now(email_to: str, subject: str, body: str):
+    try:
+        deliver_email(email_to, subject, body)
     except Exception as e:
         logger.error(f"An unexpected error occurred while sending email to {email_to}: {e}")
 
 
+def send_email(email_to: str, subject: str, body: str):
+    """
+    Queues the email for the Celery worker and returns immediately.
+    With EMAIL_DELIVERY_MODE=sync (e.g. in tests) the email is sent in the calling thread instead.
+    """
+    if settings.EMAIL_DELIVERY_MODE == "sync":
+        _deliver_email_now(email_to, subject, body)
+        return
+
+    # Imported here because the task module imports this one.
+    from src.app.tasks.email import send_email_task
+
+    try:
+        send_email_task.delay(email_to, subject, body)
+    except Exception as e:
+        logger.error(f"Failed to queue email {subject} to {email_to}, sending it now: {e}")
+        _deliver_email_now(email_to, subject, body)
+
+
+def send_emails(messages: List[dict]):
+    """
+    Queues many emails as one batch, sent by the worker over a single SMTP session.
+    """
+    if not messages:
+        return
+    if settings.EMAIL_DELIVERY_MODE == "sync":
+        deliver_emails(messages)
+        return
+
+    from src.app.tasks.email import send_email_batch_task
+
+    try:
+        send_email_batch_task.delay(messages)
+    except Exception as e:
+        logger.error(f"Failed to queue a batch of {len(messages)} emails, sending it now: {e}")
+        deliver_emails(messages)
+
+
 def send_password_reset_email(email_to: str, token: str, frontend_url: str) -> None:
     """
     inner function for sending email to reset password
@@ -154,6 +213,36 @@ def send_booking_confirmation_email(
     send_email(email_to, subject, body)
 
 
+def build_appointment_reminder_email(
+        email_to: str,
+        user_name: str,
+        scheduled_time: datetime,
+        barber_name: str,
+        frontend_url: str
+) -> dict:
+    """
+    Builds a reminder email as a message dict for send_emails().
+    """
+    subject = "Upcoming appointment reminder"
+    body = f"""
+    <html>
+    <body>
+        <p>Hi, {user_name}!</p>
+        <p>This is a reminder about your appointment:</p>
+        <ul>
+            <li><strong>Date:</strong> {scheduled_time.strftime("%A")}, {scheduled_time.strftime("%Y-%m-%d")}</li>
+            <li><strong>Time:</strong> {scheduled_time.strftime("%H:%M")}</li>
+            <li><strong>Barber:</strong> {barber_name}</li>
+        </ul>
+        <p>See you soon!</p>
+        <p><a href="{frontend_url}">Visit our website</a></p>
+    </body>
+    </html>
+    """
+
+    return {"email_to": email_to, "subject": subject, "body": body}
+
+
 def send_booking_cancellation_email(
         email_to: str,
         user_name: str,
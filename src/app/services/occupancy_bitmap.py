@@ -0,0 +1,239 @@
+"""
+Per-barber, per-day occupancy bitmaps kept in Redis.
+
+A UTC day is split into 288 cells of 5 minutes; bit i is set when anything (an appointment or an
+unavailable time) overlaps cell i. Intervals that don't start or end on a cell boundary occupy the
+whole partially covered cell. Bit 288 marks the bitmap as built, so an empty day can be told apart
+from a day that hasn't been loaded yet.
+
+Bookings set their bits in place. Removals (cancellations, edited or deleted unavailable times)
+drop the day instead, because clearing bits could free time still covered by another interval;
+the day is rebuilt from the database on the next read.
+"""
+import logging
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+from src.app.core.config import settings
+from src.app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CELL_MINUTES = 5
+CELL_SECONDS = CELL_MINUTES * 60
+CELLS_PER_DAY = 24 * 60 // CELL_MINUTES
+BUILT_MARKER_OFFSET = CELLS_PER_DAY
+_WORD_BITS = 32
+_WORDS_PER_DAY = CELLS_PER_DAY // _WORD_BITS
+
+_STORE_IF_VERSION_MATCHES = """
+local current = redis.call('GET', KEYS[2]) or '0'
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('BITFIELD', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_MARK_CELLS_IF_BUILT = """
+redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+return 1
+"""
+
+
+def _bitmap_key(barber_id: int, day: date) -> str:
+    return f"occupancy:{barber_id}:{day.isoformat()}"
+
+
+def _version_key(barber_id: int) -> str:
+    return f"occupancy_version:{barber_id}"
+
+
+def _day_start_ts(day: date) -> int:
+    return int(datetime.combine(day, time.min).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _days_touched(start: datetime, end: datetime) -> List[date]:
+    start_day = start.astimezone(timezone.utc).date()
+    end_day = (end.astimezone(timezone.utc) - timedelta(microseconds=1)).date()
+    return [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+
+
+def _cells_for_interval(day: date, start_ts: float, end_ts: float) -> range:
+    day_start = _day_start_ts(day)
+    first_cell = max(0, math.floor((start_ts - day_start) / CELL_SECONDS))
+    last_cell = min(CELLS_PER_DAY, math.ceil((end_ts - day_start) / CELL_SECONDS))
+    return range(first_cell, max(first_cell, last_cell))
+
+
+def is_usable(slot_interval_minutes: int, service_duration_minutes: int) -> bool:
+    """
+    Slots can be read from bitmaps only when every slot starts and ends on a cell boundary.
+    A duration that isn't a whole number of cells would be rounded up, hiding slots that end
+    just before a busy interval starting mid-cell, so such requests use the busy intervals instead.
+    """
+    return (
+        settings.OCCUPANCY_BITMAP_ENABLED
+        and slot_interval_minutes % CELL_MINUTES == 0
+        and service_duration_minutes % CELL_MINUTES == 0
+    )
+
+
+def build(day: date, intervals: Iterable[Tuple[int, int]]) -> int:
+    """Builds the bitmap of a day from (start, end) epoch-second intervals. Bit i of the result is cell i."""
+    bitmap = 0
+    for start_ts, end_ts in intervals:
+        for cell in _cells_for_interval(day, start_ts, end_ts):
+            bitmap |= 1 << cell
+    return bitmap
+
+
+def free_run_lengths(bitmap: int) -> List[int]:
+    """For every cell, the number of consecutive free cells starting at it (0 when the cell is busy)."""
+    run_lengths = [0] * (CELLS_PER_DAY + 1)
+    for cell in range(CELLS_PER_DAY - 1, -1, -1):
+        if not (bitmap >> cell) & 1:
+            run_lengths[cell] = run_lengths[cell + 1] + 1
+    return run_lengths
+
+
+def _decode_words(words: List[int]) -> int:
+    # Redis numbers bits from the most significant bit of the first byte; cell i is offset i.
+    bitmap = 0
+    for word_index, word in enumerate(words):
+        for bit in range(_WORD_BITS):
+            if (word >> (_WORD_BITS - 1 - bit)) & 1:
+                bitmap |= 1 << (word_index * _WORD_BITS + bit)
+    return bitmap
+
+
+def _encode_words(bitmap: int) -> List[int]:
+    words = []
+    for word_index in range(_WORDS_PER_DAY):
+        word = 0
+        for bit in range(_WORD_BITS):
+            if (bitmap >> (word_index * _WORD_BITS + bit)) & 1:
+                word |= 1 << (_WORD_BITS - 1 - bit)
+        words.append(word)
+    return words
+
+
+def _get_client() -> redis.Redis | None:
+    try:
+        return get_redis_client()
+    except ConnectionError as e:
+        logger.warning(f"Occupancy bitmaps unavailable for this call: {e}")
+        return None
+
+
+def fetch(
+        barber_days: Dict[int, List[date]]
+) -> Optional[Tuple[Dict[int, Dict[date, Optional[int]]], Dict[int, str]]]:
+    """
+    Reads the bitmaps of the given barber days in one round trip.
+    Returns (bitmaps, versions) where a missing day maps to None, or None if Redis is unavailable.
+    """
+    client = _get_client()
+    if client is None:
+        return None
+
+    read_words = []
+    for word_index in range(_WORDS_PER_DAY):
+        read_words += ["GET", f"u{_WORD_BITS}", word_index * _WORD_BITS]
+    read_words += ["GET", "u1", BUILT_MARKER_OFFSET]
+
+    barber_ids = list(barber_days)
+    try:
+        pipe = client.pipeline(transaction=False)
+        for barber_id in barber_ids:
+            pipe.get(_version_key(barber_id))
+        for barber_id in barber_ids:
+            for day in barber_days[barber_id]:
+                pipe.execute_command("BITFIELD", _bitmap_key(barber_id, day), *read_words)
+        results = iter(pipe.execute())
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Occupancy bitmap fetch failed: {e}")
+        return None
+
+    versions = {barber_id: next(results) or "0" for barber_id in barber_ids}
+    bitmaps: Dict[int, Dict[date, Optional[int]]] = {}
+    for barber_id in barber_ids:
+        bitmaps[barber_id] = {}
+        for day in barber_days[barber_id]:
+            values = next(results)
+            is_built = values[-1] == 1
+            bitmaps[barber_id][day] = _decode_words(values[:-1]) if is_built else None
+    return bitmaps, versions
+
+
+def store_many(bitmaps: Dict[int, Dict[date, int]], versions: Dict[int, str]) -> None:
+    """Stores freshly built bitmaps unless the barber's occupancy changed since fetch()."""
+    client = _get_client()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        for barber_id, bitmaps_by_day in bitmaps.items():
+            for day, bitmap in bitmaps_by_day.items():
+                write_words = []
+                for word_index, word in enumerate(_encode_words(bitmap)):
+                    write_words += ["SET", f"u{_WORD_BITS}", word_index * _WORD_BITS, word]
+                write_words += ["SET", "u1", BUILT_MARKER_OFFSET, 1]
+                pipe.eval(
+                    _STORE_IF_VERSION_MATCHES,
+                    2,
+                    _bitmap_key(barber_id, day),
+                    _version_key(barber_id),
+                    versions[barber_id],
+                    settings.OCCUPANCY_BITMAP_TTL_SECONDS,
+                    *write_words,
+                )
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Occupancy bitmap store failed: {e}")
+
+
+def mark_busy(barber_id: int, start: datetime, end: datetime) -> None:
+    """Sets the cells covered by a new booking or unavailable time on already built days."""
+    client = _get_client()
+    if client is None:
+        return
+
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for day in _days_touched(start, end):
+            cells = _cells_for_interval(day, start_ts, end_ts)
+            pipe.eval(_MARK_CELLS_IF_BUILT, 2, _bitmap_key(barber_id, day), _version_key(barber_id), *cells)
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.error(f"Occupancy bitmap update failed for barber_id={barber_id}, dropping days: {e}")
+        drop(barber_id, start, end)
+
+
+def drop(barber_id: int, start: datetime, end: datetime) -> None:
+    """Drops every day touched by [start, end) so it is rebuilt from the database on the next read."""
+    client = _get_client()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.incr(_version_key(barber_id))
+        for day in _days_touched(start, end):
+            pipe.delete(_bitmap_key(barber_id, day))
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.error(f"Occupancy bitmap drop failed for barber_id={barber_id}: {e}")
@@ -0,0 +1,156 @@
+"""
+Per-process pool of persistent SMTP sessions.
+
+Opening a session costs a TCP connect, STARTTLS and AUTH, so connections are kept open
+between messages. A connection idle for longer than SMTP_POOL_NOOP_AFTER_SECONDS is checked
+with NOOP before it is reused. A connection is also closed after
+SMTP_POOL_MAX_MESSAGES_PER_CONNECTION messages, because many servers cap messages per session.
+A message that fails because the connection dropped is retried once on a fresh connection.
+"""
+import logging
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+from typing import Iterator, List, Optional, Tuple
+
+from src.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SMTPConnectionPool:
+    def __init__(self, size: int):
+        self._idle: queue.LifoQueue[_PooledConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def _connect(self) -> _PooledConnection:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.SMTP_USE_STARTTLS:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+                server.starttls(context=self._ssl_context)
+            if settings.SMTP_USE_AUTH:
+                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        logger.debug(f"Opened SMTP connection to {settings.SMTP_HOST}:{settings.SMTP_PORT}")
+        return _PooledConnection(server)
+
+    def _is_reusable(self, connection: _PooledConnection) -> bool:
+        if connection.sent >= settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION:
+            return False
+        if time.monotonic() - connection.last_used < settings.SMTP_POOL_NOOP_AFTER_SECONDS:
+            return True
+        try:
+            code, _ = connection.server.noop()
+        except (smtplib.SMTPException, OSError):
+            return False
+        return code == 250
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_reusable(connection):
+                return connection
+            connection.close()
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        if not self._slots.acquire(timeout=settings.SMTP_TIMEOUT_SECONDS):
+            raise TimeoutError("Timed out waiting for a free SMTP connection")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def send_messages(self, messages: List[Message]) -> List[Tuple[Message, Exception]]:
+        """
+        Sends the messages over as few sessions as possible and returns the ones that failed,
+        with their errors. If no session can be opened, every unsent message is returned as failed.
+        """
+        failures = []
+        with self._slot():
+            connection = None
+            for index, message in enumerate(messages):
+                try:
+                    if connection is None:
+                        connection = self._checkout()
+                    elif connection.sent >= settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION:
+                        connection.close()
+                        connection = None
+                        connection = self._connect()
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.error(f"Could not open SMTP session to {settings.SMTP_HOST}:{settings.SMTP_PORT}: {e}")
+                    return failures + [(unsent, e) for unsent in messages[index:]]
+
+                try:
+                    connection.server.send_message(message)
+                except _CONNECTION_ERRORS as e:
+                    logger.warning(f"SMTP connection lost, reconnecting: {e}")
+                    connection.close()
+                    connection = None
+                    try:
+                        connection = self._connect()
+                        connection.server.send_message(message)
+                    except (smtplib.SMTPException, OSError) as retry_error:
+                        logger.error(f"Resending over a new SMTP session failed: {retry_error}")
+                        if connection is not None:
+                            connection.close()
+                        return failures + [(unsent, retry_error) for unsent in messages[index:]]
+                except smtplib.SMTPException as e:
+                    failures.append((message, e))
+                except OSError as e:
+                    # E.g. ssl.SSLError or a socket error: the session is in an unknown state, so it is
+                    # discarded and the next message goes out over a new one.
+                    logger.error(f"SMTP send failed, discarding the connection: {e}")
+                    failures.append((message, e))
+                    connection.close()
+                    connection = None
+                    continue
+
+                connection.sent += 1
+                connection.last_used = time.monotonic()
+
+            if connection is not None:
+                self._idle.put(connection)
+        return failures
+
+    def send_message(self, message: Message) -> None:
+        failures = self.send_messages([message])
+        if failures:
+            raise failures[0][1]
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+smtp_pool = SMTPConnectionPool(settings.SMTP_POOL_SIZE)
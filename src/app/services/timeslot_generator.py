@@ -1,47 +1,56 @@
+import heapq
 import logging
+import math
 import sqlalchemy as sa
-from datetime import datetime, date, timedelta, timezone
-from typing import List, Optional
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from starlette.concurrency import run_in_threadpool
+
+from src.app.core.config import settings
+from src.app.database import SQLSTATE_EXCLUSION_VIOLATION, SQLSTATE_FOREIGN_KEY_VIOLATION, get_sqlstate
 
 from src.app.models.addon import Addon
 from src.app.models.appointment import Appointment, AppointmentStatus
 from src.app.models.barber import Barber
+from src.app.models.barber_addon_link import barber_addon
 from src.app.models.barber_schedule import BarberSchedule
+from src.app.models.barber_service_link import barber_service
 from src.app.models.barber_unavailable_time import BarberUnavailableTime
 from src.app.models.service import Service
 from src.app.schemas.appointment import AppointmentCreate
+from src.app.services import availability_cache, occupancy_bitmap
 
 logger = logging.getLogger(__name__)
 
+MAX_AVAILABILITY_RANGE_DAYS = 31
 
-def get_available_timeslots(
-        db: Session,
-        barber_id: int,
-        target_date: date,
-        service_id: int,
-        addon_ids: Optional[List[int]] = None,
-        slot_interval_minutes: int = 15,
-) -> List[datetime]:
-    if slot_interval_minutes <= 0 or 60 % slot_interval_minutes != 0:
-        raise ValueError("slot_interval_minutes must be a positive integer and a divisor of 60.")
 
-    day_of_week = target_date.weekday()
-    schedule_entry = db.scalars(
-        select(BarberSchedule)
-        .where(BarberSchedule.barber_id == barber_id)
-        .where(BarberSchedule.day_of_week == day_of_week)
-    ).first()
+def to_utc(value: datetime) -> datetime:
+    """Converts an aware datetime to UTC; a naive one is taken as UTC already."""
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def booking_time_as_utc(scheduled_time: datetime) -> datetime:
+    """
+    The start time of a booking request. The wall-clock time is taken as UTC and any offset
+    in the payload is ignored, as POST /api/appointments/ always has; bulk booking does the same.
+    """
+    return scheduled_time.replace(tzinfo=timezone.utc)
 
-    if not schedule_entry:
-        return []
 
-    working_start_time = schedule_entry.start_time
-    working_end_time = schedule_entry.end_time
+def _validate_slot_interval(slot_interval_minutes: int) -> None:
+    if slot_interval_minutes <= 0 or 60 % slot_interval_minutes != 0:
+        raise ValueError("slot_interval_minutes must be a positive integer and a divisor of 60.")
+
 
+def _get_total_duration_minutes(db: Session, service_id: int, addon_ids: Optional[List[int]] = None) -> int:
+    """Returns the duration of the service plus all requested addons, in minutes."""
     service = db.get(Service, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
@@ -57,102 +66,691 @@ def get_available_timeslots(
             )
         total_duration_required_minutes += sum(addon.duration for addon in addons)
 
-    service_duration = timedelta(minutes=total_duration_required_minutes)
+    return total_duration_required_minutes
+
+
+def _merge_intervals(booked_intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merges (start, end) epoch-second intervals into a sorted list of disjoint intervals."""
+    merged_booked_intervals: List[Tuple[int, int]] = []
+    for start, end in sorted(booked_intervals):
+        if merged_booked_intervals and start <= merged_booked_intervals[-1][1]:
+            last_start, last_end = merged_booked_intervals[-1]
+            merged_booked_intervals[-1] = (last_start, max(last_end, end))
+        else:
+            merged_booked_intervals.append((start, end))
 
+    return merged_booked_intervals
+
+
+def _slot_start_bounds(
+        target_date: date,
+        working_start_time: time,
+        working_end_time: time,
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+        now_utc: datetime,
+) -> Tuple[int, int]:
+    """Returns the first and the last possible slot start of a working day as epoch seconds."""
     working_start_datetime_utc = datetime.combine(target_date, working_start_time).replace(tzinfo=timezone.utc)
     working_end_datetime_utc = datetime.combine(target_date, working_end_time).replace(tzinfo=timezone.utc)
 
-    now_utc = datetime.now(timezone.utc)
     if target_date == now_utc.date():
-        min_start_datetime = now_utc
+        min_start_datetime = max(now_utc, working_start_datetime_utc)
     else:
         min_start_datetime = working_start_datetime_utc
 
-    start_of_day_for_query = working_start_datetime_utc.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day_for_query = start_of_day_for_query + timedelta(days=1)
-
-    existing_appointments = db.scalars(
-        select(Appointment)
-        .where(Appointment.barber_id == barber_id)
-        .where(Appointment.scheduled_time >= start_of_day_for_query)
-        .where(Appointment.scheduled_time < end_of_day_for_query)
-        .where(Appointment.status != AppointmentStatus.cancelled)
-    ).all()
-
-    booked_intervals = []
-
-    for appt in existing_appointments:
-        start_utc = appt.scheduled_time.astimezone(timezone.utc)\
-            if appt.scheduled_time.tzinfo else appt.scheduled_time.replace(tzinfo=timezone.utc)
-        end_utc = start_utc + timedelta(minutes=appt.total_duration)
-        booked_intervals.append({
-            "start": start_utc,
-            "end": end_utc
-        })
-
-    unavailable_intervals_db = db.scalars(
-        select(BarberUnavailableTime)
-        .where(BarberUnavailableTime.barber_id == barber_id)
-        .where(BarberUnavailableTime.start_time >= start_of_day_for_query)
-        .where(BarberUnavailableTime.start_time < end_of_day_for_query)
-    ).all()
-
-    for unavail_time in unavailable_intervals_db:
-        start_utc = unavail_time.start_time.astimezone(
-            timezone.utc) if unavail_time.start_time.tzinfo else unavail_time.start_time.replace(tzinfo=timezone.utc)
-        end_utc = unavail_time.end_time.astimezone(
-            timezone.utc) if unavail_time.end_time.tzinfo else unavail_time.end_time.replace(tzinfo=timezone.utc)
-
-        booked_intervals.append({
-            "start": start_utc,
-            "end": end_utc
-        })
-
-    booked_intervals.sort(key=lambda x: x["start"])
-
-    merged_booked_intervals = []
-    if booked_intervals:
-        current_merged = booked_intervals[0]
-        for i in range(1, len(booked_intervals)):
-            next_interval = booked_intervals[i]
-            if next_interval["start"] <= current_merged["end"]:
-                current_merged["end"] = max(current_merged["end"], next_interval["end"])
-            else:
-                merged_booked_intervals.append(current_merged)
-                current_merged = next_interval
-        merged_booked_intervals.append(current_merged)
-
-    available_slots = []
     current_slot_start = min_start_datetime
 
     start_minute = current_slot_start.minute
-    if start_minute % slot_interval_minutes != 0:
+    if start_minute % slot_interval_minutes != 0 or current_slot_start.second or current_slot_start.microsecond:
         minutes_to_add = slot_interval_minutes - (start_minute % slot_interval_minutes)
         current_slot_start += timedelta(minutes=minutes_to_add)
         current_slot_start = current_slot_start.replace(second=0, microsecond=0)
 
-    while current_slot_start + service_duration <= working_end_datetime_utc:
-        potential_slot_end = current_slot_start + service_duration
-        is_available = True
+    slot_start = int(current_slot_start.timestamp())
+    last_slot_start = int(working_end_datetime_utc.timestamp()) - service_duration_minutes * 60
+    return slot_start, last_slot_start
+
+
+def _generate_day_slots(
+        target_date: date,
+        working_start_time: time,
+        working_end_time: time,
+        merged_booked_intervals: List[Tuple[int, int]],
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+        now_utc: datetime,
+) -> List[datetime]:
+    """
+    Builds the free slots of a single working day from its merged busy intervals.
+    Candidate slots are visited in increasing order while a single cursor sweeps forward over
+    the sorted, disjoint busy intervals, so every slot is checked in amortized O(1).
+    """
+    slot_start, last_slot_start = _slot_start_bounds(
+        target_date, working_start_time, working_end_time, service_duration_minutes, slot_interval_minutes, now_utc
+    )
+    step = slot_interval_minutes * 60
+    duration = service_duration_minutes * 60
+
+    available_slots = []
+    booked_index = 0
+    booked_count = len(merged_booked_intervals)
+
+    while slot_start <= last_slot_start:
+        while booked_index < booked_count and merged_booked_intervals[booked_index][1] <= slot_start:
+            booked_index += 1
+
+        if booked_index == booked_count or merged_booked_intervals[booked_index][0] >= slot_start + duration:
+            available_slots.append(datetime.fromtimestamp(slot_start, tz=timezone.utc))
+
+        slot_start += step
+
+    return available_slots
+
+
+def _generate_day_slots_from_bitmap(
+        target_date: date,
+        working_start_time: time,
+        working_end_time: time,
+        free_run_lengths: List[int],
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+        now_utc: datetime,
+) -> List[datetime]:
+    """
+    Builds the free slots of a single working day from the free-run lengths of its occupancy bitmap.
+    A slot is free when the run of free cells starting at it covers the whole service duration.
+    """
+    slot_start, last_slot_start = _slot_start_bounds(
+        target_date, working_start_time, working_end_time, service_duration_minutes, slot_interval_minutes, now_utc
+    )
+    day_start = int(datetime.combine(target_date, time.min).replace(tzinfo=timezone.utc).timestamp())
+    cells_needed = service_duration_minutes // occupancy_bitmap.CELL_MINUTES
+    step = slot_interval_minutes * 60
+
+    available_slots = []
+    while slot_start <= last_slot_start:
+        if free_run_lengths[(slot_start - day_start) // occupancy_bitmap.CELL_SECONDS] >= cells_needed:
+            available_slots.append(datetime.fromtimestamp(slot_start, tz=timezone.utc))
+        slot_start += step
+
+    return available_slots
+
+
+def _iter_days(date_from: date, date_to: date) -> List[date]:
+    return [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+
+
+def busy_appointments_query(barber_ids: List[int], window_start: datetime, window_end: datetime) -> Select:
+    """(barber_id, start, end) of the non-cancelled appointments of the given barbers overlapping the window."""
+    return (
+        select(Appointment.barber_id, Appointment.scheduled_time, Appointment.scheduled_end)
+        .where(Appointment.barber_id.in_(barber_ids))
+        .where(Appointment.scheduled_time < window_end)
+        .where(Appointment.scheduled_end > window_start)
+        .where(Appointment.status != AppointmentStatus.cancelled)
+    )
+
+
+def unavailable_times_query(barber_ids: List[int], window_start: datetime, window_end: datetime) -> Select:
+    """(barber_id, start, end) of the unavailable times of the given barbers overlapping the window."""
+    return (
+        select(BarberUnavailableTime.barber_id, BarberUnavailableTime.start_time, BarberUnavailableTime.end_time)
+        .where(BarberUnavailableTime.barber_id.in_(barber_ids))
+        .where(BarberUnavailableTime.start_time < window_end)
+        .where(BarberUnavailableTime.end_time > window_start)
+    )
+
+
+def _load_busy_intervals_by_day(
+        db: Session,
+        barber_ids: List[int],
+        date_from: date,
+        date_to: date,
+) -> Dict[int, Dict[date, List[Tuple[int, int]]]]:
+    """
+    Loads non-cancelled appointments and unavailable times of the given barbers for the whole
+    window in two queries and buckets them by barber and by every UTC day each interval touches.
+    """
+    window_start = datetime.combine(date_from, time.min).replace(tzinfo=timezone.utc)
+    window_end = datetime.combine(date_to + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
+
+    busy: Dict[int, Dict[date, List[Tuple[int, int]]]] = {barber_id: {} for barber_id in barber_ids}
+
+    def add_interval(barber_id: int, start_utc: datetime, end_utc: datetime) -> None:
+        first_day = max(start_utc.date(), date_from)
+        last_day = min((end_utc - timedelta(microseconds=1)).date(), date_to)
+        interval = (math.floor(start_utc.timestamp()), math.ceil(end_utc.timestamp()))
+        day = first_day
+        while day <= last_day:
+            busy[barber_id].setdefault(day, []).append(interval)
+            day += timedelta(days=1)
+
+    appointment_rows = db.execute(busy_appointments_query(barber_ids, window_start, window_end)).all()
+
+    for barber_id, scheduled_time, scheduled_end in appointment_rows:
+        add_interval(barber_id, to_utc(scheduled_time), to_utc(scheduled_end))
+
+    unavailable_rows = db.execute(unavailable_times_query(barber_ids, window_start, window_end)).all()
+
+    for barber_id, start_time, end_time in unavailable_rows:
+        add_interval(barber_id, to_utc(start_time), to_utc(end_time))
+
+    return busy
+
+
+def _build_missing_bitmaps(
+        db: Session,
+        bitmaps: Dict[int, Dict[date, Optional[int]]],
+) -> Dict[int, Dict[date, int]]:
+    """Builds the bitmaps occupancy_bitmap.fetch didn't find from the database, in bulk."""
+    missing = {
+        barber_id: [day for day, bitmap in bitmaps_by_day.items() if bitmap is None]
+        for barber_id, bitmaps_by_day in bitmaps.items()
+    }
+    missing = {barber_id: days for barber_id, days in missing.items() if days}
+    if not missing:
+        return {}
+
+    missing_days = [day for days in missing.values() for day in days]
+    busy_by_barber = _load_busy_intervals_by_day(db, list(missing), min(missing_days), max(missing_days))
+    return {
+        barber_id: {day: occupancy_bitmap.build(day, busy_by_barber[barber_id].get(day, [])) for day in days}
+        for barber_id, days in missing.items()
+    }
+
+
+def _load_day_bitmaps(db: Session, barber_days: Dict[int, List[date]]) -> Optional[Dict[int, Dict[date, int]]]:
+    """
+    Reads occupancy bitmaps of the given barber days from Redis and builds the missing ones
+    from the database in bulk. Returns None when Redis can't be used.
+    """
+    fetched = occupancy_bitmap.fetch(barber_days)
+    if fetched is None:
+        return None
+    bitmaps, versions = fetched
+
+    built = _build_missing_bitmaps(db, bitmaps)
+    if built:
+        occupancy_bitmap.store_many(built, versions)
+        for barber_id, bitmaps_by_day in built.items():
+            bitmaps[barber_id].update(bitmaps_by_day)
+
+    return bitmaps
+
+
+async def _load_day_bitmaps_async(
+        db: AsyncSession,
+        barber_days: Dict[int, List[date]],
+) -> Optional[Dict[int, Dict[date, int]]]:
+    """_load_day_bitmaps with the Redis calls in the threadpool and the queries through run_sync."""
+    fetched = await run_in_threadpool(occupancy_bitmap.fetch, barber_days)
+    if fetched is None:
+        return None
+    bitmaps, versions = fetched
+
+    built = await db.run_sync(_build_missing_bitmaps, bitmaps)
+    if built:
+        await run_in_threadpool(occupancy_bitmap.store_many, built, versions)
+        for barber_id, bitmaps_by_day in built.items():
+            bitmaps[barber_id].update(bitmaps_by_day)
+
+    return bitmaps
+
+
+SlotGenerator = Callable[[int, date, BarberSchedule], List[datetime]]
+
+
+def _bitmap_slot_generator(
+        bitmaps: Dict[int, Dict[date, int]],
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+) -> SlotGenerator:
+    now_utc = datetime.now(timezone.utc)
+
+    def generate_from_bitmap(barber_id: int, day: date, schedule_entry: BarberSchedule) -> List[datetime]:
+        return _generate_day_slots_from_bitmap(
+            target_date=day,
+            working_start_time=schedule_entry.start_time,
+            working_end_time=schedule_entry.end_time,
+            free_run_lengths=occupancy_bitmap.free_run_lengths(bitmaps[barber_id][day]),
+            service_duration_minutes=service_duration_minutes,
+            slot_interval_minutes=slot_interval_minutes,
+            now_utc=now_utc,
+        )
+
+    return generate_from_bitmap
+
+
+def _interval_slot_generator(
+        busy_by_barber: Dict[int, Dict[date, List[Tuple[int, int]]]],
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+) -> SlotGenerator:
+    now_utc = datetime.now(timezone.utc)
+
+    def generate_from_intervals(barber_id: int, day: date, schedule_entry: BarberSchedule) -> List[datetime]:
+        return _generate_day_slots(
+            target_date=day,
+            working_start_time=schedule_entry.start_time,
+            working_end_time=schedule_entry.end_time,
+            merged_booked_intervals=_merge_intervals(busy_by_barber[barber_id].get(day, [])),
+            service_duration_minutes=service_duration_minutes,
+            slot_interval_minutes=slot_interval_minutes,
+            now_utc=now_utc,
+        )
+
+    return generate_from_intervals
+
+
+def _load_slot_generator(
+        db: Session,
+        barber_days: Dict[int, List[date]],
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+) -> SlotGenerator:
+    """
+    Loads the occupancy of the given barber days with a fixed number of queries and returns a function
+    producing the free slots of one (barber_id, day, schedule_entry). Occupancy bitmaps are used when
+    enabled and compatible with the slot interval, merged busy intervals otherwise.
+    """
+    all_days = [day for days in barber_days.values() for day in days]
+
+    if all_days and occupancy_bitmap.is_usable(slot_interval_minutes, service_duration_minutes):
+        bitmaps = _load_day_bitmaps(db, barber_days)
+        if bitmaps is not None:
+            return _bitmap_slot_generator(bitmaps, service_duration_minutes, slot_interval_minutes)
+
+    busy_by_barber = _load_busy_intervals_by_day(db, list(barber_days), min(all_days), max(all_days)) \
+        if all_days else {}
+    return _interval_slot_generator(busy_by_barber, service_duration_minutes, slot_interval_minutes)
+
+
+async def _load_slot_generator_async(
+        db: AsyncSession,
+        barber_days: Dict[int, List[date]],
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+) -> SlotGenerator:
+    """_load_slot_generator for an AsyncSession; the sync Redis client is only used in the threadpool."""
+    all_days = [day for days in barber_days.values() for day in days]
+
+    if all_days and occupancy_bitmap.is_usable(slot_interval_minutes, service_duration_minutes):
+        bitmaps = await _load_day_bitmaps_async(db, barber_days)
+        if bitmaps is not None:
+            return _bitmap_slot_generator(bitmaps, service_duration_minutes, slot_interval_minutes)
+
+    busy_by_barber = await db.run_sync(
+        _load_busy_intervals_by_day, list(barber_days), min(all_days), max(all_days)
+    ) if all_days else {}
+    return _interval_slot_generator(busy_by_barber, service_duration_minutes, slot_interval_minutes)
+
+
+def _validate_date_range(date_from: date, date_to: date) -> None:
+    if date_to < date_from:
+        raise ValueError("date_to must not be earlier than date_from.")
+    if (date_to - date_from).days + 1 > MAX_AVAILABILITY_RANGE_DAYS:
+        raise ValueError(f"Date range must not exceed {MAX_AVAILABILITY_RANGE_DAYS} days.")
+
+
+def _load_barber_schedules(db: Session, barber_id: int) -> Dict[int, BarberSchedule]:
+    """The barber's weekly schedule entries by day of week."""
+    return {
+        schedule.day_of_week: schedule
+        for schedule in db.scalars(
+            select(BarberSchedule).where(BarberSchedule.barber_id == barber_id)
+        ).all()
+    }
+
+
+def _slots_by_day(
+        barber_id: int,
+        days: List[date],
+        schedules_by_day_of_week: Dict[int, BarberSchedule],
+        generate_slots: SlotGenerator,
+) -> Dict[date, List[datetime]]:
+    return {
+        day: generate_slots(barber_id, day, schedules_by_day_of_week[day.weekday()])
+        if day.weekday() in schedules_by_day_of_week else []
+        for day in days
+    }
+
+
+def _compute_available_timeslots(
+        db: Session,
+        barber_id: int,
+        date_from: date,
+        date_to: date,
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+) -> Dict[date, List[datetime]]:
+    days = _iter_days(date_from, date_to)
+    schedules_by_day_of_week = _load_barber_schedules(db, barber_id)
+    working_days = [day for day in days if day.weekday() in schedules_by_day_of_week]
+    if not working_days:
+        return {day: [] for day in days}
+
+    generate_slots = _load_slot_generator(
+        db, {barber_id: working_days}, service_duration_minutes, slot_interval_minutes
+    )
+    return _slots_by_day(barber_id, days, schedules_by_day_of_week, generate_slots)
+
+
+async def _compute_available_timeslots_async(
+        db: AsyncSession,
+        barber_id: int,
+        date_from: date,
+        date_to: date,
+        service_duration_minutes: int,
+        slot_interval_minutes: int,
+) -> Dict[date, List[datetime]]:
+    days = _iter_days(date_from, date_to)
+    schedules_by_day_of_week = await db.run_sync(_load_barber_schedules, barber_id)
+    working_days = [day for day in days if day.weekday() in schedules_by_day_of_week]
+    if not working_days:
+        return {day: [] for day in days}
+
+    generate_slots = await _load_slot_generator_async(
+        db, {barber_id: working_days}, service_duration_minutes, slot_interval_minutes
+    )
+    return _slots_by_day(barber_id, days, schedules_by_day_of_week, generate_slots)
+
+
+def get_available_timeslots_range(
+        db: Session,
+        barber_id: int,
+        date_from: date,
+        date_to: date,
+        service_id: int,
+        addon_ids: Optional[List[int]] = None,
+        slot_interval_minutes: int = 15,
+) -> Dict[date, List[datetime]]:
+    """
+    Computes available timeslots for every day in [date_from, date_to].
+    Schedules, appointments and unavailable times for the whole window are loaded in bulk,
+    so the number of queries does not depend on the number of days.
+    """
+    _validate_slot_interval(slot_interval_minutes)
+    _validate_date_range(date_from, date_to)
+
+    service_duration_minutes = _get_total_duration_minutes(db, service_id, addon_ids)
+    return _compute_available_timeslots(
+        db=db,
+        barber_id=barber_id,
+        date_from=date_from,
+        date_to=date_to,
+        service_duration_minutes=service_duration_minutes,
+        slot_interval_minutes=slot_interval_minutes,
+    )
+
+
+async def get_available_timeslots_range_async(
+        db: AsyncSession,
+        barber_id: int,
+        date_from: date,
+        date_to: date,
+        service_id: int,
+        addon_ids: Optional[List[int]] = None,
+        slot_interval_minutes: int = 15,
+) -> Dict[date, List[datetime]]:
+    """
+    get_available_timeslots_range for an AsyncSession. Queries go through run_sync and the
+    sync Redis calls of the occupancy bitmaps run in the threadpool, never on the event loop.
+    """
+    _validate_slot_interval(slot_interval_minutes)
+    _validate_date_range(date_from, date_to)
+
+    service_duration_minutes = await db.run_sync(_get_total_duration_minutes, service_id, addon_ids)
+    return await _compute_available_timeslots_async(
+        db=db,
+        barber_id=barber_id,
+        date_from=date_from,
+        date_to=date_to,
+        service_duration_minutes=service_duration_minutes,
+        slot_interval_minutes=slot_interval_minutes,
+    )
+
+
+def get_available_timeslots(
+        db: Session,
+        barber_id: int,
+        target_date: date,
+        service_id: int,
+        addon_ids: Optional[List[int]] = None,
+        slot_interval_minutes: int = 15,
+        use_cache: bool = True,
+) -> List[datetime]:
+    """
+    Computes available timeslots of a barber for a single day.
+    Results are served from the availability cache when possible; see services/availability_cache.
+    """
+    _validate_slot_interval(slot_interval_minutes)
+
+    service_duration_minutes = _get_total_duration_minutes(db, service_id, addon_ids)
+
+    cache_version = None
+    if use_cache:
+        cached_slots, cache_version = availability_cache.lookup(
+            barber_id, target_date, service_duration_minutes, slot_interval_minutes
+        )
+        if cached_slots is not None:
+            return cached_slots
+
+    available_slots = _compute_available_timeslots(
+        db=db,
+        barber_id=barber_id,
+        date_from=target_date,
+        date_to=target_date,
+        service_duration_minutes=service_duration_minutes,
+        slot_interval_minutes=slot_interval_minutes,
+    )[target_date]
+
+    if use_cache:
+        availability_cache.store(
+            barber_id, target_date, service_duration_minutes, slot_interval_minutes, available_slots, cache_version
+        )
 
-        for booked in merged_booked_intervals:
-            if not (potential_slot_end <= booked["start"] or current_slot_start >= booked["end"]):
-                is_available = False
-                break
+    return available_slots
 
-        if is_available:
-            available_slots.append(current_slot_start)
 
-        current_slot_start += timedelta(minutes=slot_interval_minutes)
+async def get_available_timeslots_async(
+        db: AsyncSession,
+        barber_id: int,
+        target_date: date,
+        service_id: int,
+        addon_ids: Optional[List[int]] = None,
+        slot_interval_minutes: int = 15,
+        use_cache: bool = True,
+) -> List[datetime]:
+    """
+    get_available_timeslots for an AsyncSession. Queries go through run_sync and the availability
+    cache and occupancy bitmap calls (sync Redis client) run in the threadpool.
+    """
+    _validate_slot_interval(slot_interval_minutes)
+
+    service_duration_minutes = await db.run_sync(_get_total_duration_minutes, service_id, addon_ids)
+
+    cache_version = None
+    if use_cache:
+        cached_slots, cache_version = await run_in_threadpool(
+            availability_cache.lookup, barber_id, target_date, service_duration_minutes, slot_interval_minutes
+        )
+        if cached_slots is not None:
+            return cached_slots
+
+    available_slots = (await _compute_available_timeslots_async(
+        db=db,
+        barber_id=barber_id,
+        date_from=target_date,
+        date_to=target_date,
+        service_duration_minutes=service_duration_minutes,
+        slot_interval_minutes=slot_interval_minutes,
+    ))[target_date]
+
+    if use_cache:
+        await run_in_threadpool(
+            availability_cache.store,
+            barber_id, target_date, service_duration_minutes, slot_interval_minutes, available_slots, cache_version
+        )
 
     return available_slots
 
 
+def _load_service_schedules(
+        db: Session,
+        service_id: int,
+        addon_ids: Optional[List[int]],
+) -> Dict[int, Dict[int, BarberSchedule]]:
+    """Weekly schedules by barber and day of week of the barbers offering the service and every addon."""
+    schedules_query = (
+        select(BarberSchedule)
+        .join(barber_service, barber_service.c.barber_id == BarberSchedule.barber_id)
+        .where(barber_service.c.service_id == service_id)
+    )
+    if addon_ids:
+        barbers_with_all_addons = (
+            select(barber_addon.c.barber_id)
+            .where(barber_addon.c.addon_id.in_(addon_ids))
+            .group_by(barber_addon.c.barber_id)
+            .having(func.count(func.distinct(barber_addon.c.addon_id)) == len(set(addon_ids)))
+        )
+        schedules_query = schedules_query.where(BarberSchedule.barber_id.in_(barbers_with_all_addons))
+
+    schedules_by_barber: Dict[int, Dict[int, BarberSchedule]] = {}
+    for schedule in db.scalars(schedules_query).all():
+        schedules_by_barber.setdefault(schedule.barber_id, {})[schedule.day_of_week] = schedule
+    return schedules_by_barber
+
+
+def _working_days_by_barber(
+        days: List[date],
+        schedules_by_barber: Dict[int, Dict[int, BarberSchedule]],
+) -> Dict[int, List[date]]:
+    return {
+        barber_id: [day for day in days if day.weekday() in schedules_by_day_of_week]
+        for barber_id, schedules_by_day_of_week in schedules_by_barber.items()
+    }
+
+
+def _earliest_slots(
+        days: List[date],
+        schedules_by_barber: Dict[int, Dict[int, BarberSchedule]],
+        generate_slots: SlotGenerator,
+        limit: int,
+) -> List[Tuple[datetime, int]]:
+    earliest_slots: List[Tuple[datetime, int]] = []
+    for day in days:
+        day_slots_per_barber = []
+        for barber_id, schedules_by_day_of_week in sorted(schedules_by_barber.items()):
+            schedule_entry = schedules_by_day_of_week.get(day.weekday())
+            if not schedule_entry:
+                continue
+            slots = generate_slots(barber_id, day, schedule_entry)
+            day_slots_per_barber.append([(slot, barber_id) for slot in slots])
+
+        for slot in heapq.merge(*day_slots_per_barber):
+            earliest_slots.append(slot)
+            if len(earliest_slots) >= limit:
+                return earliest_slots
+
+    return earliest_slots
+
+
+def get_first_available_timeslots(
+        db: Session,
+        service_id: int,
+        date_from: date,
+        date_to: date,
+        addon_ids: Optional[List[int]] = None,
+        slot_interval_minutes: int = 15,
+        limit: int = 20,
+) -> List[Tuple[datetime, int]]:
+    """
+    Finds the earliest free slots across all barbers offering the service (and every requested addon).
+    Returns up to `limit` (slot_start, barber_id) pairs ordered by time.
+    Schedules and busy intervals of all candidate barbers are loaded with set-based queries.
+    """
+    _validate_slot_interval(slot_interval_minutes)
+    _validate_date_range(date_from, date_to)
+
+    service_duration_minutes = _get_total_duration_minutes(db, service_id, addon_ids)
+    schedules_by_barber = _load_service_schedules(db, service_id, addon_ids)
+    if not schedules_by_barber:
+        return []
+
+    days = _iter_days(date_from, date_to)
+    generate_slots = _load_slot_generator(
+        db, _working_days_by_barber(days, schedules_by_barber), service_duration_minutes, slot_interval_minutes
+    )
+    return _earliest_slots(days, schedules_by_barber, generate_slots, limit)
+
+
+async def get_first_available_timeslots_async(
+        db: AsyncSession,
+        service_id: int,
+        date_from: date,
+        date_to: date,
+        addon_ids: Optional[List[int]] = None,
+        slot_interval_minutes: int = 15,
+        limit: int = 20,
+) -> List[Tuple[datetime, int]]:
+    """
+    get_first_available_timeslots for an AsyncSession. Queries go through run_sync and the
+    sync Redis calls of the occupancy bitmaps run in the threadpool, never on the event loop.
+    """
+    _validate_slot_interval(slot_interval_minutes)
+    _validate_date_range(date_from, date_to)
+
+    service_duration_minutes = await db.run_sync(_get_total_duration_minutes, service_id, addon_ids)
+    schedules_by_barber = await db.run_sync(_load_service_schedules, service_id, addon_ids)
+    if not schedules_by_barber:
+        return []
+
+    days = _iter_days(date_from, date_to)
+    generate_slots = await _load_slot_generator_async(
+        db, _working_days_by_barber(days, schedules_by_barber), service_duration_minutes, slot_interval_minutes
+    )
+    return _earliest_slots(days, schedules_by_barber, generate_slots, limit)
+
+
+def _commit_optimistic_booking(db: Session, barber_id: int, start_time: datetime, user_id: int) -> None:
+    """
+    Commits a booking inserted without a prior conflict check. The no_overlap_barber_time
+    exclusion constraint rejects overlaps and the barber foreign key rejects unknown barbers.
+    """
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        sqlstate = get_sqlstate(e)
+        if sqlstate == SQLSTATE_EXCLUSION_VIOLATION:
+            logger.warning(
+                f"Conflict detected for barber_id={barber_id} at {start_time} by the exclusion constraint. "
+                f"Request from user_id={user_id}"
+            )
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Time slot already booked for this barber")
+        if sqlstate == SQLSTATE_FOREIGN_KEY_VIOLATION:
+            logger.warning(f"Attempted to create appointment with non-existent barber ID {barber_id}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Barber not found.")
+        raise
+
+
+def mark_booked(barber_id: int, start: datetime, end: datetime) -> None:
+    """Updates the availability cache and the occupancy bitmaps (Redis) after a booking."""
+    availability_cache.invalidate_interval(barber_id, start, end)
+    occupancy_bitmap.mark_busy(barber_id, start, end)
+
+
 def create_appointment_with_checks(
         db: Session,
         data: AppointmentCreate,
-        user_id: int
+        user_id: int,
+        update_caches: bool = True
 ) -> Appointment:
+    """
+    Books the appointment after the conflict checks and commits.
+    Async callers pass update_caches=False and call mark_booked off the event loop, as it talks to Redis.
+    """
     service = db.get(Service, data.service_id)
     if not service:
         logger.warning(f"Attempted to create appointment with non-existent service ID {data.service_id}")
@@ -168,28 +766,30 @@ def create_appointment_with_checks(
     total_duration = service.duration + sum(addon.duration for addon in addons)
     total_price = service.price + sum(addon.price for addon in addons)
 
-    new_start_time = data.scheduled_time.replace(tzinfo=timezone.utc)
+    new_start_time = booking_time_as_utc(data.scheduled_time)
     new_end_time = new_start_time + timedelta(minutes=total_duration)
 
-    conflict = db.query(Appointment).with_for_update().filter(
-        Appointment.barber_id == data.barber_id,
-        Appointment.status != AppointmentStatus.cancelled,
-        Appointment.scheduled_time < new_end_time,
-        Appointment.scheduled_end > new_start_time
-    ).first()
-
-    if conflict:
-        logger.warning(
-            f"Conflict detected for barber_id={data.barber_id} at {new_start_time}. "
-            f"Conflicting appointment ID: {conflict.id} (Status: {conflict.status}). "
-            f"Request from user_id={user_id}"
-        )
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Time slot already booked for this barber")
+    optimistic = settings.BOOKING_CONFLICT_CHECK == "optimistic"
+    if not optimistic:
+        conflict = db.query(Appointment).with_for_update().filter(
+            Appointment.barber_id == data.barber_id,
+            Appointment.status != AppointmentStatus.cancelled,
+            Appointment.scheduled_time < new_end_time,
+            Appointment.scheduled_end > new_start_time
+        ).first()
+
+        if conflict:
+            logger.warning(
+                f"Conflict detected for barber_id={data.barber_id} at {new_start_time}. "
+                f"Conflicting appointment ID: {conflict.id} (Status: {conflict.status}). "
+                f"Request from user_id={user_id}"
+            )
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Time slot already booked for this barber")
 
-    barber = db.query(Barber).filter(Barber.id == data.barber_id).first()
-    if not barber:
-        logger.warning(f"Attempted to create appointment with non-existent barber ID {data.barber_id}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Barber not found.")
+        barber = db.query(Barber).filter(Barber.id == data.barber_id).first()
+        if not barber:
+            logger.warning(f"Attempted to create appointment with non-existent barber ID {data.barber_id}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Barber not found.")
 
     appointment_model = Appointment(
         name=data.name,
@@ -206,8 +806,22 @@ def create_appointment_with_checks(
     )
 
     db.add(appointment_model)
-    db.commit()
-    db.refresh(appointment_model)
+    if optimistic:
+        _commit_optimistic_booking(db, data.barber_id, new_start_time, user_id)
+    else:
+        db.commit()
+    # One reload with the relationships the response needs, instead of a refresh plus a lazy load for each.
+    # The id comes from the identity key, as reading the expired attribute would refresh the row first.
+    appointment_id = sa.inspect(appointment_model).identity[0]
+    appointment_model = db.scalars(
+        select(Appointment)
+        .where(Appointment.id == appointment_id)
+        .options(joinedload(Appointment.barber), joinedload(Appointment.service), selectinload(Appointment.addons))
+        .execution_options(populate_existing=True)
+    ).one()
+
+    if update_caches:
+        mark_booked(data.barber_id, new_start_time, new_end_time)
 
     logger.info(
         f"Appointment ID {appointment_model.id} created successfully for user_id={user_id} "
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from src.app.celery_worker import celery_app
+from src.app.core.config import settings
+from src.app.database import get_session_local
+from src.app.services.analytics import refresh_daily_rollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def refresh_barber_daily_stats(days_back: Optional[int] = None):
+    """
+    Periodic beat task: recomputes barber_daily_stats for the last ANALYTICS_ROLLUP_REFRESH_DAYS
+    days before today, so late status changes (completed, cancelled) reach the rollup.
+    Pass days_back to backfill a longer range.
+    """
+    if not settings.ANALYTICS_ROLLUP_ENABLED:
+        return 0
+
+    days_back = days_back or settings.ANALYTICS_ROLLUP_REFRESH_DAYS
+    today = datetime.now(timezone.utc).date()
+    date_from, date_to = today - timedelta(days=days_back), today - timedelta(days=1)
+
+    with get_session_local()() as db:
+        refresh_daily_rollup(db, date_from, date_to)
+    return days_back
@@ -1,16 +1,38 @@
-from celery import shared_task
-from src.app.services.email_service import send_email
+from typing import List
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from src.app.celery_worker import celery_app
+from src.app.services.email_service import deliver_email, deliver_emails
+from src.app.services.smtp_pool import smtp_pool
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=10)
 def send_email_task(self, email_to: str, subject: str, body: str):
     try:
-        send_email(email_to, subject, body)
-        logger.info("Email sent successfully to {email_to}")
+        deliver_email(email_to, subject, body)
+        logger.info(f"Email sent successfully to {email_to}")
 
     except Exception as e:
         logger.error(f"Failed to send email to {email_to}. Retrying. Reason: {e}")
-        raise self.retry(e=e)
+        raise self.retry(exc=e)
+
+
+@celery_app.task
+def send_email_batch_task(messages: List[dict]):
+    """
+    Sends many emails over one pooled SMTP session.
+    Messages that fail are re-queued one by one, so they get the single-email retries.
+    """
+    failed = deliver_emails(messages)
+    for message in failed:
+        send_email_task.delay(message["email_to"], message["subject"], message["body"])
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_smtp_connections(**kwargs):
+    smtp_pool.close_all()
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import Session
+
+from src.app.celery_worker import celery_app
+from src.app.core.config import settings
+from src.app.database import get_session_local
+from src.app.models import addon, service  # registers the mappers referenced by Appointment relationships
+from src.app.models.appointment import Appointment, AppointmentStatus
+from src.app.models.barber import Barber
+from src.app.models.user import User
+from src.app.services.email_service import build_appointment_reminder_email, send_emails
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def due_reminders_query(now: datetime) -> Select:
+    """
+    The next batch of upcoming appointments starting within REMINDER_LEAD_MINUTES that haven't
+    had a reminder, locked so overlapping runs split the work (SKIP LOCKED).
+    """
+    return (
+        select(Appointment.id, Appointment.scheduled_time, User.email, User.name, Barber.name)
+        .join(User, User.id == Appointment.user_id)
+        .join(Barber, Barber.id == Appointment.barber_id)
+        .where(
+            Appointment.status == AppointmentStatus.upcoming,
+            Appointment.reminder_sent_at.is_(None),
+            Appointment.scheduled_time > now,
+            Appointment.scheduled_time <= now + timedelta(minutes=settings.REMINDER_LEAD_MINUTES),
+        )
+        .order_by(Appointment.scheduled_time)
+        .limit(settings.REMINDER_BATCH_SIZE)
+        .with_for_update(of=Appointment, skip_locked=True)
+    )
+
+
+def _claim_due_reminders(db: Session, now: datetime) -> list[dict]:
+    """
+    Locks the next batch of due reminders, marks them as sent and returns their messages.
+    SKIP LOCKED lets overlapping runs split the work instead of sending the same reminder twice.
+    """
+    rows = db.execute(due_reminders_query(now)).all()
+    if not rows:
+        return []
+
+    db.execute(
+        update(Appointment)
+        .where(Appointment.id.in_([row[0] for row in rows]))
+        .values(reminder_sent_at=now)
+    )
+    db.commit()
+
+    return [
+        build_appointment_reminder_email(
+            email_to=email,
+            user_name=user_name,
+            scheduled_time=scheduled_time.astimezone(timezone.utc),
+            barber_name=barber_name,
+            frontend_url=settings.FRONTEND_URL,
+        )
+        for _, scheduled_time, email, user_name, barber_name in rows
+    ]
+
+
+def _skip_missed_reminders(db: Session, now: datetime) -> int:
+    """Appointments that started without a reminder (e.g. while beat was down) won't get one."""
+    result = db.execute(
+        update(Appointment)
+        .where(
+            Appointment.status == AppointmentStatus.upcoming,
+            Appointment.reminder_sent_at.is_(None),
+            Appointment.scheduled_time <= now,
+        )
+        .values(reminder_sent_at=now)
+    )
+    db.commit()
+    return result.rowcount
+
+
+@celery_app.task
+def send_due_reminders():
+    """
+    Periodic beat task: sends reminders for upcoming appointments starting within
+    REMINDER_LEAD_MINUTES, in batches of REMINDER_BATCH_SIZE, each over one SMTP session.
+    A reminder is marked as sent before it is queued, so it is sent at most once.
+    Cancelled and completed appointments drop out of the query by status.
+    """
+    now = datetime.now(timezone.utc)
+    sent = 0
+
+    with get_session_local()() as db:
+        skipped = _skip_missed_reminders(db, now)
+        while True:
+            messages = _claim_due_reminders(db, now)
+            send_emails(messages)
+            sent += len(messages)
+            if len(messages) < settings.REMINDER_BATCH_SIZE:
+                break
+
+    if sent or skipped:
+        logger.info(f"Queued {sent} appointment reminders, skipped {skipped} missed ones")
+    return sent